@@ -2,17 +2,57 @@ import os
 import shutil
 import zipfile
 from tqdm import tqdm
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 from halo import Halo
 import logging
 import sys
 from colorama import Fore, Back, Style
+from zip_writer import ZipWriter, ZIP_ZSTANDARD
+from tar_writer import (TarWriter, zstd_available, is_part_file, PART_FORMATS, PART_FORMAT_ZIP, PART_FORMAT_TAR,
+                        PART_FORMAT_TAR_ZST, PartBrokenError)
+from manifest import write_manifest
+from reclaimer import discard
+from toc import write_toc
+from zstd_dict import train_dictionary, write_dictionary, dictionary_name
+from scheduling import order_folders, folder_size, LatencyLog, PRIORITY_MARKER
+from cover import prepare_cover
+from file_index import FileIndex
+from profiling import profiled, profiled_function
+from autotune import HillClimber, initial_build_workers
+from read_order import order_for_reading, copy_sequential, prefetch, READ_ORDER_NONE
+from throttle import build_io_limited, lower_priority, run_with_lower_priority, init_build_process, settings
+import time
 
 logger = logging.getLogger("ZipFileSender.AutoZip")
 
-def compress_directory(src_dir, zip_name, total_size, zip_folder, compression=zipfile.ZIP_STORED):
+# Partes com pelo menos este número de arquivos por processo livre são montadas em
+# segmentos paralelos no modo de processos (ver build_segment)
+SEGMENT_MIN_FILES = 1000
+
+def write_tree(zipf, src_dir, pbar=None):
+    """Adiciona todos os arquivos de src_dir ao escritor, com caminhos relativos."""
+    for root, _, files in os.walk(src_dir):
+        for file in files:
+            file_path = os.path.join(root, file)
+            try:
+                file_size = os.path.getsize(file_path)
+                arcname = os.path.relpath(file_path, src_dir)
+                zipf.write(file_path, arcname)
+                if pbar is not None:
+                    pbar.update(file_size)
+            except PartBrokenError:
+                # Entrada parcial que não pôde ser desfeita: a parte inteira falha
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao adicionar arquivo {file_path} ao ZIP: {str(e)}")
+                continue
+
+@profiled_function("build", memory=False)
+def compress_directory(src_dir, zip_name, total_size, zip_folder, compression=zipfile.ZIP_STORED, threads=1,
+                       compresslevel=None, show_progress=True, record=None, hash_algorithm=None, zstd_dict=None,
+                       part_format=PART_FORMAT_ZIP):
     """
-    Compacta um diretório em um arquivo ZIP.
+    Compacta um diretório em um arquivo ZIP (ou tar / tar.zst).
     
     Args:
         src_dir (str): Diretório fonte a ser compactado
@@ -20,24 +60,37 @@ def compress_directory(src_dir, zip_name, total_size, zip_folder, compression=zi
         total_size (int): Tamanho total em bytes dos arquivos a serem compactados
         zip_folder (str): Pasta onde será salvo o arquivo ZIP
         compression (int): Método de compressão (padrão: ZIP_STORED)
+        threads (int): Threads para CRC-32 e compressão paralelos de arquivos grandes
+        compresslevel (int): Nível de compressão do DEFLATE (padrão: nível padrão do zlib)
+        show_progress (bool): Exibir a barra de progresso por arquivo
+        record (dict): Se informado, recebe 'zip_name', 'size', 'digest', 'entries'
+            [(arcname, tamanho, crc, hash), ...] e 'toc' (posição de cada entrada, ver
+            ZipWriter.toc) da parte gravada
+        hash_algorithm (str): Algoritmo de hash calculado durante a escrita (ex.: "sha256")
+        zstd_dict (bytes): Dicionário Zstandard treinado (com compression=ZIP_ZSTANDARD)
+        part_format (str): "zip", "tar" ou "tar.zst" (tar com compression=ZIP_ZSTANDARD)
     """
     zip_file_path = os.path.join(zip_folder, zip_name)
     try:
-        with zipfile.ZipFile(zip_file_path, 'w', compression) as zipf:
+        # Sem compressão, o escritor usa cópia pelo kernel (zero-copy); com compressão,
+        # arquivos grandes são comprimidos em blocos paralelos
+        if part_format == PART_FORMAT_ZIP:
+            writer = ZipWriter(zip_file_path, threads=threads, compression=compression,
+                               compresslevel=compresslevel, hash_algorithm=hash_algorithm,
+                               zstd_dict=zstd_dict)
+        else:
+            # tar / tar.zst: gravação estritamente sequencial, sem diretório central
+            writer = TarWriter(zip_file_path, threads=threads, compression=compression,
+                               compresslevel=compresslevel, hash_algorithm=hash_algorithm)
+        with writer as zipf:
             with tqdm(total=total_size, desc=f"{Fore.MAGENTA}Compactando {zip_name}{Fore.RESET}", 
                      unit="B", unit_scale=True, unit_divisor=1024,
-                     bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]") as pbar:
-                for root, _, files in os.walk(src_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        try:
-                            file_size = os.path.getsize(file_path)
-                            arcname = os.path.relpath(file_path, src_dir)
-                            zipf.write(file_path, arcname)
-                            pbar.update(file_size)
-                        except Exception as e:
-                            logger.error(f"Erro ao adicionar arquivo {file_path} ao ZIP: {str(e)}")
-                            continue
+                     bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
+                     disable=not show_progress) as pbar:
+                write_tree(zipf, src_dir, pbar)
+        if record is not None:
+            record.update(zip_name=zip_name, size=zipf.size, digest=zipf.digest, entries=zipf.entries,
+                          toc=zipf.toc)
         
         print(f"{Fore.GREEN}{Style.BRIGHT}✅ Arquivo {zip_name} criado com sucesso!{Style.RESET_ALL}")
         logger.info(f"Arquivo {zip_name} criado com sucesso.")
@@ -50,64 +103,255 @@ def compress_directory(src_dir, zip_name, total_size, zip_folder, compression=zi
             os.remove(zip_file_path)
         return False
 
-def create_subfolders(files, max_size):
+@profiled_function("copy")
+def stage_part_files(folder_path, part_files, temp_folder, index, show_progress=True,
+                     read_order=READ_ORDER_NONE):
+    """
+    Copia os arquivos de uma parte para sua pasta temporária, mantendo a estrutura relativa.
+    
+    Args:
+        folder_path (str): Pasta de origem
+        part_files (list): Caminhos dos arquivos da parte
+        temp_folder (str): Pasta temporária da parte
+        index (int): Índice da parte
+        show_progress (bool): Exibir a barra de progresso
+        read_order (str): "inode" ou "extent" lê os arquivos na ordem física do disco,
+            com leitura antecipada do próximo arquivo e descarte das páginas da origem
+            após a cópia; "none" mantém a ordem do planejamento
+    
+    Com limites de leitura/escrita (read_rate_mb / write_rate_mb), a cópia é feita em
+    blocos dentro da taxa.
+    """
+    sequential = read_order != READ_ORDER_NONE
+    limited = build_io_limited()
+    part_files = order_for_reading(part_files, read_order)
+    # Barra de progresso para cópia de arquivos
+    with tqdm(total=len(part_files), desc=f"{Fore.BLUE}Copiando arquivos (parte {index}){Fore.RESET}", 
+             bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt}", disable=not show_progress) as copy_progress:
+        for position, file in enumerate(part_files):
+            if sequential and position + 1 < len(part_files):
+                # Leitura antecipada do próximo arquivo enquanto este é copiado
+                prefetch(part_files[position + 1])
+            try:
+                rel_path = os.path.relpath(file, folder_path)
+                dest_path = os.path.join(temp_folder, rel_path)
+                
+                # Criar diretórios de destino se não existirem
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                
+                # Copiar arquivo
+                if sequential or limited:
+                    copy_sequential(file, dest_path)
+                else:
+                    shutil.copy2(file, dest_path)
+                copy_progress.update(1)
+            except Exception as e:
+                logger.error(f"Erro ao copiar arquivo {file}: {str(e)}")
+                copy_progress.update(1)
+                continue
+
+def split_part(index, start, end, segments):
+    """
+    Divide o intervalo de arquivos de uma parte em até `segments` intervalos de
+    tamanho (em bytes) parecido.
+
+    Args:
+        index (FileIndex): Índice dos arquivos
+        start (int): Início do intervalo da parte
+        end (int): Fim do intervalo da parte
+        segments (int): Número de segmentos desejado
+
+    Returns:
+        list: Intervalos (início, fim) de cada segmento
+    """
+    total = index.total_size(start, end)
+    target = total / segments
+    ranges = []
+    seg_start = start
+    accumulated = 0
+    for i in range(start, end):
+        accumulated += index.sizes[i]
+        if len(ranges) < segments - 1 and accumulated >= target * (len(ranges) + 1) and i + 1 < end:
+            ranges.append((seg_start, i + 1))
+            seg_start = i + 1
+    ranges.append((seg_start, end))
+    return ranges
+
+def build_segment(folder_path, part_files, temp_folder, index, segment_path, compression=zipfile.ZIP_STORED,
+                  compresslevel=None, hash_algorithm=None, read_order=READ_ORDER_NONE, zstd_dict=None):
+    """
+    Monta um segmento de uma parte ZIP (cópia + entradas, sem diretório central)
+    dentro de um processo do pool. Os segmentos de uma parte são unidos por join_segments.
+
+    Returns:
+        list: Entradas do segmento (ver ZipWriter.segment_entries)
+    """
+    stage_part_files(folder_path, part_files, temp_folder, index, show_progress=False, read_order=read_order)
+    with ZipWriter(segment_path, compression=compression, compresslevel=compresslevel,
+                   hash_algorithm=hash_algorithm, zstd_dict=zstd_dict, segment=True) as writer:
+        write_tree(writer, temp_folder)
+    return writer.segment_entries
+
+def join_segments(segments, zip_name, zip_folder, hash_algorithm=None):
+    """
+    Une os segmentos de uma parte em um único ZIP e remove os arquivos dos segmentos.
+
+    Args:
+        segments (list): (caminho do segmento, entradas), na ordem da parte
+
+    Returns:
+        dict: Registro da parte (ver compress_directory)
+    """
+    zip_file_path = os.path.join(zip_folder, zip_name)
+    try:
+        with ZipWriter(zip_file_path, hash_algorithm=hash_algorithm) as writer:
+            for segment_path, entries in segments:
+                writer.append_segment(segment_path, entries)
+    except Exception:
+        if os.path.exists(zip_file_path):
+            os.remove(zip_file_path)
+        raise
+    finally:
+        for segment_path, _ in segments:
+            if os.path.exists(segment_path):
+                os.remove(segment_path)
+    print(f"{Fore.GREEN}{Style.BRIGHT}✅ Arquivo {zip_name} criado com sucesso ({len(segments)} segmentos)!{Style.RESET_ALL}")
+    return dict(zip_name=zip_name, size=writer.size, digest=writer.digest, entries=writer.entries,
+                toc=writer.toc)
+
+def build_part(folder_path, part_files, temp_folder, index, zip_name, total_size, zip_folder,
+               compression=zipfile.ZIP_STORED, threads=1, compresslevel=None, hash_algorithm=None,
+               read_order=READ_ORDER_NONE, zstd_dict=None, part_format=PART_FORMAT_ZIP):
+    """
+    Monta uma parte completa (cópia + compactação) dentro de um processo do pool.
+    
+    Recebe apenas caminhos e devolve apenas um registro pequeno, sem trafegar
+    dados de arquivos entre processos.
+    
+    Returns:
+        dict: Registro da parte (ver compress_directory) ou None em caso de falha
+    """
+    stage_part_files(folder_path, part_files, temp_folder, index, show_progress=False, read_order=read_order)
+    record = {}
+    if not compress_directory(temp_folder, zip_name, total_size, zip_folder, compression, threads,
+                              compresslevel, show_progress=False, record=record,
+                              hash_algorithm=hash_algorithm, zstd_dict=zstd_dict,
+                              part_format=part_format):
+        return None
+    return record
+
+@profiled_function("plan")
+def create_subfolders(index, max_size, planner=None):
     """
     Divide os arquivos em subpastas com base no tamanho máximo.
     
     Args:
-        files (dict): Dicionário de arquivos e seus tamanhos
+        index (FileIndex): Índice dos arquivos (é reordenado por tamanho)
         max_size (int): Tamanho máximo em bytes para cada subpasta
+        planner (PartSizePlanner): Se informado, escolhe o tamanho das partes desta pasta
+            pelo histórico de envio (max_size passa a ser o limite configurado)
         
     Returns:
-        list: Lista de listas de arquivos, cada lista representa uma subpasta
+        list: Lista de intervalos (início, fim) sobre o índice, cada um representa uma subpasta
     """
     subfolders = []
-    current_subfolder = []
+    start = 0
     current_size = 0
     
-    print(f"{Fore.CYAN}{Style.BRIGHT}📊 Organizando {len(files)} arquivos em partes...{Style.RESET_ALL}")
+    if planner is not None:
+        max_size = planner.part_size(index.total_size(), max_size)
+        print(f"{Fore.CYAN}📐 Tamanho de parte escolhido: {max_size/(1024**2):.0f} MB{Style.RESET_ALL}")
+    
+    print(f"{Fore.CYAN}{Style.BRIGHT}📊 Organizando {len(index)} arquivos em partes...{Style.RESET_ALL}")
     
-    # Ordenar arquivos por tamanho (do maior para o menor)
-    for file, size in sorted(files.items(), key=lambda item: -item[1]):
+    # Ordenar arquivos por tamanho (do maior para o menor); como os arquivos são
+    # agrupados nessa ordem, cada subpasta é um intervalo contínuo do índice
+    index.sort_by_size()
+    sizes = index.sizes
+    for i in range(len(index)):
+        size = sizes[i]
         # Se o arquivo for maior que o tamanho máximo permitido, pule-o
+        # (por vir primeiro na ordenação, a subpasta atual ainda está vazia)
         if size > max_size:
-            print(f"{Fore.YELLOW}⚠️ Arquivo {Fore.WHITE}{os.path.basename(file)}{Fore.YELLOW} ({size/(1024**2):.2f} MB) é maior que o tamanho máximo permitido ({max_size/(1024**2):.2f} MB). Será compactado separadamente.{Style.RESET_ALL}")
-            logger.warning(f"Arquivo {os.path.basename(file)} ({size/(1024**2):.2f} MB) é maior que o tamanho máximo permitido ({max_size/(1024**2):.2f} MB). Será compactado separadamente.")
-            subfolders.append([file])
+            name = index.name(i)
+            print(f"{Fore.YELLOW}⚠️ Arquivo {Fore.WHITE}{name}{Fore.YELLOW} ({size/(1024**2):.2f} MB) é maior que o tamanho máximo permitido ({max_size/(1024**2):.2f} MB). Será compactado separadamente.{Style.RESET_ALL}")
+            logger.warning(f"Arquivo {name} ({size/(1024**2):.2f} MB) é maior que o tamanho máximo permitido ({max_size/(1024**2):.2f} MB). Será compactado separadamente.")
+            subfolders.append((i, i + 1))
+            start = i + 1
             continue
             
         # Se adicionar este arquivo fizer a pasta atual exceder o tamanho máximo,
         # comece uma nova pasta
         if current_size + size > max_size:
-            if current_subfolder:
-                subfolders.append(current_subfolder)
-                current_subfolder = []
+            if i > start:
+                subfolders.append((start, i))
+                start = i
                 current_size = 0
                 
-        current_subfolder.append(file)
         current_size += size
         
     # Adicione a última pasta se ela não estiver vazia
-    if current_subfolder:
-        subfolders.append(current_subfolder)
+    if start < len(index):
+        subfolders.append((start, len(index)))
         
     print(f"{Fore.GREEN}Arquivos organizados em {len(subfolders)} partes.{Style.RESET_ALL}")
     return subfolders
 
-def generate_zip_name(base_name, index):
+def generate_zip_name(base_name, index, part_format=PART_FORMAT_ZIP):
     """
     Gera um nome para o arquivo ZIP com base no nome da pasta e no índice.
     
     Args:
         base_name (str): Nome base (nome da pasta)
         index (int): Índice da parte
+        part_format (str): Formato da parte, usado como extensão ("zip", "tar" ou "tar.zst")
         
     Returns:
         str: Nome do arquivo ZIP
     """
-    return f"{base_name}_parte_{index:02}.zip"
+    return f"{base_name}_parte_{index:02}.{part_format}"
+
+def build_method(part_format, compression_level):
+    """Identifica formato e nível no histórico de compactação (ex.: "zip:6")."""
+    return f"{part_format}:{compression_level}"
+
+def select_compression(compression_level, part_format=PART_FORMAT_ZIP):
+    """
+    Escolhe o método de compressão pelo nível (ou pelo formato, no tar).
+    
+    Args:
+        compression_level (int): Nível de compressão (0=nenhuma, 9=máxima)
+        part_format (str): "zip", "tar" ou "tar.zst"
+        
+    Returns:
+        tuple: (método de compressão, formato), com o formato corrigido se for
+            desconhecido ou se o tar.zst não estiver disponível
+    """
+    if part_format not in PART_FORMATS:
+        logger.warning(f"Formato de parte desconhecido: {part_format}. Usando '{PART_FORMAT_ZIP}'.")
+        part_format = PART_FORMAT_ZIP
+    if part_format == PART_FORMAT_TAR_ZST and not zstd_available():
+        logger.warning("Pacote zstandard não instalado; usando partes tar sem compressão.")
+        part_format = PART_FORMAT_TAR
+    
+    if part_format == PART_FORMAT_TAR:
+        compression = zipfile.ZIP_STORED
+        print(f"{Fore.BLUE}ℹ️ Usando partes tar sem compressão{Style.RESET_ALL}")
+    elif part_format == PART_FORMAT_TAR_ZST:
+        compression = ZIP_ZSTANDARD
+        print(f"{Fore.BLUE}ℹ️ Usando partes tar.zst (nível {compression_level or 'padrão'}){Style.RESET_ALL}")
+    elif compression_level == 0:
+        compression = zipfile.ZIP_STORED
+        print(f"{Fore.BLUE}ℹ️ Usando modo sem compressão (mais rápido){Style.RESET_ALL}")
+    else:
+        compression = zipfile.ZIP_DEFLATED
+        print(f"{Fore.BLUE}ℹ️ Usando modo comprimido (nível {compression_level}){Style.RESET_ALL}")
+    return compression, part_format
 
-def process_folder(input_folder, output_folder, max_size_per_zip, threads=4, compression_level=0):
+def process_folder(input_folder, output_folder, max_size_per_zip, threads=4, compression_level=0,
+                   build_backend="thread", manifest_hash="sha256", schedule_policy="name", optimize_cover=True,
+                   autotune=False, part_size_planner=None, read_order=READ_ORDER_NONE, content_index=True,
+                   zstd_dictionary=False, part_format=PART_FORMAT_ZIP):
     """
     Processa as pastas de entrada, dividindo arquivos e criando ZIPs.
     
@@ -117,6 +361,21 @@ def process_folder(input_folder, output_folder, max_size_per_zip, threads=4, com
         max_size_per_zip (int): Tamanho máximo em bytes para cada ZIP
         threads (int): Número de threads para compressão paralela
         compression_level (int): Nível de compressão (0=nenhuma, 9=máxima)
+        build_backend (str): "thread" ou "process" (pool de processos para muitos arquivos pequenos)
+        manifest_hash (str): Algoritmo do manifesto de integridade (vazio para desativar)
+        schedule_policy (str): Ordem das pastas: "name", "sjf", "fifo" ou "priority"
+        optimize_cover (bool): Reduzir/recodificar a capa e gerar miniatura em segundo plano
+        autotune (bool): Ajustar o número de partes montadas em paralelo pelo throughput
+            medido (threads passa a ser o valor inicial, até o número de núcleos)
+        part_size_planner (PartSizePlanner): Escolhe o tamanho das partes de cada pasta
+            (modo adaptativo); sem ele, todas as partes usam max_size_per_zip
+        read_order (str): Ordem de leitura dos arquivos de cada parte: "none", "inode" ou "extent"
+        content_index (bool): Gravar o índice de conteúdo (qual parte contém cada arquivo)
+        zstd_dictionary (bool): Em pastas de muitos arquivos pequenos, comprimir com Zstandard
+            e um dicionário treinado na própria pasta (requer o pacote zstandard)
+        part_format (str): Formato das partes: "zip", "tar" (sem compressão) ou "tar.zst"
+            (Zstandard multithread no nível compression_level); o tar é gravado de forma
+            estritamente sequencial
     """
     if not os.path.isdir(input_folder):
         error_msg = f"O caminho especificado não é um diretório: {input_folder}"
@@ -124,13 +383,8 @@ def process_folder(input_folder, output_folder, max_size_per_zip, threads=4, com
         print(f"{Fore.RED}{Style.BRIGHT}❌ {error_msg}{Style.RESET_ALL}")
         raise ValueError(error_msg)
         
-    # Selecionar método de compressão baseado no nível
-    if compression_level == 0:
-        compression = zipfile.ZIP_STORED
-        print(f"{Fore.BLUE}ℹ️ Usando modo sem compressão (mais rápido){Style.RESET_ALL}")
-    else:
-        compression = zipfile.ZIP_DEFLATED
-        print(f"{Fore.BLUE}ℹ️ Usando modo comprimido (nível {compression_level}){Style.RESET_ALL}")
+    # Selecionar método de compressão baseado no nível (ou no formato, no tar)
+    compression, part_format = select_compression(compression_level, part_format)
         
     # Criar pasta de saída se não existir
     os.makedirs(output_folder, exist_ok=True)
@@ -150,9 +404,21 @@ def process_folder(input_folder, output_folder, max_size_per_zip, threads=4, com
     print(f"{Fore.CYAN}{Style.BRIGHT}🔍 Encontradas {len(folders_to_process)} pasta(s) para processar{Style.RESET_ALL}")
     logger.info(f"Processando {len(folders_to_process)} pasta(s)")
     
-    # Barra de progresso para processamento de pastas
+    # Ordenar as pastas de acordo com a política de agendamento
+    folders_to_process = order_folders(folders_to_process, schedule_policy)
+    logger.info(f"Política de agendamento: {schedule_policy}")
+    latency_log = LatencyLog("build", schedule_policy)
+    
+    # O ajuste automático continua de uma pasta para a seguinte
+    build_tuner = None
+    if autotune:
+        build_tuner = HillClimber("build", threads, 1, max(threads, os.cpu_count() or 1))
+    
+    # Barra de progresso para processamento de pastas; as capas são preparadas em um
+    # pool separado enquanto as partes da pasta são montadas
     with tqdm(total=len(folders_to_process), desc=f"{Fore.BLUE}Processando pastas{Fore.RESET}", 
-             bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt}") as folders_progress:
+             bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt}") as folders_progress, \
+            ThreadPoolExecutor(max_workers=2) as cover_pool:
     
         for folder_path in folders_to_process:
             base_folder_name = os.path.basename(folder_path.rstrip("\\/"))
@@ -161,41 +427,75 @@ def process_folder(input_folder, output_folder, max_size_per_zip, threads=4, com
             
             print(f"\n{Fore.CYAN}{Style.BRIGHT}📁 Processando pasta: {base_folder_name}{Style.RESET_ALL}")
             logger.info(f"Processando pasta: {base_folder_name}")
+            started_at = time.time()
+            folder_bytes = folder_size(folder_path)
             
-            # Copiar arquivos de capa para a pasta de saída
-            has_cover = False
+            # Copiar (ou otimizar em segundo plano) a capa para a pasta de saída
+            cover_future = None
+            cover_name = None
             for cover_name in ['cover.jpg', 'cover.png']:
                 cover_path = os.path.join(folder_path, cover_name)
                 if os.path.exists(cover_path):
-                    try:
-                        shutil.copy(cover_path, zip_folder)
-                        print(f"{Fore.GREEN}🖼️ Capa {cover_name} copiada para {zip_folder}{Style.RESET_ALL}")
-                        logger.info(f"Capa {cover_name} copiada para {zip_folder}")
-                        has_cover = True
-                    except Exception as e:
-                        print(f"{Fore.RED}❌ Erro ao copiar capa {cover_name}: {str(e)}{Style.RESET_ALL}")
-                        logger.error(f"Erro ao copiar capa {cover_name}: {str(e)}")
-                    break  # Sair do loop após copiar a primeira capa encontrada
+                    if optimize_cover:
+                        cover_future = cover_pool.submit(prepare_cover, cover_path, zip_folder)
+                    else:
+                        cover_future = cover_pool.submit(shutil.copy, cover_path, zip_folder)
+                    break  # Usar apenas a primeira capa encontrada
 
-            if not has_cover:
+            if cover_future is None:
                 print(f"{Fore.YELLOW}ℹ️ Nenhuma capa encontrada para esta pasta{Style.RESET_ALL}")
 
+            # Levar a prioridade para a pasta de saída, para a ordem de envio
+            priority_path = os.path.join(folder_path, PRIORITY_MARKER)
+            if os.path.exists(priority_path):
+                try:
+                    shutil.copy(priority_path, zip_folder)
+                except Exception as e:
+                    logger.error(f"Erro ao copiar marcador de prioridade: {str(e)}")
+
             # Processar os arquivos da pasta
             try:
-                prepare_files_for_upload(folder_path, threads, zip_folder, max_size_per_zip, compression)
+                prepared = prepare_files_for_upload(folder_path, threads, zip_folder, max_size_per_zip, compression,
+                                                    compression_level or None, build_backend, manifest_hash,
+                                                    build_tuner, part_size_planner, read_order, content_index,
+                                                    zstd_dictionary, part_format)
+                if prepared is False:
+                    # A pasta de origem só é removida se todas as partes foram montadas
+                    raise RuntimeError(f"Falha ao montar as partes de {base_folder_name}; pasta mantida em input/")
+                
+                # A capa precisa estar pronta antes de remover a pasta original
+                if cover_future is not None:
+                    try:
+                        cover_future.result()
+                        print(f"{Fore.GREEN}🖼️ Capa {cover_name} preparada em {zip_folder}{Style.RESET_ALL}")
+                        logger.info(f"Capa {cover_name} preparada em {zip_folder}")
+                    except Exception as e:
+                        print(f"{Fore.RED}❌ Erro ao copiar capa {cover_name}: {str(e)}{Style.RESET_ALL}")
+                        logger.error(f"Erro ao copiar capa {cover_name}: {str(e)}")
                 
-                # Após a compactação, remover a pasta original se for bem-sucedido
-                shutil.rmtree(folder_path)
+                # Após a compactação, remover a pasta original se for bem-sucedido (a pasta
+                # sai de input/ na hora; os arquivos são apagados em segundo plano)
+                discard(folder_path)
                 print(f"{Fore.GREEN}{Style.BRIGHT}✅ Pasta {folder_path} removida com sucesso!{Style.RESET_ALL}")
                 logger.info(f"Pasta {folder_path} removida com sucesso.")
+                output_bytes = sum(os.path.getsize(os.path.join(zip_folder, file))
+                                   for file in os.listdir(zip_folder) if is_part_file(file))
+                latency_log.record(base_folder_name, folder_bytes, started_at, output_bytes=output_bytes,
+                                   method=build_method(part_format, compression_level))
             except Exception as e:
                 print(f"{Fore.RED}{Style.BRIGHT}❌ Erro ao processar pasta {folder_path}: {str(e)}{Style.RESET_ALL}")
                 logger.error(f"Erro ao processar pasta {folder_path}: {str(e)}")
+                latency_log.record(base_folder_name, folder_bytes, started_at, success=False)
                 continue
                 
             folders_progress.update(1)
+    
+    logger.info(f"Latência média de compactação ({schedule_policy}): {latency_log.mean_latency:.1f}s")
 
-def prepare_files_for_upload(folder_path, threads, zip_folder, max_size, compression=zipfile.ZIP_STORED):
+def prepare_files_for_upload(folder_path, threads, zip_folder, max_size, compression=zipfile.ZIP_STORED,
+                             compresslevel=None, build_backend="thread", hash_algorithm=None, tuner=None,
+                             planner=None, read_order=READ_ORDER_NONE, content_index=True,
+                             zstd_dictionary=False, part_format=PART_FORMAT_ZIP):
     """
     Prepara os arquivos para upload, dividindo em partes e compactando.
     
@@ -205,97 +505,258 @@ def prepare_files_for_upload(folder_path, threads, zip_folder, max_size, compres
         zip_folder (str): Pasta onde serão salvos os ZIPs
         max_size (int): Tamanho máximo em bytes para cada ZIP
         compression (int): Método de compressão
+        compresslevel (int): Nível de compressão do DEFLATE
+        build_backend (str): "thread" compacta as partes em threads; "process" monta cada
+            parte (cópia + compactação) em um processo separado, evitando o GIL em pastas
+            com muitos arquivos pequenos
+        hash_algorithm (str): Se informado, grava um manifesto com o hash de cada parte e
+            de cada arquivo, calculados durante a compactação
+        tuner (HillClimber): Se informado, define quantas partes são montadas ao mesmo
+            tempo, ajustado a cada parte concluída pelo throughput medido
+        planner (PartSizePlanner): Se informado, escolhe o tamanho das partes da pasta
+        read_order (str): Ordem de leitura dos arquivos de origem (ver stage_part_files)
+        content_index (bool): Gravar o índice de conteúdo com a parte e a posição de cada
+            arquivo, enviado antes das partes
+        zstd_dictionary (bool): Se a pasta for formada por muitos arquivos pequenos, treina
+            um dicionário Zstandard com uma amostra dela e comprime as entradas com ele
+            (método 93 do ZIP); o dicionário é gravado ao lado das partes
+        part_format (str): "zip", "tar" ou "tar.zst" (ver compress_directory); o
+            dicionário Zstandard só se aplica ao ZIP, já que o tar.zst comprime a parte
+            inteira como um único stream
     """
     base_folder_name = os.path.basename(folder_path.rstrip("\\/"))
     
     # Obter lista de arquivos e seus tamanhos
     print(f"{Fore.CYAN}🔍 Escaneando arquivos na pasta {base_folder_name}...{Style.RESET_ALL}")
     
-    files = {os.path.join(root, file): os.path.getsize(os.path.join(root, file))
-             for root, dirs, files in os.walk(folder_path)
-             for file in files}
+    with profiled("scan"):
+        files = FileIndex.scan(folder_path, exclude=(PRIORITY_MARKER,))
 
-    if not files:
+    if not len(files):
         logger.warning(f"Não há arquivos a serem zipados na pasta {folder_path}.")
         print(f"{Fore.YELLOW}{Style.BRIGHT}⚠️ Não há arquivos a serem zipados na pasta {folder_path}.{Style.RESET_ALL}")
         return
 
     total_files = len(files)
-    total_size = sum(files.values())
+    total_size = files.total_size()
     print(f"{Fore.GREEN}📊 Encontrados {total_files} arquivos ({total_size/(1024**2):.2f} MB){Style.RESET_ALL}")
 
+    # Ajuste automático: valor inicial medido no hardware na primeira pasta, antes que o
+    # dicionário e a cópia leiam os arquivos (a medição seria do cache, não do disco)
+    if tuner is not None and not tuner.calibrated:
+        tuner.calibrate(initial_build_workers(files.paths(0, min(len(files), 64)),
+                                              compression != zipfile.ZIP_STORED, compresslevel,
+                                              tuner.maximum))
+
+    # Dicionário Zstandard para pastas de muitos arquivos pequenos e parecidos
+    zstd_dict = None
+    if zstd_dictionary and part_format == PART_FORMAT_ZIP:
+        zstd_dict = train_dictionary(files)
+        if zstd_dict:
+            compression = ZIP_ZSTANDARD
+            write_dictionary(zip_folder, base_folder_name, zstd_dict)
+            print(f"{Fore.GREEN}📚 Dicionário Zstandard treinado ({len(zstd_dict)/1024:.0f} KB){Style.RESET_ALL}")
+        else:
+            logger.info(f"Pasta {base_folder_name} sem dicionário Zstandard; usando o método configurado.")
+
     spinner = Halo(text=f'{Fore.MAGENTA}Dividindo arquivos em partes...{Fore.RESET}', spinner='dots', color='magenta')
     spinner.start()
 
     subfolders = []
     temp_folders = []
+    part_segments = {}
 
     try:
         # Criar subpastas baseadas no tamanho máximo
-        subfolders = create_subfolders(files, max_size)
+        subfolders = create_subfolders(files, max_size, planner)
         logger.info(f"Pasta {base_folder_name} dividida em {len(subfolders)} parte(s)")
         
         # Criar pastas temporárias e mover arquivos
         print(f"{Fore.CYAN}📋 Preparando {len(subfolders)} parte(s) para compactação...{Style.RESET_ALL}")
         
-        for index, subfolder in enumerate(subfolders, start=1):
+        for index, (start, end) in enumerate(subfolders, start=1):
             temp_folder = os.path.join(zip_folder, f"temp_folder_{index}")
             os.makedirs(temp_folder, exist_ok=True)
-            total_size = sum(files[file] for file in subfolder)
+            total_size = files.total_size(start, end)
             temp_folders.append((temp_folder, total_size))
 
-            # Barra de progresso para cópia de arquivos
-            with tqdm(total=len(subfolder), desc=f"{Fore.BLUE}Copiando arquivos (parte {index}){Fore.RESET}", 
-                     bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt}") as copy_progress:
-                for file in subfolder:
-                    try:
-                        rel_path = os.path.relpath(file, folder_path)
-                        dest_path = os.path.join(temp_folder, rel_path)
-                        
-                        # Criar diretórios de destino se não existirem
-                        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                        
-                        # Copiar arquivo
-                        shutil.copy2(file, dest_path)
-                        copy_progress.update(1)
-                    except Exception as e:
-                        logger.error(f"Erro ao copiar arquivo {file}: {str(e)}")
-                        copy_progress.update(1)
-                        continue
+            # No modo de processos, a cópia é feita pelo próprio worker da parte
+            if build_backend != "process":
+                run_with_lower_priority(stage_part_files, folder_path, files.paths(start, end), temp_folder,
+                                        index, read_order=read_order)
         
         spinner.stop()
         
+        workers = tuner.value if tuner is not None else threads
+        
         # Compactar cada pasta temporária em um arquivo ZIP
-        print(f"{Fore.CYAN}{Style.BRIGHT}📦 Iniciando compactação em {threads} threads...{Style.RESET_ALL}")
+        if build_backend == "process":
+            print(f"{Fore.CYAN}{Style.BRIGHT}📦 Iniciando montagem das partes em {workers} processos...{Style.RESET_ALL}")
+            executor_class = ProcessPoolExecutor
+        else:
+            print(f"{Fore.CYAN}{Style.BRIGHT}📦 Iniciando compactação em {workers} threads...{Style.RESET_ALL}")
+            executor_class = ThreadPoolExecutor
         
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            futures = []
-            
-            for index, (temp_folder, total_size) in enumerate(temp_folders, start=1):
-                zip_name = generate_zip_name(base_folder_name, index)
+        # Threads que sobram quando há menos partes que threads vão para o CRC-32 e a
+        # compressão paralelos dentro de cada parte (ex.: uma pasta com um único arquivo enorme)
+        threads_per_part = max(1, threads // len(temp_folders)) if temp_folders else 1
+        
+        max_workers = tuner.maximum if tuner is not None else threads
+        
+        # Processos que sobram quando há menos partes que processos montam segmentos das
+        # partes com muitos arquivos (ex.: 100 mil arquivos pequenos em uma única parte),
+        # unidos depois em uma única parte ZIP
+        if build_backend == "process" and part_format == PART_FORMAT_ZIP and subfolders:
+            # Segmentos só compensam a união se houver núcleos para montá-los ao mesmo tempo
+            spare = min(max_workers, os.cpu_count() or 1) // len(subfolders)
+            for index, (start, end) in enumerate(subfolders, start=1):
+                count = min(spare, (end - start) // SEGMENT_MIN_FILES)
+                if count > 1:
+                    part_segments[index] = split_part(files, start, end, count)
+                    logger.info(f"Parte {index} de {base_folder_name} montada em {count} segmentos")
+        
+        def segment_path(zip_name, segment):
+            return os.path.join(zip_folder, f"{zip_name}.seg{segment + 1}")
+        
+        def submit_part(executor, unit):
+            index, segment = unit
+            temp_folder, total_size = temp_folders[index - 1]
+            zip_name = generate_zip_name(base_folder_name, index, part_format)
+            if segment is not None:
+                start, end = part_segments[index][segment]
+                future = executor.submit(
+                    build_segment,
+                    folder_path,
+                    files.paths(start, end),
+                    os.path.join(temp_folder, f"segmento_{segment + 1}"),
+                    index,
+                    segment_path(zip_name, segment),
+                    compression,
+                    compresslevel,
+                    hash_algorithm,
+                    read_order,
+                    zstd_dict
+                )
+                return future, (temp_folder, files.total_size(start, end), zip_name, None, index, segment)
+            if build_backend == "process":
+                future = executor.submit(
+                    build_part,
+                    folder_path,
+                    files.paths(*subfolders[index - 1]),
+                    temp_folder,
+                    index,
+                    zip_name,
+                    total_size,
+                    zip_folder,
+                    compression,
+                    threads_per_part,
+                    compresslevel,
+                    hash_algorithm,
+                    read_order,
+                    zstd_dict,
+                    part_format
+                )
+                record = None
+            else:
+                record = {}
                 future = executor.submit(
                     compress_directory, 
                     temp_folder, 
                     zip_name, 
                     total_size, 
                     zip_folder, 
-                    compression
+                    compression,
+                    threads_per_part,
+                    compresslevel,
+                    record=record,
+                    hash_algorithm=hash_algorithm,
+                    zstd_dict=zstd_dict,
+                    part_format=part_format
                 )
-                futures.append((future, temp_folder, zip_name))
-                
-            # Processar resultados e limpar pastas temporárias
-            for future, temp_folder, zip_name in futures:
-                result = future.result()  # Isso vai esperar a conclusão da tarefa
-                if result:
-                    logger.info(f"Arquivo {zip_name} criado com sucesso.")
-                    try:
-                        # Remover pasta temporária após a compactação bem-sucedida
-                        shutil.rmtree(temp_folder)
-                        logger.info(f"Pasta temporária {temp_folder} removida.")
-                    except Exception as e:
-                        logger.error(f"Erro ao remover pasta temporária {temp_folder}: {str(e)}")
+            return future, (temp_folder, total_size, zip_name, record, index, None)
+        
+        # Workers com prioridade reduzida (build_nice / build_ionice); processos recebem
+        # uma fração dos limites de leitura/escrita
+        if build_backend == "process":
+            pool_options = dict(initializer=init_build_process, initargs=(settings(), max_workers))
+        else:
+            pool_options = dict(initializer=lower_priority)
+        with executor_class(max_workers=max_workers, **pool_options) as executor:
+            # As partes são enviadas ao pool conforme o limite atual de partes em paralelo
+            # (fixo em threads, ou ajustado pelo tuner a cada parte concluída)
+            pending = []
+            for index in range(1, len(temp_folders) + 1):
+                if index in part_segments:
+                    pending += [(index, segment) for segment in range(len(part_segments[index]))]
                 else:
-                    logger.error(f"Falha ao criar arquivo {zip_name}.")
+                    pending.append((index, None))
+            running = {}
+            part_records = []
+            failed_parts = []
+            # Entradas dos segmentos já montados de cada parte: {parte: {segmento: entradas}}
+            segment_results = {}
+            while pending or running:
+                limit = tuner.value if tuner is not None else threads
+                while pending and len(running) < limit:
+                    future, info = submit_part(executor, pending.pop(0))
+                    running[future] = info
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                
+                # Processar resultados e limpar pastas temporárias
+                for future in done:
+                    temp_folder, total_size, zip_name, record, index, segment = running.pop(future)
+                    if tuner is not None:
+                        tuner.record(total_size)
+                    if segment is None:
+                        result = future.result()
+                    else:
+                        try:
+                            entries = future.result()
+                        except Exception as e:
+                            logger.error(f"Erro ao montar o segmento {segment + 1} de {zip_name}: {str(e)}")
+                            entries = None
+                        results = segment_results.setdefault(index, {})
+                        results[segment] = entries
+                        if len(results) < len(part_segments[index]):
+                            continue
+                        # Último segmento da parte: unir os segmentos em uma única parte
+                        segments = [(segment_path(zip_name, n), results[n]) for n in range(len(results))]
+                        result = None
+                        if all(entries is not None for _, entries in segments):
+                            try:
+                                result = join_segments(segments, zip_name, zip_folder, hash_algorithm)
+                            except Exception as e:
+                                logger.error(f"Erro ao unir os segmentos de {zip_name}: {str(e)}")
+                        else:
+                            for path, _ in segments:
+                                if os.path.exists(path):
+                                    os.remove(path)
+                    if result:
+                        part_records.append(record if record is not None else result)
+                        logger.info(f"Arquivo {zip_name} criado com sucesso.")
+                        try:
+                            # Remover pasta temporária após a compactação bem-sucedida
+                            discard(temp_folder)
+                            logger.info(f"Pasta temporária {temp_folder} removida.")
+                        except Exception as e:
+                            logger.error(f"Erro ao remover pasta temporária {temp_folder}: {str(e)}")
+                    else:
+                        logger.error(f"Falha ao criar arquivo {zip_name}.")
+                        failed_parts.append(zip_name)
+
+        if failed_parts:
+            raise RuntimeError(f"{len(failed_parts)} parte(s) não montada(s): {', '.join(failed_parts)}")
+
+        # Índice de conteúdo: qual parte (e em que posição) contém cada arquivo
+        if content_index and part_records:
+            write_toc(zip_folder, base_folder_name, part_records,
+                      dictionary_name(base_folder_name) if zstd_dict else None, part_format)
+            print(f"{Fore.GREEN}🗂️ Índice de conteúdo gerado.{Style.RESET_ALL}")
+
+        # Manifesto de integridade com os hashes já calculados (sem reler as partes)
+        if hash_algorithm and part_records:
+            write_manifest(zip_folder, base_folder_name, hash_algorithm, part_records)
+            print(f"{Fore.GREEN}🔐 Manifesto de integridade ({hash_algorithm}) gerado.{Style.RESET_ALL}")
 
         print(f"{Fore.GREEN}{Style.BRIGHT}✅ Processamento da pasta {base_folder_name} concluído!{Style.RESET_ALL}")
         return True
@@ -309,8 +770,14 @@ def prepare_files_for_upload(folder_path, threads, zip_folder, max_size, compres
         for temp_folder, _ in temp_folders:
             try:
                 if os.path.exists(temp_folder):
-                    shutil.rmtree(temp_folder)
+                    discard(temp_folder)
             except:
                 pass
+        # e segmentos de partes que não chegaram a ser unidos
+        for index, ranges in part_segments.items():
+            for segment in range(len(ranges)):
+                path = os.path.join(zip_folder, f"{generate_zip_name(base_folder_name, index, part_format)}.seg{segment + 1}")
+                if os.path.exists(path):
+                    os.remove(path)
         
         return False
\ No newline at end of file
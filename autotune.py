@@ -0,0 +1,178 @@
+import time
+import zlib
+import logging
+
+logger = logging.getLogger("ZipFileSender.Autotune")
+
+# Bytes lidos na medição de leitura do disco e amostra usada na medição de compressão
+READ_PROBE_BYTES = 64 * 1024 * 1024
+COMPRESS_PROBE_BYTES = 4 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+# Variação mínima de throughput considerada melhora ou piora (ruído de medição)
+TOLERANCE = 0.05
+# Limite de transmissões simultâneas por sessão no ajuste automático do envio
+MAX_TRANSMISSIONS = 8
+
+class HillClimber:
+    """
+    Ajuste de um número inteiro (workers, transmissões) por subida de encosta.
+
+    A cada medição de throughput com o valor atual: se melhorou em relação à medição
+    anterior, continua na mesma direção; se piorou ou ficou igual, inverte a direção.
+    Com o tempo o valor oscila em torno do ponto de maior throughput, acompanhando
+    mudanças de carga do disco ou da rede.
+    """
+
+    def __init__(self, name, value, minimum, maximum, tolerance=TOLERANCE):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.value = min(max(value, self.minimum), self.maximum)
+        self.tolerance = tolerance
+        self.direction = 1
+        self.best_value = self.value
+        self.best_throughput = 0.0
+        self.calibrated = False
+        self._last = None
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_started = time.monotonic()
+        self._window_bytes = 0
+        self._window_samples = 0
+        self._warming_up = True
+
+    def calibrate(self, value):
+        """Define o valor inicial a partir das medições de hardware."""
+        self.value = min(max(value, self.minimum), self.maximum)
+        self.calibrated = True
+        self._reset_window()
+
+    def record(self, size, workers=None):
+        """
+        Registra uma tarefa concluída com o valor atual.
+
+        Após uma mudança, as primeiras tarefas concluídas (uma por worker) ainda começaram
+        com o valor anterior e são descartadas; a janela de medição começa em seguida e
+        fecha depois de mais uma tarefa por worker, quando o throughput da janela ajusta
+        o valor.
+
+        Args:
+            size (int): Bytes da tarefa concluída
+            workers (int): Tarefas simultâneas no total (padrão: o próprio valor)
+
+        Returns:
+            int: Valor a usar daqui em diante
+        """
+        self._window_samples += 1
+        if self._warming_up:
+            if self._window_samples >= (workers or self.value):
+                self._reset_window()
+                self._warming_up = False
+            return self.value
+        self._window_bytes += size
+        if self._window_samples >= (workers or self.value):
+            elapsed = max(time.monotonic() - self._window_started, 1e-3)
+            self.observe(self._window_bytes / elapsed)
+            self._reset_window()
+        return self.value
+
+    def observe(self, throughput):
+        """
+        Registra o throughput medido com o valor atual e escolhe o próximo valor.
+
+        Args:
+            throughput (float): Bytes por segundo na janela medida
+
+        Returns:
+            int: Novo valor
+        """
+        if throughput > self.best_throughput:
+            self.best_value, self.best_throughput = self.value, throughput
+        if self._last is not None and throughput <= self._last * (1 + self.tolerance):
+            self.direction = -self.direction
+        self._last = throughput
+
+        new_value = self.value + self.direction
+        if not self.minimum <= new_value <= self.maximum:
+            self.direction = -self.direction
+            new_value = min(max(self.value + self.direction, self.minimum), self.maximum)
+        if new_value != self.value:
+            logger.info(f"Autotune {self.name}: {throughput / 1048576:.1f} MB/s com {self.value}; "
+                        f"passando para {new_value}")
+        self.value = new_value
+        return self.value
+
+def probe_read_bandwidth(paths, limit=READ_PROBE_BYTES):
+    """
+    Mede a leitura sequencial do disco lendo o início dos arquivos informados.
+
+    Returns:
+        float: Bytes por segundo (0 se nada pôde ser lido)
+    """
+    total = 0
+    started = time.perf_counter()
+    for path in paths:
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                while total < limit:
+                    chunk = f.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+        except OSError:
+            continue
+        if total >= limit:
+            break
+    elapsed = time.perf_counter() - started
+    return total / elapsed if total and elapsed > 0 else 0.0
+
+def probe_compression_speed(paths, compresslevel, limit=COMPRESS_PROBE_BYTES):
+    """
+    Mede a velocidade do DEFLATE em um núcleo, com uma amostra dos próprios arquivos.
+
+    Returns:
+        float: Bytes por segundo por núcleo (0 se não houver amostra)
+    """
+    sample = bytearray()
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                sample += f.read(limit - len(sample))
+        except OSError:
+            continue
+        if len(sample) >= limit:
+            break
+    if not sample:
+        return 0.0
+    started = time.perf_counter()
+    compressor = zlib.compressobj(-1 if compresslevel is None else compresslevel, zlib.DEFLATED, -15)
+    compressor.compress(bytes(sample))
+    compressor.flush()
+    elapsed = time.perf_counter() - started
+    return len(sample) / elapsed if elapsed > 0 else 0.0
+
+def initial_build_workers(paths, compressed, compresslevel, maximum):
+    """
+    Estima o número inicial de workers de montagem pelo hardware.
+
+    Com compressão, usa os núcleos necessários para acompanhar a leitura do disco.
+    Sem compressão (montagem limitada pelo disco) não há medição: a taxa de leitura
+    sequencial não diz quantas leituras simultâneas o disco aguenta, então começa
+    sempre com 2 workers, o que favorece discos rígidos, e deixa a subida de encosta
+    aumentar em SSDs.
+
+    A leitura é medida nos arquivos informados, que ainda não devem ter sido lidos
+    (do contrário a medição é do cache de páginas, não do disco).
+
+    Returns:
+        int: Workers iniciais (entre 1 e maximum)
+    """
+    if not compressed:
+        return min(2, maximum)
+    read_bw = probe_read_bandwidth(paths)
+    compress_bw = probe_compression_speed(paths, compresslevel)
+    workers = round(read_bw / compress_bw) if compress_bw else maximum
+    logger.info(f"Autotune: leitura {read_bw / 1048576:.0f} MB/s, "
+                f"compressão {compress_bw / 1048576:.0f} MB/s por núcleo")
+    return min(max(workers, 1), maximum)
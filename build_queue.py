@@ -0,0 +1,563 @@
+import os
+import json
+import time
+import shutil
+import socket
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from colorama import Fore, Style
+from auto_zip import build_part, build_method, create_subfolders, generate_zip_name, select_compression
+from zip_writer import ZIP_ZSTANDARD
+from tar_writer import PART_FORMAT_ZIP
+from file_index import FileIndex
+from scheduling import order_folders, LatencyLog, PRIORITY_MARKER
+from zstd_dict import train_dictionary, write_dictionary, dictionary_name
+from cover import prepare_cover
+from toc import write_toc
+from manifest import write_manifest
+from reclaimer import discard
+from read_order import READ_ORDER_NONE
+from throttle import lower_priority, init_build_process, settings
+
+logger = logging.getLogger("ZipFileSender.BuildQueue")
+
+# Tempo sem sinal de vida após o qual um job (ou finalização) volta para a fila
+LEASE_SECONDS = 300
+# Intervalo do sinal de vida dos jobs em andamento e da consulta à fila quando vazia
+HEARTBEAT_SECONDS = 30
+POLL_SECONDS = 5
+# Tentativas de montagem de uma parte antes de a pasta ser marcada como falha
+MAX_ATTEMPTS = 3
+# Sufixo das partes em montagem (não são enviadas até serem renomeadas)
+PARTIAL_SUFFIX = ".partial"
+
+# Estados das pastas e dos jobs (uma parte por job)
+FOLDER_PLANNING = "planning"
+FOLDER_BUILDING = "building"
+FOLDER_FINALIZING = "finalizing"
+FOLDER_DONE = "done"
+FOLDER_FAILED = "failed"
+JOB_PENDING = "pending"
+JOB_CLAIMED = "claimed"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    queued REAL,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    folder_id INTEGER NOT NULL REFERENCES folders(id),
+    part INTEGER NOT NULL,
+    zip_name TEXT NOT NULL,
+    files TEXT NOT NULL,
+    total_size INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    heartbeat REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    record TEXT,
+    UNIQUE (folder_id, part)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, folder_id, part);
+"""
+
+def worker_id():
+    """Identificador do worker: host e processo."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class BuildQueue:
+    """
+    Fila de montagem de partes compartilhada entre processos e máquinas.
+
+    Um arquivo SQLite (em um compartilhamento montado em todas as máquinas, ou local
+    para vários processos na mesma máquina) guarda as pastas planejadas e um job por
+    parte. Workers reservam jobs em transações IMMEDIATE, renovam a reserva com um
+    sinal de vida e, se param de responder, o job volta para a fila após LEASE_SECONDS.
+
+    Usa o journal padrão do SQLite (não WAL), que depende de memória compartilhada e
+    não funciona entre máquinas. Cada operação abre a própria conexão, então a fila
+    pode ser usada por várias threads.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def folder(self, name):
+        """Registro de uma pasta pelo nome, ou None se não estiver na fila."""
+        with self._transaction() as conn:
+            return conn.execute("SELECT * FROM folders WHERE name = ?", (name,)).fetchone()
+
+    def unfinished_folders(self):
+        """Nomes das pastas ainda não concluídas (não devem ser enviadas)."""
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT name FROM folders WHERE status != ?", (FOLDER_DONE,)).fetchall()
+        return {row["name"] for row in rows}
+
+    def plan_folder(self, name):
+        """Registra a pasta em planejamento, descartando jobs de um planejamento anterior."""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT id FROM folders WHERE name = ?", (name,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM jobs WHERE folder_id = ?", (row["id"],))
+                conn.execute("DELETE FROM folders WHERE id = ?", (row["id"],))
+            conn.execute("INSERT INTO folders (name, status, queued, updated) VALUES (?, ?, ?, ?)",
+                         (name, FOLDER_PLANNING, now, now))
+
+    def remove_folder(self, name):
+        """Remove a pasta e seus jobs da fila."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT id FROM folders WHERE name = ?", (name,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM jobs WHERE folder_id = ?", (row["id"],))
+                conn.execute("DELETE FROM folders WHERE id = ?", (row["id"],))
+
+    def add_jobs(self, name, params, total_bytes, jobs):
+        """
+        Publica os jobs de uma pasta planejada.
+
+        Args:
+            name (str): Nome da pasta
+            params (dict): Parâmetros de montagem comuns às partes
+            total_bytes (int): Tamanho da pasta
+            jobs (list): [(parte, nome da parte, [caminhos relativos], tamanho), ...]
+        """
+        with self._transaction() as conn:
+            folder_id = conn.execute("SELECT id FROM folders WHERE name = ?", (name,)).fetchone()["id"]
+            conn.executemany(
+                "INSERT INTO jobs (folder_id, part, zip_name, files, total_size, status) VALUES (?, ?, ?, ?, ?, ?)",
+                [(folder_id, part, zip_name, json.dumps(files, ensure_ascii=False), size, JOB_PENDING)
+                 for part, zip_name, files, size in jobs])
+            conn.execute("UPDATE folders SET status = ?, params = ?, bytes = ?, updated = ? WHERE id = ?",
+                         (FOLDER_BUILDING, json.dumps(params), total_bytes, time.time(), folder_id))
+
+    def retry_folder(self, name):
+        """Devolve à fila os jobs que falharam em uma pasta."""
+        with self._transaction() as conn:
+            folder_id = conn.execute("SELECT id FROM folders WHERE name = ?", (name,)).fetchone()["id"]
+            conn.execute("UPDATE jobs SET status = ?, attempts = 0, worker = NULL WHERE folder_id = ? AND status = ?",
+                         (JOB_PENDING, folder_id, JOB_FAILED))
+            conn.execute("UPDATE folders SET status = ?, updated = ? WHERE id = ?",
+                         (FOLDER_BUILDING, time.time(), folder_id))
+
+    def claim(self, worker):
+        """
+        Reserva o próximo job: pastas na ordem em que entraram na fila, partes em ordem.
+        Jobs reservados por workers sem sinal de vida há LEASE_SECONDS também são elegíveis.
+
+        Returns:
+            dict: Job com 'folder' e 'params' da pasta, ou None se não houver jobs livres
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT jobs.*, folders.name AS folder, folders.params AS params FROM jobs "
+                "JOIN folders ON folders.id = jobs.folder_id "
+                "WHERE folders.status = ? AND (jobs.status = ? OR (jobs.status = ? AND jobs.heartbeat < ?)) "
+                "ORDER BY folders.id, jobs.part LIMIT 1",
+                (FOLDER_BUILDING, JOB_PENDING, JOB_CLAIMED, now - LEASE_SECONDS)).fetchone()
+            if row is None:
+                return None
+            if row["status"] == JOB_CLAIMED:
+                logger.warning(f"Job {row['zip_name']} de {row['worker']} sem sinal de vida; reservado por {worker}.")
+            conn.execute("UPDATE jobs SET status = ?, worker = ?, heartbeat = ?, attempts = attempts + 1 WHERE id = ?",
+                         (JOB_CLAIMED, worker, now, row["id"]))
+            job = dict(row)
+        job["attempts"] += 1
+        return job
+
+    def heartbeat(self, worker):
+        """Renova a reserva de todos os jobs em andamento do worker."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE worker = ? AND status = ?", (now, worker, JOB_CLAIMED))
+
+    def complete(self, job_id, record):
+        """
+        Marca um job como concluído com o registro da parte.
+
+        Returns:
+            dict: A pasta, se este era o último job dela (o chamador a finaliza), ou None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute("UPDATE jobs SET status = ?, record = ?, heartbeat = ? WHERE id = ? AND status != ?",
+                                   (JOB_DONE, json.dumps(record, ensure_ascii=False), now, job_id, JOB_DONE))
+            if not updated.rowcount:
+                return None
+            folder_id = conn.execute("SELECT folder_id FROM jobs WHERE id = ?", (job_id,)).fetchone()["folder_id"]
+            remaining = conn.execute("SELECT COUNT(*) FROM jobs WHERE folder_id = ? AND status != ?",
+                                     (folder_id, JOB_DONE)).fetchone()[0]
+            if remaining:
+                return None
+            finalizing = conn.execute("UPDATE folders SET status = ?, updated = ? WHERE id = ? AND status = ?",
+                                      (FOLDER_FINALIZING, now, folder_id, FOLDER_BUILDING))
+            if not finalizing.rowcount:
+                return None
+            return dict(conn.execute("SELECT * FROM folders WHERE id = ?", (folder_id,)).fetchone())
+
+    def fail(self, job_id, attempts, worker):
+        """
+        Devolve um job que falhou à fila, ou marca a pasta como falha após MAX_ATTEMPTS.
+        Só vale enquanto o worker ainda tem a reserva: se ela expirou e outro worker
+        reservou o job, nada muda.
+
+        Returns:
+            bool: True se o job continua na fila (devolvido, ou reservado por outro worker)
+        """
+        with self._transaction() as conn:
+            if attempts < MAX_ATTEMPTS:
+                conn.execute("UPDATE jobs SET status = ?, worker = NULL WHERE id = ? AND status = ? AND worker = ?",
+                             (JOB_PENDING, job_id, JOB_CLAIMED, worker))
+                return True
+            failed = conn.execute("UPDATE jobs SET status = ? WHERE id = ? AND status = ? AND worker = ?",
+                                  (JOB_FAILED, job_id, JOB_CLAIMED, worker))
+            if not failed.rowcount:
+                return True
+            conn.execute("UPDATE folders SET status = ?, updated = ? WHERE id = "
+                         "(SELECT folder_id FROM jobs WHERE id = ?)", (FOLDER_FAILED, time.time(), job_id))
+            return False
+
+    def claim_stale_finalization(self):
+        """
+        Reserva a finalização de uma pasta cujo finalizador parou de responder.
+
+        Returns:
+            dict: A pasta, ou None se não houver finalizações abandonadas
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT * FROM folders WHERE status = ? AND updated < ? ORDER BY id LIMIT 1",
+                               (FOLDER_FINALIZING, now - LEASE_SECONDS)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE folders SET updated = ? WHERE id = ?", (now, row["id"]))
+            return dict(row)
+
+    def records(self, folder_id):
+        """Registros das partes concluídas de uma pasta (ver compress_directory)."""
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT record FROM jobs WHERE folder_id = ? AND status = ? ORDER BY part",
+                                (folder_id, JOB_DONE)).fetchall()
+        return [json.loads(row["record"]) for row in rows]
+
+    def finish_folder(self, folder_id):
+        """Marca a pasta como concluída."""
+        with self._transaction() as conn:
+            conn.execute("UPDATE folders SET status = ?, updated = ? WHERE id = ?",
+                         (FOLDER_DONE, time.time(), folder_id))
+
+    def active(self):
+        """Indica se ainda há trabalho na fila (planejamento, jobs livres ou em andamento, finalização)."""
+        with self._transaction() as conn:
+            folders = conn.execute("SELECT COUNT(*) FROM folders WHERE status IN (?, ?)",
+                                   (FOLDER_PLANNING, FOLDER_FINALIZING)).fetchone()[0]
+            jobs = conn.execute("SELECT COUNT(*) FROM jobs JOIN folders ON folders.id = jobs.folder_id "
+                                "WHERE folders.status = ? AND jobs.status IN (?, ?)",
+                                (FOLDER_BUILDING, JOB_PENDING, JOB_CLAIMED)).fetchone()[0]
+        return bool(folders or jobs)
+
+def enqueue_folders(queue, input_folder, output_folder, max_size_per_zip, compression_level=0,
+                    manifest_hash="sha256", schedule_policy="name", optimize_cover=True, part_size_planner=None,
+                    content_index=True, zstd_dictionary=False, part_format=PART_FORMAT_ZIP):
+    """
+    Planeja as pastas de entrada e publica um job por parte na fila de montagem.
+
+    Pastas já na fila (de uma execução anterior) continuam de onde pararam; pastas que
+    falharam têm os jobs com falha devolvidos à fila. Os demais argumentos são os
+    mesmos de process_folder.
+    """
+    compression, part_format = select_compression(compression_level, part_format)
+    os.makedirs(output_folder, exist_ok=True)
+
+    folders = [os.path.join(input_folder, folder) for folder in os.listdir(input_folder)
+               if os.path.isdir(os.path.join(input_folder, folder))]
+    folders = order_folders(folders, schedule_policy)
+
+    # Todas as pastas entram em planejamento antes, para que os workers aguardem por elas
+    to_plan = []
+    for folder_path in folders:
+        name = os.path.basename(folder_path.rstrip("\\/"))
+        row = queue.folder(name)
+        if row is not None and row["status"] in (FOLDER_BUILDING, FOLDER_FINALIZING):
+            print(f"{Fore.CYAN}ℹ️ Pasta {name} já está na fila de montagem{Style.RESET_ALL}")
+            continue
+        if row is not None and row["status"] == FOLDER_FAILED:
+            print(f"{Fore.YELLOW}🔁 Devolvendo à fila as partes com falha de {name}{Style.RESET_ALL}")
+            queue.retry_folder(name)
+            continue
+        queue.plan_folder(name)
+        to_plan.append(folder_path)
+
+    for folder_path in to_plan:
+        name = os.path.basename(folder_path.rstrip("\\/"))
+        try:
+            enqueue_folder(queue, folder_path, os.path.join(output_folder, name), max_size_per_zip, compression,
+                           compression_level or None, part_format, manifest_hash, content_index, zstd_dictionary,
+                           optimize_cover, part_size_planner, schedule_policy)
+        except Exception as e:
+            print(f"{Fore.RED}{Style.BRIGHT}❌ Erro ao planejar pasta {name}: {str(e)}{Style.RESET_ALL}")
+            logger.error(f"Erro ao planejar pasta {name}: {str(e)}")
+            queue.remove_folder(name)
+
+def enqueue_folder(queue, folder_path, zip_folder, max_size, compression, compresslevel, part_format,
+                   hash_algorithm, content_index, zstd_dictionary, optimize_cover, planner, schedule_policy="name"):
+    """Planeja as partes de uma pasta (como prepare_files_for_upload) e publica os jobs."""
+    name = os.path.basename(folder_path.rstrip("\\/"))
+    os.makedirs(zip_folder, exist_ok=True)
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}📁 Planejando pasta: {name}{Style.RESET_ALL}")
+
+    # Capa e prioridade vão para a pasta de saída já no planejamento
+    for cover_name in ['cover.jpg', 'cover.png']:
+        cover_path = os.path.join(folder_path, cover_name)
+        if os.path.exists(cover_path):
+            if optimize_cover:
+                prepare_cover(cover_path, zip_folder)
+            else:
+                shutil.copy(cover_path, zip_folder)
+            break
+    priority_path = os.path.join(folder_path, PRIORITY_MARKER)
+    if os.path.exists(priority_path):
+        shutil.copy(priority_path, zip_folder)
+
+    files = FileIndex.scan(folder_path, exclude=(PRIORITY_MARKER,))
+    if not len(files):
+        logger.warning(f"Não há arquivos a serem zipados na pasta {folder_path}.")
+        print(f"{Fore.YELLOW}{Style.BRIGHT}⚠️ Não há arquivos a serem zipados na pasta {folder_path}.{Style.RESET_ALL}")
+        queue.remove_folder(name)
+        return
+
+    dictionary = None
+    if zstd_dictionary and part_format == PART_FORMAT_ZIP:
+        zstd_dict = train_dictionary(files)
+        if zstd_dict:
+            compression = ZIP_ZSTANDARD
+            write_dictionary(zip_folder, name, zstd_dict)
+            dictionary = dictionary_name(name)
+
+    subfolders = create_subfolders(files, max_size, planner)
+    jobs = []
+    for index, (start, end) in enumerate(subfolders, start=1):
+        # Caminhos com "/", para workers em outros sistemas
+        rel_paths = [files.relpath(i).replace(os.sep, '/') for i in range(start, end)]
+        jobs.append((index, generate_zip_name(name, index, part_format), rel_paths, files.total_size(start, end)))
+
+    params = {
+        "compression": compression,
+        "compresslevel": compresslevel,
+        "part_format": part_format,
+        "hash_algorithm": hash_algorithm or None,
+        "content_index": content_index,
+        "dictionary": dictionary,
+        "schedule_policy": schedule_policy,
+    }
+    queue.add_jobs(name, params, files.total_size(), jobs)
+    print(f"{Fore.GREEN}📮 {len(jobs)} parte(s) de {name} publicadas na fila de montagem{Style.RESET_ALL}")
+    logger.info(f"Pasta {name}: {len(jobs)} job(s) na fila de montagem")
+
+def run_worker(queue, input_folder, output_folder, slots=1, build_backend="thread",
+               read_order=READ_ORDER_NONE, wait=False):
+    """
+    Monta partes reservadas da fila até não haver mais trabalho.
+
+    Cada slot reserva um job, copia e compacta a parte em um arquivo .partial e o
+    renomeia ao concluir, de modo que o envio nunca vê partes incompletas. Quem
+    conclui a última parte de uma pasta grava o índice e o manifesto e remove a pasta
+    de origem.
+
+    Args:
+        queue (BuildQueue): Fila compartilhada
+        input_folder (str): Pasta de entrada (mesmo conteúdo em todas as máquinas)
+        output_folder (str): Pasta de saída (compartilhada com quem envia)
+        slots (int): Partes montadas ao mesmo tempo neste worker
+        build_backend (str): "thread" ou "process" (cada parte em um processo)
+        read_order (str): Ordem de leitura dos arquivos de origem (ver stage_part_files)
+        wait (bool): Continuar aguardando novos jobs quando a fila esvaziar
+
+    Returns:
+        int: Partes montadas por este worker
+    """
+    worker = worker_id()
+    stop = threading.Event()
+    built = []
+
+    def keep_alive():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            try:
+                queue.heartbeat(worker)
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao renovar jobs de {worker}: {str(e)}")
+
+    process_pool = None
+    if build_backend == "process":
+        process_pool = ProcessPoolExecutor(max_workers=slots, initializer=init_build_process,
+                                           initargs=(settings(), slots))
+
+    def run_job(job):
+        params = json.loads(job["params"])
+        name = job["folder"]
+        folder_path = os.path.join(input_folder, name)
+        zip_folder = os.path.join(output_folder, name)
+        partial_name = f"{job['zip_name']}.{worker}{PARTIAL_SUFFIX}"
+        temp_folder = os.path.join(zip_folder, f"temp_folder_{job['part']}_{worker}")
+        part_files = [os.path.join(folder_path, *rel_path.split('/')) for rel_path in json.loads(job["files"])]
+        zstd_dict = None
+        if params["dictionary"]:
+            with open(os.path.join(zip_folder, params["dictionary"]), 'rb') as f:
+                zstd_dict = f.read()
+
+        args = (folder_path, part_files, temp_folder, job["part"], partial_name, job["total_size"], zip_folder,
+                params["compression"], 1, params["compresslevel"], params["hash_algorithm"], read_order,
+                zstd_dict, params["part_format"])
+        build_started = time.time()
+        try:
+            os.makedirs(temp_folder, exist_ok=True)
+            if process_pool is not None:
+                record = process_pool.submit(build_part, *args).result()
+            else:
+                record = build_part(*args)
+        except Exception as e:
+            logger.error(f"Erro ao montar {job['zip_name']}: {str(e)}")
+            record = None
+        finally:
+            discard(temp_folder, ignore_errors=True)
+
+        if not record:
+            if queue.fail(job["id"], job["attempts"], worker):
+                print(f"{Fore.YELLOW}⚠️ Falha ao montar {job['zip_name']}; a parte voltou para a fila{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.RED}{Style.BRIGHT}❌ Falha ao montar {job['zip_name']} após {MAX_ATTEMPTS} tentativas; "
+                      f"pasta {name} marcada como falha{Style.RESET_ALL}")
+            return
+
+        os.replace(os.path.join(zip_folder, partial_name), os.path.join(zip_folder, job["zip_name"]))
+        record["zip_name"] = job["zip_name"]
+        # Horários da montagem, para o registro de latência da pasta (ver finalize_folder)
+        record["build_started"] = build_started
+        record["build_finished"] = time.time()
+        built.append(job["zip_name"])
+        folder = queue.complete(job["id"], record)
+        if folder is not None:
+            finalize_folder(queue, folder, input_folder, output_folder)
+
+    def slot_loop():
+        lower_priority()
+        while True:
+            job = queue.claim(worker)
+            if job is not None:
+                try:
+                    run_job(job)
+                except Exception as e:
+                    # O job continua reservado e volta para a fila quando a reserva expirar
+                    print(f"{Fore.RED}❌ Erro no job {job['zip_name']}: {str(e)}{Style.RESET_ALL}")
+                    logger.error(f"Erro no job {job['zip_name']}: {str(e)}")
+                continue
+            folder = queue.claim_stale_finalization()
+            if folder is not None:
+                finalize_folder(queue, folder, input_folder, output_folder)
+                continue
+            if not wait and not queue.active():
+                return
+            time.sleep(POLL_SECONDS)
+
+    print(f"{Fore.CYAN}{Style.BRIGHT}🛠️ Worker {worker} montando até {slots} parte(s) em paralelo{Style.RESET_ALL}")
+    heartbeat = threading.Thread(target=keep_alive, daemon=True)
+    heartbeat.start()
+    try:
+        with ThreadPoolExecutor(max_workers=slots) as executor:
+            for future in [executor.submit(slot_loop) for _ in range(slots)]:
+                future.result()
+    finally:
+        stop.set()
+        if process_pool is not None:
+            process_pool.shutdown()
+    print(f"{Fore.GREEN}{Style.BRIGHT}✅ Worker {worker}: {len(built)} parte(s) montada(s){Style.RESET_ALL}")
+    return len(built)
+
+def finalize_folder(queue, folder, input_folder, output_folder):
+    """
+    Conclui uma pasta cujas partes estão todas prontas: grava o índice de conteúdo e o
+    manifesto a partir dos registros da fila, remove sobras de workers interrompidos e
+    a pasta de origem.
+
+    Pode ser repetida sem efeitos colaterais: se o finalizador parar no meio, outro
+    worker refaz a finalização depois de LEASE_SECONDS.
+    """
+    name = folder["name"]
+    params = json.loads(folder["params"])
+    zip_folder = os.path.join(output_folder, name)
+    records = queue.records(folder["id"])
+
+    if params["content_index"] and records:
+        write_toc(zip_folder, name, records, params["dictionary"], params["part_format"])
+    if params["hash_algorithm"] and records:
+        write_manifest(zip_folder, name, params["hash_algorithm"], records)
+
+    for entry in os.listdir(zip_folder):
+        entry_path = os.path.join(zip_folder, entry)
+        if entry.endswith(PARTIAL_SUFFIX):
+            os.remove(entry_path)
+        elif entry.startswith("temp_folder_") and os.path.isdir(entry_path):
+            discard(entry_path, ignore_errors=True)
+
+    # A pasta só é marcada como concluída depois de removida a origem, para que uma
+    # finalização interrompida não faça a pasta ser planejada (e enviada) de novo
+    folder_path = os.path.join(input_folder, name)
+    discard(folder_path, ignore_errors=True)
+    if os.path.exists(folder_path):
+        logger.error(f"Não foi possível remover a pasta {folder_path}.")
+    queue.finish_folder(folder["id"])
+    record_build_latency(folder, params, records)
+    print(f"{Fore.GREEN}{Style.BRIGHT}✅ Pasta {name} concluída ({len(records)} parte(s)){Style.RESET_ALL}")
+    logger.info(f"Pasta {name} concluída pela fila de montagem ({len(records)} parte(s)).")
+
+def record_build_latency(folder, params, records):
+    """
+    Registra a compactação da pasta em folder_latency.jsonl, como process_folder, para
+    que o planejamento (--dry-run) tenha histórico também com a fila de montagem. O
+    tempo vai do início da primeira parte ao fim da última, em qualquer worker.
+    """
+    timed = [record for record in records if record.get("build_started") and record.get("build_finished")]
+    if not timed:
+        return
+    started_at = min(record["build_started"] for record in timed)
+    elapsed = max(record["build_finished"] for record in timed) - started_at
+    latency_log = LatencyLog("build", params.get("schedule_policy", "name"), queued_at=folder["queued"])
+    latency_log.record(folder["name"], folder["bytes"], started_at, elapsed=elapsed,
+                       output_bytes=sum(record["size"] for record in records),
+                       method=build_method(params["part_format"], params["compresslevel"] or 0))
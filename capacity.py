@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import logging
+from colorama import Fore, Style
+from auto_zip import create_subfolders, build_method
+from file_index import FileIndex
+from scheduling import order_folders, LATENCY_LOG_FILE, PRIORITY_MARKER
+from part_size import upload_throughput_history, estimate_upload_seconds, HISTORY_ENTRIES
+from autotune import probe_read_bandwidth, probe_compression_speed
+from throttle import UPLOAD, READ, WRITE
+
+logger = logging.getLogger("ZipFileSender.Capacity")
+
+# Arquivos lidos na medição de disco/compressão quando não há histórico de compactação
+PROBE_FILES = 64
+
+def build_history(method=None, log_file=LATENCY_LOG_FILE, entries=HISTORY_ENTRIES):
+    """
+    Throughput de compactação e taxa de redução registrados neste host.
+
+    Args:
+        method (str): "formato:nível" (ver build_method); usa só as pastas compactadas
+            da mesma forma, ou todas se não houver nenhuma
+
+    Returns:
+        tuple: (bytes/s ou None, razão saída/entrada ou None, pastas consideradas)
+    """
+    try:
+        with open(log_file, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return None, None, 0
+    builds = []
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if entry.get("stage") == "build" and entry.get("success") and entry.get("elapsed"):
+            builds.append(entry)
+    matching = [entry for entry in builds if entry.get("method") == method]
+    recent = (matching or builds)[-entries:]
+    if not recent:
+        return None, None, 0
+
+    total_bytes = sum(entry["bytes"] for entry in recent)
+    total_seconds = sum(entry["elapsed"] for entry in recent)
+    rate = total_bytes / total_seconds if total_bytes and total_seconds > 0 else None
+    # A razão só vale para pastas compactadas da mesma forma
+    sized = [entry for entry in matching[-entries:] if entry.get("output_bytes") is not None and entry["bytes"]]
+    ratio = sum(entry["output_bytes"] for entry in sized) / sum(entry["bytes"] for entry in sized) if sized else None
+    return rate, ratio, len(recent)
+
+def probe_build_rate(paths, compression_level, threads):
+    """
+    Estima o throughput de compactação medindo o disco e a compressão neste host.
+
+    A montagem lê cada arquivo duas vezes (cópia para a pasta temporária e compactação);
+    com compressão, o limite pode ser a CPU (uma parte por thread).
+
+    Returns:
+        float: Bytes por segundo (0 se nada pôde ser medido)
+    """
+    read_bw = probe_read_bandwidth(paths)
+    rate = read_bw / 2
+    if compression_level:
+        compress_bw = probe_compression_speed(paths, compression_level) * max(1, threads)
+        rate = min(rate, compress_bw) if rate else compress_bw
+    return rate
+
+def plan_folder(folder_path, max_size, planner=None):
+    """
+    Planeja as partes de uma pasta sem copiar nem compactar.
+
+    Returns:
+        dict: Nome, arquivos, bytes, tamanho de parte e tamanho de cada parte, ou None
+            se a pasta não tiver arquivos
+    """
+    files = FileIndex.scan(folder_path, exclude=(PRIORITY_MARKER,))
+    if not len(files):
+        return None
+    total_size = files.total_size()
+    part_size = planner.part_size(total_size, max_size) if planner is not None else max_size
+    subfolders = create_subfolders(files, part_size)
+    return {
+        "name": os.path.basename(folder_path.rstrip("\\/")),
+        "files": len(files),
+        "bytes": total_size,
+        "part_size": part_size,
+        "parts": [files.total_size(start, end) for start, end in subfolders],
+        "sample": files.paths(0, min(len(files), PROBE_FILES)),
+    }
+
+def _duration(seconds):
+    """Formata segundos como "Xh YYmin", "Zmin" ou "Ns"."""
+    if seconds is None:
+        return "sem histórico"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    minutes = int(round(seconds / 60))
+    if minutes < 60:
+        return f"{minutes}min"
+    return f"{minutes // 60}h {minutes % 60:02d}min"
+
+def _gb(size):
+    return f"{size / (1024 ** 3):.2f} GB"
+
+def dry_run(input_folder, max_size, threads=4, compression_level=0, part_format="zip", build_backend="thread",
+            schedule_policy="name", planner=None, upload_slots=1):
+    """
+    Planeja o lote de input/ sem copiar, compactar ou conectar ao Telegram.
+
+    Relata, por pasta e no total: número de partes, preenchimento das partes em
+    relação ao tamanho máximo, pico de espaço em output/ (cópias temporárias e partes
+    prontas) e a estimativa de tempo de cada etapa, a partir do histórico de
+    compactação e envio deste host (folder_latency.jsonl) ou, sem histórico de
+    compactação, de uma medição rápida do disco e da compressão.
+
+    Args:
+        input_folder (str): Pasta de entrada
+        max_size (int): Tamanho máximo das partes (max_size_mb em bytes)
+        threads (int): Partes montadas em paralelo
+        compression_level (int): Nível de compressão configurado
+        part_format (str): Formato das partes
+        build_backend (str): "thread" (todas as partes da pasta são copiadas antes da
+            compactação) ou "process" (cada processo copia e compacta sua parte)
+        schedule_policy (str): Ordem das pastas
+        planner (PartSizePlanner): Planejador do modo de tamanho adaptativo
+        upload_slots (int): Transmissões simultâneas no envio
+
+    Returns:
+        dict: Relatório (também gravado em dry_run_report.json)
+    """
+    folders = [os.path.join(input_folder, folder) for folder in os.listdir(input_folder)
+               if os.path.isdir(os.path.join(input_folder, folder))]
+    folders = order_folders(folders, schedule_policy)
+
+    started = time.perf_counter()
+    plans = [plan for plan in (plan_folder(folder, max_size, planner) for folder in folders) if plan]
+    scan_seconds = time.perf_counter() - started
+    if not plans:
+        print(f"{Fore.YELLOW}{Style.BRIGHT}⚠️ Nenhuma pasta com arquivos em {input_folder}{Style.RESET_ALL}")
+        return None
+
+    # Taxas: histórico deste host, ou medição rápida (compactação) quando não há histórico
+    method = build_method(part_format, compression_level)
+    build_rate, ratio, build_samples = build_history(method)
+    build_source = f"histórico ({build_samples} pasta(s))"
+    if build_rate is None:
+        build_rate = probe_build_rate(plans[0]["sample"], compression_level, threads)
+        build_source = "medição neste host"
+    if READ.rate or WRITE.rate:
+        # Limites de E/S da montagem: cada byte é lido duas vezes e escrito duas vezes
+        caps = [bucket.rate / 2 for bucket in (READ, WRITE) if bucket.rate]
+        build_rate = min([build_rate] + caps) if build_rate else min(caps)
+    if ratio is None:
+        # Sem histórico com a mesma compressão: considera partes do tamanho da origem
+        ratio = 1.0
+    upload_rate = upload_throughput_history()
+    if upload_rate and UPLOAD.rate:
+        upload_rate = min(upload_rate, UPLOAD.rate / max(1, upload_slots))
+
+    report = {"folders": [], "method": method, "ratio": round(ratio, 4)}
+    output_accumulated = 0
+    output_peak = 0
+    staging_peak = 0
+    build_seconds = 0.0
+    upload_seconds = 0.0 if upload_rate else None
+
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}📐 Planejamento do lote (sem copiar, compactar ou enviar){Style.RESET_ALL}")
+    for plan in plans:
+        parts = plan["parts"]
+        fills = [size / plan["part_size"] for size in parts]
+        oversized = sum(1 for fill in fills if fill > 1)
+        output_bytes = int(plan["bytes"] * ratio)
+        concurrent = min(threads, len(parts))
+        largest = max(parts)
+        if build_backend == "process":
+            # Cada processo tem a cópia da sua parte e a parte em escrita
+            staging = min(plan["bytes"], concurrent * largest)
+        else:
+            # Todas as partes da pasta são copiadas antes de começar a compactação
+            staging = plan["bytes"]
+        staging_peak = max(staging_peak, staging)
+        # As partes ficam em output/ até o envio, que começa depois de todas as pastas
+        output_peak = max(output_peak, output_accumulated + staging + int(concurrent * largest * ratio))
+        output_accumulated += output_bytes
+
+        folder_build = plan["bytes"] / build_rate if build_rate else None
+        if folder_build is not None:
+            build_seconds += folder_build
+        folder_upload = None
+        if upload_rate:
+            folder_upload = estimate_upload_seconds(output_bytes, max(1, int(plan["part_size"] * ratio)),
+                                                    upload_slots, upload_rate)
+            upload_seconds += folder_upload
+
+        print(f"{Fore.WHITE}📁 {plan['name']}: {plan['files']} arquivo(s), {_gb(plan['bytes'])} → "
+              f"{len(parts)} parte(s) de até {plan['part_size'] / (1024 ** 2):.0f} MB "
+              f"(preenchimento médio {sum(fills) / len(fills):.0%}, mínimo {min(fills):.0%})"
+              f"{Style.RESET_ALL}")
+        if oversized:
+            print(f"{Fore.YELLOW}   ⚠️ {oversized} arquivo(s) maiores que o tamanho de parte, em partes próprias{Style.RESET_ALL}")
+        report["folders"].append({
+            "name": plan["name"],
+            "files": plan["files"],
+            "bytes": plan["bytes"],
+            "part_size": plan["part_size"],
+            "parts": len(parts),
+            "fill_mean": round(sum(fills) / len(fills), 4),
+            "fill_min": round(min(fills), 4),
+            "oversized": oversized,
+            "staging_bytes": staging,
+            "output_bytes": output_bytes,
+            "build_seconds": round(folder_build, 1) if folder_build is not None else None,
+            "upload_seconds": round(folder_upload, 1) if folder_upload is not None else None,
+        })
+
+    total_bytes = sum(plan["bytes"] for plan in plans)
+    total_parts = sum(len(plan["parts"]) for plan in plans)
+    build_total = build_seconds if build_rate else None
+    report.update(
+        total_bytes=total_bytes, total_parts=total_parts, staging_peak_bytes=staging_peak,
+        output_peak_bytes=output_peak, scan_seconds=round(scan_seconds, 1),
+        build_seconds=round(build_total, 1) if build_total is not None else None,
+        upload_seconds=round(upload_seconds, 1) if upload_seconds is not None else None,
+        build_rate=build_rate, upload_rate_per_slot=upload_rate, upload_slots=upload_slots,
+    )
+
+    print(f"\n{Fore.GREEN}{Style.BRIGHT}📊 Total: {len(plans)} pasta(s), {_gb(total_bytes)}, {total_parts} parte(s){Style.RESET_ALL}")
+    print(f"{Fore.CYAN}💽 Pico de cópias temporárias: {_gb(staging_peak)}{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}💽 Pico de espaço em output/: {_gb(output_peak)} "
+          f"(partes estimadas em {ratio:.0%} da origem){Style.RESET_ALL}")
+    print(f"{Fore.CYAN}⏱️ Varredura e planejamento: {_duration(scan_seconds)} (medido){Style.RESET_ALL}")
+    if build_rate:
+        print(f"{Fore.CYAN}⏱️ Compactação: {_duration(build_total)} a {build_rate / 1048576:.1f} MB/s "
+              f"({build_source}){Style.RESET_ALL}")
+    else:
+        print(f"{Fore.YELLOW}⏱️ Compactação: sem histórico nem medição possível{Style.RESET_ALL}")
+    if upload_rate:
+        print(f"{Fore.CYAN}⏱️ Envio: {_duration(upload_seconds)} com {upload_slots} transmissão(ões) de "
+              f"{upload_rate / 1048576:.2f} MB/s (histórico){Style.RESET_ALL}")
+        if build_total is not None:
+            print(f"{Fore.GREEN}{Style.BRIGHT}⏱️ Total estimado: {_duration(scan_seconds + build_total + upload_seconds)}"
+                  f"{Style.RESET_ALL}")
+    else:
+        print(f"{Fore.YELLOW}⏱️ Envio: sem histórico de envio neste host{Style.RESET_ALL}")
+
+    try:
+        with open("dry_run_report.json", 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        logger.error(f"Erro ao gravar dry_run_report.json: {str(e)}")
+    logger.info(f"Planejamento: {len(plans)} pasta(s), {total_parts} parte(s), {total_bytes} bytes")
+    return report
@@ -0,0 +1,87 @@
+import os
+import io
+import shutil
+import logging
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow é opcional: sem ele, a capa é apenas copiada
+    Image = None
+
+logger = logging.getLogger("ZipFileSender.Cover")
+
+# Limites de fotos do Telegram: lado maior exibido e tamanho máximo de send_photo
+COVER_MAX_SIDE = 2560
+COVER_MAX_BYTES = 10 * 1024 * 1024
+# Capas JPEG já dentro dos limites e abaixo deste tamanho são apenas copiadas
+COVER_KEEP_BYTES = 1024 * 1024
+# Miniatura de documentos do Telegram: até 320 px e 200 KB
+THUMB_MAX_SIDE = 320
+THUMB_MAX_BYTES = 200 * 1024
+
+COVER_NAME = "cover.jpg"
+THUMB_NAME = "thumb.jpg"
+
+def _encode_jpeg(image, max_bytes, quality=85):
+    """Codifica a imagem em JPEG otimizado, reduzindo a qualidade até caber em max_bytes."""
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+        if buffer.tell() <= max_bytes or quality <= 40:
+            return buffer.getvalue()
+        quality -= 10
+
+def _to_rgb(image):
+    """Converte para RGB, aplicando transparência sobre fundo branco."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+def prepare_cover(cover_path, dest_folder):
+    """
+    Prepara a capa para envio: reduz para os limites de foto do Telegram, recodifica
+    em JPEG otimizado e gera a miniatura usada nos documentos das partes.
+
+    Sem Pillow, ou se a imagem não puder ser processada, a capa é copiada sem alterações.
+
+    Args:
+        cover_path (str): Caminho da capa original (cover.jpg ou cover.png)
+        dest_folder (str): Pasta de saída
+
+    Returns:
+        tuple: (caminho da capa, caminho da miniatura ou None)
+    """
+    if Image is None:
+        shutil.copy(cover_path, dest_folder)
+        return os.path.join(dest_folder, os.path.basename(cover_path)), None
+
+    try:
+        with Image.open(cover_path) as original:
+            image = _to_rgb(ImageOps.exif_transpose(original))
+            source_format = original.format
+
+        dest_cover = os.path.join(dest_folder, COVER_NAME)
+        if (source_format == "JPEG" and max(image.size) <= COVER_MAX_SIDE
+                and os.path.getsize(cover_path) <= COVER_KEEP_BYTES):
+            shutil.copy(cover_path, dest_cover)
+        else:
+            image.thumbnail((COVER_MAX_SIDE, COVER_MAX_SIDE), Image.LANCZOS)
+            with open(dest_cover, "wb") as f:
+                f.write(_encode_jpeg(image, COVER_MAX_BYTES))
+
+        thumb = image.copy()
+        thumb.thumbnail((THUMB_MAX_SIDE, THUMB_MAX_SIDE), Image.LANCZOS)
+        dest_thumb = os.path.join(dest_folder, THUMB_NAME)
+        with open(dest_thumb, "wb") as f:
+            f.write(_encode_jpeg(thumb, THUMB_MAX_BYTES, quality=80))
+
+        logger.info(f"Capa {os.path.basename(cover_path)} otimizada: "
+                    f"{os.path.getsize(cover_path)} -> {os.path.getsize(dest_cover)} bytes")
+        return dest_cover, dest_thumb
+    except Exception as e:
+        logger.error(f"Erro ao otimizar capa {cover_path}: {str(e)}. Copiando original.")
+        shutil.copy(cover_path, dest_folder)
+        return os.path.join(dest_folder, os.path.basename(cover_path)), None
@@ -0,0 +1,124 @@
+import io
+import os
+import logging
+from array import array
+
+logger = logging.getLogger("ZipFileSender.FileIndex")
+
+class FileIndex:
+    """
+    Índice compacto dos arquivos de uma pasta, para árvores com milhões de entradas.
+
+    Em vez de um dicionário de caminhos completos, guarda:
+    - cada diretório relativo uma única vez (dirs), referenciado por número (dir_ids);
+    - todos os nomes de arquivo em uma única string (tabela de nomes + offsets);
+    - tamanhos e datas de modificação (ns) em array('q').
+
+    O custo fica em poucas dezenas de bytes por arquivo além do próprio nome.
+    As partes planejadas são intervalos (início, fim) sobre a ordem do índice.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.dirs = []
+        self.dir_ids = array('i')
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self._name_offsets = array('q', [0])
+        self._names = io.StringIO()
+        self._name_table = None
+
+    def __len__(self):
+        return len(self.sizes)
+
+    @classmethod
+    def scan(cls, root, exclude=()):
+        """
+        Percorre a pasta com os.scandir e monta o índice.
+
+        Args:
+            root (str): Pasta a ser indexada
+            exclude (tuple): Nomes de arquivos a ignorar na raiz da pasta (ex.: marcadores);
+                arquivos com o mesmo nome em subpastas são do usuário e entram no índice
+
+        Returns:
+            FileIndex: Índice com todos os arquivos regulares da pasta
+        """
+        index = cls(root)
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            dir_id = len(index.dirs)
+            index.dirs.append(rel_dir)
+            try:
+                with os.scandir(os.path.join(root, rel_dir) if rel_dir else root) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(os.path.join(rel_dir, entry.name) if rel_dir else entry.name)
+                        elif entry.is_file() and (rel_dir or entry.name not in exclude):
+                            st = entry.stat()
+                            index.add(dir_id, entry.name, st.st_size, st.st_mtime_ns)
+            except OSError as e:
+                logger.error(f"Erro ao ler diretório {os.path.join(root, rel_dir)}: {str(e)}")
+        index.freeze()
+        return index
+
+    def add(self, dir_id, name, size, mtime_ns=0):
+        """Adiciona um arquivo ao índice (antes de freeze)."""
+        self.dir_ids.append(dir_id)
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+        self._names.write(name)
+        self._name_offsets.append(self._name_offsets[-1] + len(name))
+
+    def freeze(self):
+        """Consolida a tabela de nomes em uma única string."""
+        if self._name_table is None:
+            self._name_table = self._names.getvalue()
+            self._names = None
+
+    def name(self, i):
+        """Nome do arquivo i."""
+        return self._name_table[self._name_offsets[i]:self._name_offsets[i + 1]]
+
+    def relpath(self, i):
+        """Caminho do arquivo i relativo à raiz."""
+        rel_dir = self.dirs[self.dir_ids[i]]
+        return os.path.join(rel_dir, self.name(i)) if rel_dir else self.name(i)
+
+    def path(self, i):
+        """Caminho completo do arquivo i."""
+        return os.path.join(self.root, self.relpath(i))
+
+    def paths(self, start=0, end=None):
+        """Caminhos completos dos arquivos no intervalo [start, end)."""
+        end = len(self) if end is None else end
+        return [self.path(i) for i in range(start, end)]
+
+    def total_size(self, start=0, end=None):
+        """Soma dos tamanhos no intervalo [start, end)."""
+        end = len(self) if end is None else end
+        return sum(self.sizes[start:end])
+
+    def sort_by_size(self):
+        """
+        Reordena o índice por tamanho, do maior para o menor (ordem estável),
+        para que cada parte planejada seja um intervalo contínuo.
+        """
+        order = sorted(range(len(self)), key=self.sizes.__getitem__, reverse=True)
+        self.reorder(order)
+
+    def reorder(self, order):
+        """Reordena todas as colunas do índice segundo a permutação informada."""
+        self.freeze()
+        self.dir_ids = array('i', (self.dir_ids[i] for i in order))
+        self.sizes = array('q', (self.sizes[i] for i in order))
+        self.mtimes = array('q', (self.mtimes[i] for i in order))
+        names = io.StringIO()
+        offsets = array('q', [0])
+        for i in order:
+            name = self.name(i)
+            names.write(name)
+            offsets.append(offsets[-1] + len(name))
+        self._name_table = names.getvalue()
+        self._name_offsets = offsets
@@ -11,7 +11,7 @@ if errorlevel 1 (
 )
 
 echo Verificando dependencias...
-pip show pyrogram tgcrypto tqdm halo colorama pyfiglet unidecode >NUL
+pip show pyrogram tgcrypto tqdm halo colorama pyfiglet unidecode pillow zstandard >NUL
 if errorlevel 1 (
     echo Instalando dependencias...
     pip install -r requirements.txt
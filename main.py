@@ -6,7 +6,21 @@ import os
 import sys
 from pyrogram import Client, errors, filters
 from pyrogram.types import Chat
-from auto_zip import process_folder
+from auto_zip import process_folder, select_compression
+from capacity import dry_run
+from manifest import find_manifest, load_manifest, part_caption
+from toc import find_toc
+from zstd_dict import find_dictionary
+from tar_writer import is_part_file
+from build_queue import BuildQueue, enqueue_folders, run_worker
+from throttle import configure_from_config, throttle_upload
+import reclaimer
+from scheduling import order_folders, LatencyLog
+from cover import THUMB_NAME
+from upload_pool import UploadPool, _flood_wait_seconds
+from autotune import HillClimber, MAX_TRANSMISSIONS
+from part_size import PartSizePlanner, save_account_info
+from profiling import enable_profiling, profiled, profiled_function
 from tqdm import tqdm
 from utils import *
 import logging
@@ -376,7 +390,8 @@ def verify_channel_id(app, channel_id):
         logger.error(f"Erro ao verificar o canal: {str(e)}")
         return None
 
-def upload_file(app, file_path, channel_id):
+@profiled_function("upload")
+def upload_file(app, file_path, channel_id, caption=None, thumb=None):
     """
     Faz upload de um arquivo para o canal do Telegram.
     
@@ -384,6 +399,11 @@ def upload_file(app, file_path, channel_id):
         app: Cliente Pyrogram
         file_path (str): Caminho do arquivo a ser enviado
         channel_id (str): ID do canal de destino
+        caption (str): Legenda opcional para documentos
+        thumb (str): Miniatura opcional para documentos
+        
+    Returns:
+        Message: Mensagem enviada (para replicação em outros canais) ou False em caso de erro
     """
     # Limpar a tela para melhor visualização
     clear_screen()
@@ -397,6 +417,8 @@ def upload_file(app, file_path, channel_id):
                 progress_bar.set_postfix(
                     {"Progresso": f"{percentage:.1f}%", "Velocidade": f"{speed:.2f} MB/s"}
                 )
+            # Limite de envio (upload_rate_mb): o Pyrogram aguarda o callback antes do próximo bloco
+            throttle_upload(current - progress_bar.n)
             progress_bar.update(current - progress_bar.n)
             
         file_name = os.path.basename(file_path)
@@ -411,7 +433,7 @@ def upload_file(app, file_path, channel_id):
             with tqdm(total=file_size, unit='B', unit_scale=True, unit_divisor=1024, 
                      desc=f"{Fore.CYAN}Enviando imagem{Fore.RESET}", 
                      bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]") as progress_bar:
-                app.send_photo(
+                message = app.send_photo(
                     channel_id, 
                     file_path, 
                     caption=caption, 
@@ -419,15 +441,17 @@ def upload_file(app, file_path, channel_id):
                 )
         elif file_path.lower().endswith('.webp'):
             print(f"{Fore.CYAN}Enviando sticker...{Style.RESET_ALL}")
-            app.send_sticker(channel_id, file_path)
+            message = app.send_sticker(channel_id, file_path)
         else:
             with tqdm(total=file_size, unit='B', unit_scale=True, unit_divisor=1024,
                      desc=f"{Fore.CYAN}Enviando arquivo{Fore.RESET}",
                      bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]") as progress_bar:
-                app.send_document(
+                message = app.send_document(
                     channel_id, 
                     file_path, 
                     progress=lambda current, total: progress(current, total, progress_bar),
+                    caption=caption,
+                    thumb=thumb,
                     force_document=True,
                     file_name=os.path.basename(file_path)  # Garantir que o nome do arquivo seja preservado
                 )
@@ -436,17 +460,114 @@ def upload_file(app, file_path, channel_id):
         logger.info(f"Upload de {file_name} concluído com sucesso!")
         # Pequena pausa para evitar limites de rate - reduzida para 0.5 segundos para arquivos menores
         time.sleep(0.5 if file_size < 10 * 1024 * 1024 else 1)
-        return True
+        return message
     except errors.FloodWait as e:
         print(f"{Fore.YELLOW}{Style.BRIGHT}⚠️ Limite de envio atingido. Aguardando {e.x} segundos...{Style.RESET_ALL}")
         logger.warning(f"Limite de envio atingido. Aguardando {e.x} segundos...")
         time.sleep(e.x)
-        return upload_file(app, file_path, channel_id)  # Tentar novamente após espera
+        return upload_file(app, file_path, channel_id, caption, thumb)  # Tentar novamente após espera
     except Exception as e:
         print(f"{Fore.RED}{Style.BRIGHT}❌ Erro ao enviar {os.path.basename(file_path)}: {str(e)}{Style.RESET_ALL}")
         logger.error(f"Erro ao enviar {os.path.basename(file_path)}: {str(e)}")
         return False
 
+def fan_out_message(message, channel_ids):
+    """
+    Replica uma mensagem já enviada para os canais adicionais.
+    
+    A cópia é feita no servidor pelo file_id da mensagem original (copy_message),
+    então o arquivo não é enviado novamente.
+    
+    Args:
+        message: Mensagem enviada ao canal principal
+        channel_ids (list): IDs dos canais adicionais
+    """
+    if not message or not channel_ids:
+        return
+    for target_id in channel_ids:
+        for attempt in range(3):
+            try:
+                message.copy(target_id)
+                logger.info(f"Mensagem {message.id} replicada para {target_id}")
+                break
+            except errors.FloodWait as e:
+                # Pyrogram 2.x expõe a espera em e.value (e.x nas versões antigas)
+                seconds = _flood_wait_seconds(e)
+                print(f"{Fore.YELLOW}⚠️ Limite atingido ao replicar para {target_id}. Aguardando {seconds:.0f} segundos...{Style.RESET_ALL}")
+                logger.warning(f"Limite atingido ao replicar para {target_id}. Aguardando {seconds:.0f} segundos...")
+                time.sleep(seconds)
+            except Exception as e:
+                print(f"{Fore.RED}❌ Erro ao replicar mensagem para {target_id}: {str(e)}{Style.RESET_ALL}")
+                logger.error(f"Erro ao replicar mensagem para {target_id}: {str(e)}")
+                break
+
+def select_extra_channels(app, config, channel_id):
+    """
+    Valida os canais adicionais configurados em extra_channel_ids.
+    
+    Args:
+        app: Cliente Pyrogram
+        config: Configuração atual
+        channel_id (str): ID do canal principal
+        
+    Returns:
+        list: IDs válidos dos canais adicionais
+    """
+    extra_channels = []
+    for extra_id in config.get('extra_channel_ids', []):
+        validated_id = verify_channel_id(app, str(extra_id))
+        if not validated_id:
+            print(f"{Fore.YELLOW}⚠️ Canal adicional {extra_id} ignorado.{Style.RESET_ALL}")
+            logger.warning(f"Canal adicional {extra_id} inválido ou sem acesso. Ignorado.")
+        elif str(validated_id) != str(channel_id) and validated_id not in extra_channels:
+            extra_channels.append(validated_id)
+    return extra_channels
+
+def start_upload_pool(app, config, max_concurrent):
+    """
+    Inicia as sessões adicionais configuradas em upload_sessions e monta o pool de envio.
+    
+    Cada sessão é uma conta (arquivo <nome>.session) com acesso ao canal; na primeira
+    execução o Pyrogram pede o login de cada uma. Com autotune, o pool é usado mesmo
+    sem sessões adicionais, para ajustar quantas partes cada sessão envia ao mesmo tempo.
+    
+    Args:
+        app: Cliente Pyrogram principal (também envia partes e publica em ordem)
+        config: Configuração atual
+        max_concurrent (int): Transmissões simultâneas por sessão (valor inicial com autotune)
+        
+    Returns:
+        tuple: (UploadPool ou None, lista de clientes adicionais iniciados)
+    """
+    api_id = config.get('api_id', None)
+    api_hash = config.get('api_hash', None)
+    clients = []
+    for name in config.get('upload_sessions', []):
+        if name == session_name:
+            continue
+        try:
+            print(f"{Fore.CYAN}🔑 Iniciando sessão de envio adicional: {name}{Style.RESET_ALL}")
+            if api_id and api_hash:
+                client = Client(name, api_id, api_hash,
+                                max_concurrent_transmissions=max_concurrent,
+                                sleep_threshold=10)
+            else:
+                client = Client(name,
+                                max_concurrent_transmissions=max_concurrent,
+                                sleep_threshold=10)
+            client.start()
+            clients.append((name, client))
+        except Exception as e:
+            print(f"{Fore.YELLOW}⚠️ Sessão {name} ignorada: {str(e)}{Style.RESET_ALL}")
+            logger.warning(f"Sessão de envio {name} ignorada: {str(e)}")
+    tuner = None
+    if config.get('autotune', False):
+        tuner = HillClimber("upload", max_concurrent, 1, MAX_TRANSMISSIONS)
+    elif not clients:
+        return None, []
+    logger.info(f"Pool de envio com {len(clients) + 1} sessões: {[session_name] + [name for name, _ in clients]}")
+    return UploadPool([(session_name, app)] + clients, tuner=tuner), [client for _, client in clients]
+
 def format_size(size_bytes):
     """Formata bytes para uma representação legível."""
     if size_bytes < 1024:
@@ -481,8 +602,8 @@ def check_folders_content(input_folder, output_folder):
     for item in os.listdir(output_folder):
         folder_path = os.path.join(output_folder, item)
         if os.path.isdir(folder_path):
-            # Verificar se a pasta tem arquivos zip
-            has_zips = any(file.endswith('.zip') for file in os.listdir(folder_path))
+            # Verificar se a pasta tem partes (zip, tar ou tar.zst)
+            has_zips = any(is_part_file(file) for file in os.listdir(folder_path))
             if has_zips:
                 output_folders.append(item)
     
@@ -494,10 +615,26 @@ def main():
         print_colored_step("1", "Carregando configuração")
         # Carregar configuração
         config = load_config()
+        # Limites de taxa de envio e de E/S da montagem, e prioridade dos workers
+        configure_from_config(config)
         max_size_mb = config['max_size_mb']
         threads = config['threads']
         compression_level = config.get('compression_level', 0)
         max_concurrent = config.get('max_concurrent_transmissions', 2)
+        build_backend = config.get('build_backend', 'thread')
+        manifest_hash = config.get('manifest_hash', 'sha256')
+        schedule_policy = config.get('schedule_policy', 'name')
+        optimize_cover = config.get('optimize_cover', True)
+        autotune = config.get('autotune', False)
+        part_size_mode = config.get('part_size_mode', 'fixed')
+        read_order = config.get('read_order', 'none')
+        content_index = config.get('content_index', True)
+        zstd_dictionary = config.get('zstd_dictionary', False)
+        part_format = config.get('part_format', 'zip')
+        # Fila de montagem compartilhada com workers em outros processos/máquinas
+        build_queue = BuildQueue(config['build_queue']) if config.get('build_queue') else None
+        # Remoção das pastas de origem e temporárias em segundo plano (retoma pendências)
+        start_reclaimer(config)
             
         print_colored_step("2", "Verificando pastas necessárias")
         # Verificar pastas necessárias
@@ -520,7 +657,22 @@ def main():
         # Iniciar processamento se houver conteúdo em input
         if input_has_content:
             print_colored_step("3", "Processando arquivos de input/")
-            process_folder(input_folder, output_folder, max_size_mb * (1024 ** 2), threads, compression_level)
+            # Modo adaptativo: tamanho de parte por pasta, pelo histórico e pelas transmissões simultâneas
+            part_size_planner = None
+            if part_size_mode == "adaptive":
+                upload_slots = (1 + len(config.get('upload_sessions', []))) * (max_concurrent if autotune else 1)
+                part_size_planner = PartSizePlanner(upload_slots)
+            if build_queue:
+                # Este processo planeja as pastas e também monta partes, junto com os workers
+                enqueue_folders(build_queue, input_folder, output_folder, max_size_mb * (1024 ** 2),
+                                compression_level, manifest_hash, schedule_policy, optimize_cover,
+                                part_size_planner, content_index, zstd_dictionary, part_format)
+                run_worker(build_queue, input_folder, output_folder, threads, build_backend, read_order)
+            else:
+                process_folder(input_folder, output_folder, max_size_mb * (1024 ** 2), threads, compression_level,
+                               build_backend, manifest_hash, schedule_policy, optimize_cover, autotune,
+                               part_size_planner, read_order, content_index, zstd_dictionary,
+                               part_format)
         else:
             print(f"{Fore.CYAN}ℹ️ Pasta input/ está vazia. Pulando etapa de processamento.{Style.RESET_ALL}")
             logger.info("Pasta input/ está vazia. Pulando etapa de processamento.")
@@ -566,6 +718,8 @@ def main():
             try:
                 me = app.get_me()
                 print(f"{Fore.GREEN}✅ Conectado como {me.first_name} (@{me.username}){Style.RESET_ALL}")
+                # Limite de envio da conta; usado no tamanho de parte adaptativo
+                save_account_info(me)
             except Exception as e:
                 logger.error(f"Erro ao conectar com o Telegram: {str(e)}")
                 print(f"{Fore.RED}{Style.BRIGHT}❌ Erro ao conectar com o Telegram: {str(e)}{Style.RESET_ALL}")
@@ -584,6 +738,12 @@ def main():
                 print(f"{Fore.RED}{Style.BRIGHT}❌ Nenhum canal foi selecionado. Operação cancelada.{Style.RESET_ALL}")
                 sys.exit(1)
                 
+            # Canais adicionais recebem cópias das mensagens, sem novo upload
+            extra_channels = select_extra_channels(app, config, channel_id)
+            if extra_channels:
+                print(f"{Fore.CYAN}📡 Replicando também para {len(extra_channels)} canal(is) adicional(is): {', '.join(map(str, extra_channels))}{Style.RESET_ALL}")
+                logger.info(f"Canais adicionais: {extra_channels}")
+                
             logger.info(f"Iniciando envio para o canal {channel_id}")
             print(f"\n{Fore.CYAN}{Style.BRIGHT}📢 Iniciando envio para o canal {channel_id}{Style.RESET_ALL}\n")
             
@@ -591,22 +751,44 @@ def main():
             folders_to_process = [f for f in sorted(os.listdir(output_folder)) if os.path.isdir(os.path.join(output_folder, f))]
             total_folders = len(folders_to_process)
             
+            # Ordenar as pastas de acordo com a política de agendamento
+            ordered_paths = order_folders([os.path.join(output_folder, f) for f in folders_to_process], schedule_policy)
+            folders_to_process = [os.path.basename(path) for path in ordered_paths]
+            if build_queue:
+                # Pastas com partes ainda em montagem (ou com falha) ficam para depois
+                unfinished = build_queue.unfinished_folders()
+                for folder_name in [f for f in folders_to_process if f in unfinished]:
+                    print(f"{Fore.YELLOW}⏳ Pasta {folder_name} ainda não foi concluída pela fila de montagem; envio adiado{Style.RESET_ALL}")
+                folders_to_process = [f for f in folders_to_process if f not in unfinished]
+                total_folders = len(folders_to_process)
+            latency_log = LatencyLog("upload", schedule_policy)
+            
             if total_folders == 0:
                 print(f"{Fore.YELLOW}{Style.BRIGHT}⚠️ Nenhuma pasta para processar na pasta output/{Style.RESET_ALL}")
                 return
             
             print(f"{Fore.GREEN}Encontradas {total_folders} pasta(s) para processar{Style.RESET_ALL}")
             
+            # Sessões adicionais dividem o envio das partes entre várias contas
+            upload_pool, pool_clients = start_upload_pool(app, config, max_concurrent)
+            staging_chat_id = None
+            if upload_pool and config.get('staging_channel_id'):
+                staging_chat_id = verify_channel_id(app, str(config['staging_channel_id']))
+            if upload_pool:
+                print(f"{Fore.CYAN}🔀 Enviando partes por {len(upload_pool.sessions)} sessões{Style.RESET_ALL}")
+            
             for folder_index, folder_name in enumerate(folders_to_process, 1):
                 folder_path = os.path.join(output_folder, folder_name)
                 if not os.path.isdir(folder_path):
                     continue
                     
                 print(f"\n{Fore.GREEN}{Style.BRIGHT}📁 Processando pasta {folder_index}/{total_folders}: {folder_name}{Style.RESET_ALL}")
+                started_at = time.time()
                     
                 # Timestamp para cada pasta
                 timestamp = datetime.now().strftime("%d/%m/%Y %H:%M")
-                app.send_message(channel_id, f"📁 **{folder_name}**\n📅 {timestamp}")
+                header = app.send_message(channel_id, f"📁 **{folder_name}**\n📅 {timestamp}")
+                fan_out_message(header, extra_channels)
                 
                 # Enviar capa primeiro, se existir
                 has_cover = False
@@ -614,44 +796,96 @@ def main():
                     cover_path = os.path.join(folder_path, cover_name)
                     if os.path.exists(cover_path):
                         print(f"{Fore.CYAN}🖼️ Enviando capa: {cover_name}{Style.RESET_ALL}")
-                        upload_file(app, cover_path, channel_id)
+                        fan_out_message(upload_file(app, cover_path, channel_id), extra_channels)
                         has_cover = True
                         break
                 
                 if not has_cover:
                     print(f"{Fore.YELLOW}ℹ️ Nenhuma capa encontrada para esta pasta{Style.RESET_ALL}")
                 
-                # Enviar arquivos ZIP
-                zip_files = [f for f in sorted(os.listdir(folder_path)) if f.endswith('.zip')]
+                # Enviar o índice de conteúdo antes das partes, para baixar só a parte necessária
+                toc_path = find_toc(folder_path)
+                if toc_path:
+                    print(f"{Fore.CYAN}🗂️ Enviando índice de conteúdo{Style.RESET_ALL}")
+                    fan_out_message(upload_file(app, toc_path, channel_id), extra_channels)
+                
+                # Dicionário Zstandard necessário para descompactar as partes (se usado)
+                dict_path = find_dictionary(folder_path)
+                if dict_path:
+                    print(f"{Fore.CYAN}📚 Enviando dicionário Zstandard{Style.RESET_ALL}")
+                    fan_out_message(upload_file(app, dict_path, channel_id), extra_channels)
+                
+                # Enviar as partes (ZIP, tar ou tar.zst)
+                zip_files = [f for f in sorted(os.listdir(folder_path)) if is_part_file(f)]
                 total_parts = len(zip_files)
+                # Histórico de throughput: só os bytes e o tempo de envio das partes
+                parts_bytes = sum(os.path.getsize(os.path.join(folder_path, f)) for f in zip_files)
+                parts_seconds = 0.0
+                # Hashes calculados na compactação vão na legenda de cada parte
+                manifest = load_manifest(folder_path)
+                # Miniatura gerada a partir da capa, usada nos documentos das partes
+                thumb_path = os.path.join(folder_path, THUMB_NAME)
+                thumb = thumb_path if os.path.exists(thumb_path) else None
                 
                 if total_parts > 0:
                     print(f"\n{Fore.CYAN}{Style.BRIGHT}📦 Enviando {folder_name} ({total_parts} partes){Style.RESET_ALL}\n")
                     
                     with tqdm(total=total_parts, desc=f"{Fore.BLUE}Progresso total{Fore.RESET}", 
                              bar_format="{l_bar}{bar:30}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]") as total_progress:
-                        for i, zip_file in enumerate(zip_files, 1):
-                            zip_path = os.path.join(folder_path, zip_file)
-                            print(f"{Fore.YELLOW}📤 Enviando parte {i}/{total_parts}: {zip_file}{Style.RESET_ALL}")
-                            success = upload_file(app, zip_path, channel_id)
-                            if not success:
-                                print(f"{Fore.RED}{Style.BRIGHT}⚠️ Falha ao enviar {zip_file}. Tentando novamente...{Style.RESET_ALL}")
-                                # Tentar novamente após uma pausa
-                                time.sleep(5)
-                                success = upload_file(app, zip_path, channel_id)
+                        if upload_pool:
+                            # Partes enviadas em paralelo pelas sessões e publicadas em ordem
+                            zip_paths = [os.path.join(folder_path, zip_file) for zip_file in zip_files]
+                            captions = [part_caption(manifest, zip_file) for zip_file in zip_files]
+                            parts_started = time.time()
+                            with profiled("upload"):
+                                messages = upload_pool.upload_parts(zip_paths, channel_id, captions, thumb, staging_chat_id)
+                            parts_seconds = time.time() - parts_started
+                            for zip_file, message in zip(zip_files, messages):
+                                if not message:
+                                    print(f"{Fore.RED}{Style.BRIGHT}❌ Falha ao enviar {zip_file}.{Style.RESET_ALL}")
+                                fan_out_message(message, extra_channels)
+                                total_progress.update(1)
+                        else:
+                            for i, zip_file in enumerate(zip_files, 1):
+                                zip_path = os.path.join(folder_path, zip_file)
+                                print(f"{Fore.YELLOW}📤 Enviando parte {i}/{total_parts}: {zip_file}{Style.RESET_ALL}")
+                                caption = part_caption(manifest, zip_file)
+                                parts_started = time.time()
+                                success = upload_file(app, zip_path, channel_id, caption, thumb)
+                                parts_seconds += time.time() - parts_started
                                 if not success:
-                                    print(f"{Fore.RED}{Style.BRIGHT}❌ Falha ao enviar {zip_file} após segunda tentativa.{Style.RESET_ALL}")
-                            total_progress.update(1)
+                                    print(f"{Fore.RED}{Style.BRIGHT}⚠️ Falha ao enviar {zip_file}. Tentando novamente...{Style.RESET_ALL}")
+                                    # Tentar novamente após uma pausa
+                                    time.sleep(5)
+                                    parts_started = time.time()
+                                    success = upload_file(app, zip_path, channel_id, caption, thumb)
+                                    parts_seconds += time.time() - parts_started
+                                    if not success:
+                                        print(f"{Fore.RED}{Style.BRIGHT}❌ Falha ao enviar {zip_file} após segunda tentativa.{Style.RESET_ALL}")
+                                fan_out_message(success, extra_channels)
+                                total_progress.update(1)
+                
+                # Enviar o manifesto de integridade junto com a pasta
+                manifest_path = find_manifest(folder_path)
+                if manifest_path:
+                    print(f"{Fore.CYAN}🔐 Enviando manifesto de integridade{Style.RESET_ALL}")
+                    fan_out_message(upload_file(app, manifest_path, channel_id), extra_channels)
                 
                 # Enviar sticker (se existir)
                 sticker_path = 'sticker.webp'
                 if os.path.exists(sticker_path):
                     print(f"{Fore.CYAN}🏷️ Enviando sticker{Style.RESET_ALL}")
-                    upload_file(app, sticker_path, channel_id)
+                    fan_out_message(upload_file(app, sticker_path, channel_id), extra_channels)
                     
                 print(f"{Fore.GREEN}{Style.BRIGHT}✅ Pasta {folder_name} enviada com sucesso!{Style.RESET_ALL}\n")
+                upload_slots = len(upload_pool.sessions) * upload_pool.slots if upload_pool else 1
+                latency_log.record(folder_name, parts_bytes, started_at, slots=upload_slots, elapsed=parts_seconds)
+                
+            for client in pool_clients:
+                client.stop()
                 
             print(f"\n{Fore.GREEN}{Style.BRIGHT}🎉 Todos os arquivos foram enviados com sucesso!{Style.RESET_ALL}")
+            logger.info(f"Latência média de envio ({schedule_policy}): {latency_log.mean_latency:.1f}s")
             logger.info("Processamento finalizado com sucesso")
                 
     except Exception as e:
@@ -659,7 +893,66 @@ def main():
         print(f"{Fore.RED}{Style.BRIGHT}❌ Ocorreu um erro: {str(e)}{Style.RESET_ALL}")
         sys.exit(1)
 
+def start_reclaimer(config):
+    """Ativa a remoção em segundo plano, com a lixeira ao lado de input/ e output/."""
+    trash_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), reclaimer.RECLAIM_DIR)
+    reclaimer.start(trash_dir, config.get('reclaim_workers', reclaimer.RECLAIM_WORKERS))
+
+def run_build_worker(wait=False):
+    """
+    Modo worker (--worker): monta partes da fila de montagem compartilhada, sem
+    conectar ao Telegram. Com --wait, continua aguardando novos jobs.
+    """
+    config = load_config()
+    if not config.get('build_queue'):
+        print(f"{Fore.RED}{Style.BRIGHT}❌ Defina build_queue em config.json para usar o modo worker.{Style.RESET_ALL}")
+        sys.exit(1)
+    configure_from_config(config)
+    start_reclaimer(config)
+    verify_folders()
+    input_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "input")
+    output_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+    run_worker(BuildQueue(config['build_queue']), input_folder, output_folder, config['threads'],
+               config.get('build_backend', 'thread'), config.get('read_order', 'none'), wait)
+    reclaimer.drain()
+
+def run_dry_run():
+    """
+    Modo de simulação (--dry-run): planeja as pastas de input/ (partes, preenchimento,
+    espaço e tempo estimado de cada etapa) sem copiar, compactar ou conectar ao Telegram.
+    """
+    config = load_config()
+    configure_from_config(config)
+    input_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "input")
+    if not os.path.isdir(input_folder):
+        print(f"{Fore.YELLOW}{Style.BRIGHT}⚠️ A pasta input/ não existe.{Style.RESET_ALL}")
+        return
+    compression_level = config.get('compression_level', 0)
+    _, part_format = select_compression(compression_level, config.get('part_format', 'zip'))
+    # Transmissões simultâneas como no envio: uma por sessão, ou até o máximo com autotune
+    autotune = config.get('autotune', False)
+    upload_slots = (1 + len(config.get('upload_sessions', []))) * (config.get('max_concurrent_transmissions', 2) if autotune else 1)
+    part_size_planner = PartSizePlanner(upload_slots) if config.get('part_size_mode', 'fixed') == "adaptive" else None
+    dry_run(input_folder, config['max_size_mb'] * (1024 ** 2), config['threads'], compression_level, part_format,
+            config.get('build_backend', 'thread'), config.get('schedule_policy', 'name'), part_size_planner,
+            upload_slots)
+
 if __name__ == "__main__":
+    # --profile: grava perfis (cProfile + tracemalloc) de cada etapa em profiles/
+    if "--profile" in sys.argv[1:]:
+        enable_profiling()
+    # --worker: apenas monta partes da fila compartilhada (outras máquinas/processos)
+    if "--worker" in sys.argv[1:]:
+        show_banner()
+        run_build_worker(wait="--wait" in sys.argv[1:])
+        sys.exit(0)
+    # --dry-run: apenas planeja o lote e estima espaço e tempo, sem enviar nada
+    if "--dry-run" in sys.argv[1:]:
+        show_banner()
+        run_dry_run()
+        sys.exit(0)
     show_banner()
     authenticate()
-    main()
\ No newline at end of file
+    main()
+    # Remoções ainda em andamento; se interrompidas, são retomadas na próxima execução
+    reclaimer.drain()
\ No newline at end of file
@@ -0,0 +1,102 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger("ZipFileSender.Manifest")
+
+# Sufixo do manifesto de integridade gerado em cada pasta de saída
+MANIFEST_SUFFIX = "_manifest.json"
+
+def manifest_name(base_name):
+    """
+    Gera o nome do arquivo de manifesto de uma pasta.
+
+    Args:
+        base_name (str): Nome base (nome da pasta)
+
+    Returns:
+        str: Nome do arquivo de manifesto
+    """
+    return f"{base_name}{MANIFEST_SUFFIX}"
+
+def write_manifest(zip_folder, base_name, algorithm, parts):
+    """
+    Grava o manifesto de integridade com os hashes calculados durante a compactação.
+
+    Args:
+        zip_folder (str): Pasta onde estão os ZIPs
+        base_name (str): Nome base (nome da pasta)
+        algorithm (str): Algoritmo de hash usado (ex.: "sha256")
+        parts (list): Registros das partes, cada um com 'zip_name', 'size', 'digest' e
+            'entries' [(arcname, tamanho, crc, hash), ...]
+
+    Returns:
+        str: Caminho do manifesto gravado
+    """
+    manifest = {
+        "folder": base_name,
+        "algorithm": algorithm,
+        "parts": [
+            {
+                "name": part['zip_name'],
+                "size": part['size'],
+                "hash": part['digest'],
+                "entries": [
+                    {"path": arcname, "size": size, "crc32": f"{crc:08x}", "hash": digest}
+                    for arcname, size, crc, digest in part['entries']
+                ],
+            }
+            for part in sorted(parts, key=lambda part: part['zip_name'])
+        ],
+    }
+
+    manifest_path = os.path.join(zip_folder, manifest_name(base_name))
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, manifest_path)
+    logger.info(f"Manifesto {os.path.basename(manifest_path)} gravado ({len(manifest['parts'])} parte(s)).")
+    return manifest_path
+
+def find_manifest(folder_path):
+    """
+    Procura o manifesto de integridade em uma pasta de saída.
+
+    Returns:
+        str: Caminho do manifesto ou None se não existir
+    """
+    for file in sorted(os.listdir(folder_path)):
+        if file.endswith(MANIFEST_SUFFIX):
+            return os.path.join(folder_path, file)
+    return None
+
+def load_manifest(folder_path):
+    """
+    Carrega o manifesto de integridade de uma pasta de saída.
+
+    Returns:
+        dict: Conteúdo do manifesto ou None se não existir ou estiver inválido
+    """
+    manifest_path = find_manifest(folder_path)
+    if not manifest_path:
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Erro ao ler manifesto {manifest_path}: {str(e)}")
+        return None
+
+def part_caption(manifest, zip_name):
+    """
+    Gera a legenda com o hash de uma parte, para verificação sem baixar o manifesto.
+
+    Returns:
+        str: Legenda (ex.: "SHA256: ab12...") ou None se a parte não estiver no manifesto
+    """
+    if not manifest:
+        return None
+    for part in manifest.get("parts", []):
+        if part.get("name") == zip_name and part.get("hash"):
+            return f"{manifest['algorithm'].upper()}: {part['hash']}"
+    return None
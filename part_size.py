@@ -0,0 +1,157 @@
+import json
+import math
+import time
+import logging
+from scheduling import LATENCY_LOG_FILE
+
+logger = logging.getLogger("ZipFileSender.PartSize")
+
+# Limites de arquivo do Telegram por conta (com folga para o cabeçalho do ZIP)
+STANDARD_UPLOAD_LIMIT = 2000 * 1024 * 1024
+PREMIUM_UPLOAD_LIMIT = 4000 * 1024 * 1024
+LIMIT_MARGIN = 0.95
+# Folga para o agrupamento dos arquivos, que raramente enche cada parte por completo
+PACKING_SLACK = 1.05
+# Menor tamanho de parte considerado no modo adaptativo
+MIN_PART_SIZE = 256 * 1024 * 1024
+# Custo fixo por parte: chamada da API, mensagem, legenda e publicação em ordem
+PART_OVERHEAD_SECONDS = 3.0
+# Fração esperada de retransmissão por GiB de parte (trabalho perdido em falhas)
+FAILURE_RATE_PER_GB = 0.01
+# Envios recentes considerados no histórico de throughput
+HISTORY_ENTRIES = 50
+
+# Dados da conta detectados no último login (get_me), usados na compactação seguinte
+ACCOUNT_FILE = "telegram_account.json"
+
+def save_account_info(me):
+    """
+    Guarda se a conta é premium, para que a compactação saiba o limite de envio
+    (a compactação roda antes do login no Telegram).
+    """
+    info = {
+        "premium": bool(getattr(me, "is_premium", False)),
+        "checked": round(time.time()),
+    }
+    try:
+        with open(ACCOUNT_FILE, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+    except OSError as e:
+        logger.error(f"Erro ao gravar {ACCOUNT_FILE}: {str(e)}")
+
+def account_upload_limit():
+    """
+    Limite de tamanho de arquivo da conta, conforme o último login.
+
+    Returns:
+        int: Bytes (limite padrão se a conta ainda não foi verificada)
+    """
+    try:
+        with open(ACCOUNT_FILE, 'r', encoding='utf-8') as f:
+            premium = json.load(f).get("premium", False)
+    except (OSError, ValueError):
+        premium = False
+    return PREMIUM_UPLOAD_LIMIT if premium else STANDARD_UPLOAD_LIMIT
+
+def upload_throughput_history(log_file=LATENCY_LOG_FILE, entries=HISTORY_ENTRIES):
+    """
+    Throughput de envio por transmissão, a partir do registro de latência das pastas
+    (bytes das partes e tempo de envio das partes, sem capa, índice e manifesto).
+
+    Returns:
+        float: Bytes por segundo por transmissão (None se não houver histórico)
+    """
+    total_bytes = 0
+    total_seconds = 0.0
+    try:
+        with open(log_file, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    recent = []
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if entry.get("stage") == "upload" and entry.get("success") and entry.get("elapsed"):
+            recent.append(entry)
+    for entry in recent[-entries:]:
+        total_bytes += entry["bytes"]
+        total_seconds += entry["elapsed"] * entry.get("slots", 1)
+    if not total_bytes or total_seconds <= 0:
+        return None
+    return total_bytes / total_seconds
+
+def estimate_upload_seconds(total_size, part_size, slots, rate, overhead=PART_OVERHEAD_SECONDS):
+    """
+    Estima o tempo de envio de uma pasta dividida em partes de part_size.
+
+    As partes são enviadas em ondas de `slots` transmissões; cada parte custa o envio
+    dos bytes, o custo fixo por parte e o trabalho perdido esperado em falhas, que
+    cresce com o tamanho da parte.
+    """
+    parts = math.ceil(total_size / part_size)
+    waves = math.ceil(parts / slots)
+    transfer = part_size / rate
+    retry = FAILURE_RATE_PER_GB * (part_size / 1024 ** 3) * transfer
+    return waves * (transfer + overhead + retry)
+
+class PartSizePlanner:
+    """
+    Escolhe o tamanho das partes de cada pasta pelo throughput de envio registrado,
+    pelo tamanho da pasta e pelo número de transmissões simultâneas.
+
+    Partes grandes reduzem chamadas e mensagens; partes menores distribuem melhor a
+    pasta entre as transmissões e perdem menos trabalho em falhas. Os candidatos são
+    os tamanhos que dividem a pasta em múltiplos exatos do número de transmissões
+    (sem ondas incompletas), além do limite máximo; vence o de menor tempo estimado.
+    """
+
+    def __init__(self, slots=1, rate=None, upload_limit=None):
+        """
+        Args:
+            slots (int): Transmissões simultâneas no envio (sessões x envios por sessão)
+            rate (float): Bytes/s por transmissão (padrão: histórico de envios)
+            upload_limit (int): Limite da conta (padrão: detectado no último login)
+        """
+        self.slots = max(1, slots)
+        self.rate = rate if rate is not None else upload_throughput_history()
+        self.upload_limit = upload_limit or account_upload_limit()
+
+    def max_part_size(self, max_size):
+        """Limite superior: max_size, reduzido ao limite de envio da conta quando menor."""
+        return min(max_size, int(self.upload_limit * LIMIT_MARGIN))
+
+    def part_size(self, total_size, max_size):
+        """
+        Tamanho de parte para uma pasta.
+
+        Args:
+            total_size (int): Bytes da pasta
+            max_size (int): Tamanho máximo configurado (max_size_mb)
+
+        Returns:
+            int: Tamanho de parte em bytes
+        """
+        upper = self.max_part_size(max_size)
+        if not self.rate or total_size <= 0:
+            return upper
+        lower = min(MIN_PART_SIZE, upper)
+
+        candidates = {upper}
+        waves = 1
+        while True:
+            size = math.ceil(total_size * PACKING_SLACK / (self.slots * waves))
+            if size < lower:
+                break
+            if size <= upper:
+                candidates.add(size)
+            waves += 1
+
+        # Em caso de empate, a maior parte (menos chamadas)
+        best = min(candidates, key=lambda size: (
+            estimate_upload_seconds(total_size, size, self.slots, self.rate), -size))
+        logger.info(f"Tamanho de parte: {best / 1048576:.0f} MB para {total_size / 1048576:.0f} MB "
+                    f"({self.slots} transmissão(ões), {self.rate / 1048576:.2f} MB/s cada)")
+        return best
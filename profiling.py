@@ -0,0 +1,176 @@
+import os
+import io
+import time
+import atexit
+import pstats
+import cProfile
+import logging
+import threading
+import functools
+import tracemalloc
+from datetime import datetime
+from contextlib import contextmanager
+
+logger = logging.getLogger("ZipFileSender.Profiling")
+
+# Pasta dos relatórios de perfil (ao lado do log da execução)
+PROFILE_FOLDER = "profiles"
+# Quantidade de funções e linhas de alocação listadas nos relatórios
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+# Quadros de pilha guardados por alocação (1 = menor custo do tracemalloc)
+TRACEMALLOC_FRAMES = 1
+
+class Profiler:
+    """
+    Perfil por etapa (scan, plan, copy, build, upload) com cProfile e tracemalloc.
+
+    O cProfile só mede a thread em que foi ativado, então cada thread que entra em uma
+    etapa tem o seu próprio perfil; ao final os perfis da mesma etapa são somados em
+    um único <etapa>.pstats. A partir do Python 3.12 só um cProfile pode estar ativo no
+    processo: as threads que entram em uma etapa enquanto outra já é perfilada (ex.:
+    partes montadas em paralelo) têm apenas o tempo medido. As alocações são medidas com tracemalloc (1 quadro por
+    alocação) e cada ocorrência da etapa acrescenta as maiores diferenças de memória
+    e o pico em <etapa>_alloc.txt. O tracemalloc só fica ligado enquanto houver uma
+    etapa com memory=True em andamento, sem custo para as demais (ex.: build).
+
+    Desativado, profiled() não tem custo além de uma verificação.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.folder = None
+        self._profiles = {}
+        self._elapsed = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # Etapas com memory=True em andamento (o tracemalloc fica ligado enquanto > 0)
+        self._memory_stages = 0
+
+    def enable(self, base_folder=PROFILE_FOLDER):
+        """Ativa o perfil e grava os relatórios ao final do processo."""
+        if self.enabled:
+            return
+        self.folder = os.path.join(base_folder, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        os.makedirs(self.folder, exist_ok=True)
+        self.enabled = True
+        atexit.register(self.dump)
+        logger.info(f"Perfil ativado. Relatórios em {self.folder}")
+
+    @contextmanager
+    def stage(self, name, memory=True):
+        """
+        Mede uma etapa na thread atual.
+
+        Args:
+            name (str): Nome da etapa (ex.: "build")
+            memory (bool): Registrar as alocações da etapa (use False em workers)
+        """
+        if not self.enabled or getattr(self._local, "active", False):
+            # Etapas aninhadas na mesma thread já são medidas pela etapa externa
+            yield
+            return
+
+        self._local.active = True
+        snapshot = self._start_memory() if memory else None
+        started = time.perf_counter()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: outro cProfile já está ativo; a etapa só tem o tempo medido
+            profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            elapsed = time.perf_counter() - started
+            self._local.active = False
+            with self._lock:
+                if profile is not None:
+                    self._profiles.setdefault(name, []).append(profile)
+                self._elapsed[name] = self._elapsed.get(name, 0.0) + elapsed
+                self._counts[name] = self._counts.get(name, 0) + 1
+            if memory:
+                try:
+                    self._write_allocations(name, snapshot, elapsed)
+                finally:
+                    self._stop_memory()
+
+    def _start_memory(self):
+        """Liga o tracemalloc (se for a primeira etapa com memória) e tira o snapshot inicial."""
+        with self._lock:
+            if not self._memory_stages:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._memory_stages += 1
+        tracemalloc.reset_peak()
+        return tracemalloc.take_snapshot()
+
+    def _stop_memory(self):
+        """Desliga o tracemalloc quando nenhuma etapa com memória está em andamento."""
+        with self._lock:
+            self._memory_stages -= 1
+            if not self._memory_stages:
+                tracemalloc.stop()
+
+    def _write_allocations(self, name, snapshot, elapsed):
+        current, peak = tracemalloc.get_traced_memory()
+        # Ignora as alocações do próprio perfil
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        stats = tracemalloc.take_snapshot().filter_traces(filters).compare_to(
+            snapshot.filter_traces(filters), 'lineno')
+        lines = [
+            f"== {name} {datetime.now().strftime('%H:%M:%S')} ({elapsed:.2f}s) "
+            f"memória atual {current / 1048576:.1f} MB, pico {peak / 1048576:.1f} MB",
+        ]
+        lines.extend(str(stat) for stat in stats[:TOP_ALLOCATIONS])
+        try:
+            with self._lock, open(os.path.join(self.folder, f"{name}_alloc.txt"), 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n\n")
+        except OSError as e:
+            logger.error(f"Erro ao gravar relatório de alocações de {name}: {str(e)}")
+
+    def dump(self):
+        """Grava <etapa>.pstats e um resumo legível de cada etapa medida."""
+        with self._lock:
+            profiles = {name: list(items) for name, items in self._profiles.items()}
+            elapsed = dict(self._elapsed)
+            counts = dict(self._counts)
+        for name in elapsed:
+            items = profiles.get(name, [])
+            try:
+                report = io.StringIO()
+                if items:
+                    pstats.Stats(*items).dump_stats(os.path.join(self.folder, f"{name}.pstats"))
+                    pstats.Stats(*items, stream=report).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+                with open(os.path.join(self.folder, f"{name}.txt"), 'w', encoding='utf-8') as f:
+                    f.write(f"Etapa {name}: {elapsed[name]:.2f}s em {counts[name]} medição(ões), "
+                            f"{len(items)} com cProfile\n")
+                    f.write(report.getvalue())
+            except Exception as e:
+                logger.error(f"Erro ao gravar perfil de {name}: {str(e)}")
+        if elapsed:
+            logger.info(f"Perfis gravados em {self.folder}: {', '.join(sorted(elapsed))}")
+
+# Perfil global da execução, ativado por --profile
+PROFILER = Profiler()
+
+def enable_profiling(base_folder=PROFILE_FOLDER):
+    """Ativa o modo de perfil da execução (opção --profile)."""
+    PROFILER.enable(base_folder)
+
+def profiled(name, memory=True):
+    """Context manager que mede a etapa informada quando o perfil está ativo."""
+    return PROFILER.stage(name, memory)
+
+def profiled_function(name, memory=True):
+    """Decorador que mede cada chamada da função como parte da etapa informada."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with PROFILER.stage(name, memory):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
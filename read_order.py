@@ -0,0 +1,142 @@
+import os
+import sys
+import shutil
+import struct
+import logging
+from throttle import throttle_read, throttle_write
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem ioctl, a ordem por extent usa o inode
+    fcntl = None
+
+logger = logging.getLogger("ZipFileSender.ReadOrder")
+
+# Ordem de leitura dos arquivos de cada parte
+READ_ORDER_NONE = "none"      # Ordem do planejamento (tamanho)
+READ_ORDER_INODE = "inode"    # Número do inode (aproxima a ordem de criação no disco)
+READ_ORDER_EXTENT = "extent"  # Posição física do primeiro extent (FIEMAP)
+READ_ORDERS = (READ_ORDER_NONE, READ_ORDER_INODE, READ_ORDER_EXTENT)
+
+# ioctl FS_IOC_FIEMAP (Linux) e tamanhos de struct fiemap / struct fiemap_extent
+FS_IOC_FIEMAP = 0xC020660B
+_FIEMAP_HEADER = struct.Struct("=QQLLLL")
+_FIEMAP_EXTENT_SIZE = 56
+
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+def physical_offset(path):
+    """
+    Posição física do início do arquivo no dispositivo, via FIEMAP.
+
+    Returns:
+        int: Offset em bytes (0 para arquivos sem extents) ou None se indisponível
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return None
+    request = _FIEMAP_HEADER.pack(0, 0xFFFFFFFFFFFFFFFF, 0, 0, 1, 0) + bytes(_FIEMAP_EXTENT_SIZE)
+    try:
+        with open(path, 'rb') as f:
+            result = fcntl.ioctl(f.fileno(), FS_IOC_FIEMAP, request)
+    except OSError:
+        return None
+    mapped_extents = _FIEMAP_HEADER.unpack_from(result)[3]
+    if not mapped_extents:
+        return 0
+    # struct fiemap_extent: fe_logical, fe_physical, ...
+    return struct.unpack_from("=QQ", result, _FIEMAP_HEADER.size)[1]
+
+def order_for_reading(paths, read_order=READ_ORDER_NONE):
+    """
+    Ordena os arquivos de uma parte para leitura sequencial no disco.
+
+    Em discos rígidos e com o cache frio, ler na ordem física evita buscas da cabeça
+    de leitura. Se o FIEMAP não estiver disponível para algum arquivo (sistema de
+    arquivos sem suporte, Windows), usa a ordem por inode.
+
+    Args:
+        paths (list): Caminhos dos arquivos
+        read_order (str): "none", "inode" ou "extent"
+
+    Returns:
+        list: Caminhos na ordem de leitura
+    """
+    if read_order not in READ_ORDERS:
+        logger.warning(f"Ordem de leitura desconhecida: {read_order}. Usando '{READ_ORDER_NONE}'.")
+        return list(paths)
+    if read_order == READ_ORDER_NONE:
+        return list(paths)
+
+    if read_order == READ_ORDER_EXTENT:
+        offsets = [physical_offset(path) for path in paths]
+        if None not in offsets:
+            return [path for _, path in sorted(zip(offsets, paths), key=lambda item: item[0])]
+        logger.info("FIEMAP indisponível; ordenando a leitura por inode.")
+
+    def inode(path):
+        try:
+            st = os.stat(path)
+            return (st.st_dev, st.st_ino)
+        except OSError:
+            return (0, 0)
+    return sorted(paths, key=inode)
+
+def advise(fd, advice, offset=0, length=0):
+    """Dica de acesso ao cache de páginas (posix_fadvise), ignorada onde não existe."""
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, offset, length, advice)
+        except OSError:
+            pass
+
+def prefetch(path):
+    """Inicia a leitura antecipada do arquivo inteiro (WILLNEED) em segundo plano."""
+    if not hasattr(os, "POSIX_FADV_WILLNEED"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        advise(fd, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+def copy_sequential(src, dst):
+    """
+    Copia um arquivo com dicas de leitura sequencial e descarta do cache as páginas
+    da origem ao terminar (DONTNEED), para não expulsar o resto do cache de páginas.
+    Preserva os metadados como shutil.copy2. Respeita os limites de leitura e escrita
+    da montagem (read_rate_mb / write_rate_mb) a cada bloco.
+    """
+    with open(src, 'rb', buffering=0) as fsrc, open(dst, 'wb', buffering=0) as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        size = os.fstat(src_fd).st_size
+        if hasattr(os, "POSIX_FADV_SEQUENTIAL"):
+            advise(src_fd, os.POSIX_FADV_SEQUENTIAL)
+            advise(src_fd, os.POSIX_FADV_WILLNEED)
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(dst_fd, src_fd, offset, min(COPY_CHUNK_SIZE, size - offset))
+                if not sent:
+                    break
+                offset += sent
+                throttle_read(sent)
+                throttle_write(sent)
+        except (AttributeError, OSError):
+            # Sem sendfile entre arquivos: cópia comum a partir do ponto atual
+            fsrc.seek(offset)
+            fdst.seek(offset)
+            while True:
+                data = fsrc.read(COPY_CHUNK_SIZE)
+                if not data:
+                    break
+                throttle_read(len(data))
+                throttle_write(len(data))
+                view = memoryview(data)
+                while view:
+                    view = view[fdst.write(view):]
+        if hasattr(os, "POSIX_FADV_DONTNEED"):
+            advise(src_fd, os.POSIX_FADV_DONTNEED)
+    shutil.copystat(src, dst)
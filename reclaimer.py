@@ -0,0 +1,209 @@
+import os
+import sys
+import time
+import queue
+import shutil
+import logging
+import threading
+from colorama import Fore, Style
+from throttle import lower_priority
+
+logger = logging.getLogger("ZipFileSender.Reclaimer")
+
+# Lixeira ao lado de input/ e output/ (precisa estar no mesmo sistema de arquivos)
+RECLAIM_DIR = ".reclaim"
+RECLAIM_WORKERS = 4
+# Prioridade das threads de remoção (Linux): menor CPU e E/S só quando o disco está ocioso
+RECLAIM_NICE = 19
+RECLAIM_IONICE = "idle"
+
+class _Node:
+    """Diretório em remoção: o pai só é removido quando todos os filhos terminam."""
+
+    __slots__ = ("path", "parent", "remaining")
+
+    def __init__(self, path, parent=None):
+        self.path = path
+        self.parent = parent
+        self.remaining = 0
+
+class Reclaimer:
+    """
+    Remove árvores de diretórios em segundo plano.
+
+    Cada pasta descartada é primeiro renomeada para a lixeira (operação atômica) e
+    some imediatamente do lugar original; as threads então removem a árvore em
+    paralelo, um diretório por vez (os.scandir), enquanto a montagem e o envio
+    continuam. Como tudo que está na lixeira é lixo, o que não for removido (queda do
+    programa) é retomado na próxima execução.
+    """
+
+    def __init__(self, trash_dir, workers=RECLAIM_WORKERS):
+        self.trash_dir = os.path.abspath(trash_dir)
+        self.workers = max(1, workers)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._counter = 0
+        self._threads = []
+
+    def start(self):
+        """Inicia as threads e retoma as remoções pendentes da lixeira."""
+        os.makedirs(self.trash_dir, exist_ok=True)
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        leftovers = sorted(os.listdir(self.trash_dir))
+        for name in leftovers:
+            self._submit(os.path.join(self.trash_dir, name))
+        if leftovers:
+            print(f"{Fore.CYAN}🧹 Retomando a remoção de {len(leftovers)} item(ns) pendente(s) da lixeira{Style.RESET_ALL}")
+            logger.info(f"Retomando {len(leftovers)} remoção(ões) pendente(s) em {self.trash_dir}")
+
+    @property
+    def pending(self):
+        """Itens da lixeira ainda não removidos."""
+        with self._lock:
+            return self._pending
+
+    def discard(self, path, ignore_errors=False):
+        """
+        Move path para a lixeira e agenda a remoção.
+
+        Se a renomeação não for possível (outro sistema de arquivos, pasta em uso no
+        Windows), remove na hora, como shutil.rmtree(path, ignore_errors).
+        """
+        with self._lock:
+            self._counter += 1
+            target = os.path.join(self.trash_dir, f"{time.time_ns()}_{os.getpid()}_{self._counter}_"
+                                                  f"{os.path.basename(path.rstrip(os.sep))}")
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            if not ignore_errors:
+                raise
+            return
+        except OSError as e:
+            logger.info(f"Não foi possível mover {path} para a lixeira ({str(e)}); removendo agora.")
+            shutil.rmtree(path, ignore_errors=ignore_errors)
+            return
+        self._submit(target)
+
+    def drain(self):
+        """Aguarda o fim das remoções agendadas."""
+        with self._idle:
+            if self._pending:
+                print(f"{Fore.CYAN}🧹 Aguardando a remoção de {self._pending} pasta(s) em segundo plano...{Style.RESET_ALL}")
+            while self._pending:
+                self._idle.wait()
+
+    def _submit(self, path):
+        with self._lock:
+            self._pending += 1
+        self._queue.put(_Node(path))
+
+    def _run(self):
+        if sys.platform.startswith("linux"):
+            lower_priority(RECLAIM_NICE, RECLAIM_IONICE)
+        while True:
+            node = self._queue.get()
+            try:
+                self._remove_entries(node)
+            except Exception as e:
+                logger.error(f"Erro ao remover {node.path}: {str(e)}")
+                self._finish(node)
+
+    def _remove_entries(self, node):
+        """Remove os arquivos de um diretório e agenda os subdiretórios."""
+        subdirs = []
+        try:
+            with os.scandir(node.path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    else:
+                        _unlink(entry.path)
+        except NotADirectoryError:
+            # Item da lixeira que é um arquivo (ou link)
+            _unlink(node.path)
+            self._done(node.path)
+            return
+        except FileNotFoundError:
+            # Já removido (outro processo retomando a mesma lixeira)
+            pass
+        if not subdirs:
+            self._finish(node)
+            return
+        # O contador é definido antes de agendar os filhos, que podem terminar antes disto
+        node.remaining = len(subdirs)
+        for path in subdirs:
+            self._queue.put(_Node(path, node))
+
+    def _finish(self, node):
+        """Remove o diretório vazio e, se era o último filho, também o pai."""
+        while node is not None:
+            try:
+                os.rmdir(node.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Erro ao remover {node.path}: {str(e)}")
+            parent = node.parent
+            if parent is None:
+                self._done(node.path)
+                return
+            with self._lock:
+                parent.remaining -= 1
+                if parent.remaining:
+                    return
+            node = parent
+
+    def _done(self, path):
+        """Conclui um item da lixeira."""
+        if os.path.lexists(path):
+            logger.warning(f"{path} não foi removido por completo; nova tentativa na próxima execução.")
+        else:
+            logger.info(f"{path} removido da lixeira.")
+        with self._idle:
+            self._pending -= 1
+            if not self._pending:
+                self._idle.notify_all()
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        # Arquivos somente leitura (Windows)
+        os.chmod(path, 0o600)
+        os.unlink(path)
+
+_reclaimer = None
+
+def start(trash_dir, workers=RECLAIM_WORKERS):
+    """
+    Ativa a remoção em segundo plano no processo (workers=0 mantém a remoção na hora).
+
+    Returns:
+        Reclaimer: Instância ativa (None se desativada)
+    """
+    global _reclaimer
+    if _reclaimer is None and workers > 0:
+        _reclaimer = Reclaimer(trash_dir, workers)
+        _reclaimer.start()
+    return _reclaimer
+
+def discard(path, ignore_errors=False):
+    """Remove a árvore path: em segundo plano, se ativado (ver start), ou na hora."""
+    if _reclaimer is None:
+        shutil.rmtree(path, ignore_errors=ignore_errors)
+    else:
+        _reclaimer.discard(path, ignore_errors)
+
+def drain():
+    """Aguarda as remoções em segundo plano (se ativadas)."""
+    if _reclaimer is not None:
+        _reclaimer.drain()
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger("ZipFileSender.Scheduling")
+
+# Políticas de ordenação de pastas para compactação e envio
+POLICY_NAME = "name"          # Ordem alfabética (comportamento original)
+POLICY_SJF = "sjf"            # Menor pasta primeiro (shortest-job-first, por bytes)
+POLICY_FIFO = "fifo"          # Ordem de chegada (mtime da pasta)
+POLICY_PRIORITY = "priority"  # Prioridade explícita via arquivo marcador
+POLICIES = (POLICY_NAME, POLICY_SJF, POLICY_FIFO, POLICY_PRIORITY)
+
+# Arquivo marcador com a prioridade da pasta (número inteiro, maior = primeiro).
+# Não é incluído nos ZIPs e é copiado para a pasta de saída junto com a capa.
+PRIORITY_MARKER = ".priority"
+
+# Registro de latência por pasta (uma linha JSON por pasta e etapa)
+LATENCY_LOG_FILE = "folder_latency.jsonl"
+
+def folder_size(folder_path):
+    """
+    Calcula o tamanho total em bytes dos arquivos de uma pasta (recursivo).
+    """
+    total = 0
+    stack = [folder_path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        except OSError as e:
+            logger.warning(f"Erro ao ler {folder_path}: {str(e)}")
+    return total
+
+def read_priority(folder_path):
+    """
+    Lê a prioridade da pasta no arquivo marcador.
+
+    Returns:
+        int: Prioridade (0 se não houver marcador ou se for inválido)
+    """
+    marker_path = os.path.join(folder_path, PRIORITY_MARKER)
+    try:
+        with open(marker_path, 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.warning(f"Prioridade inválida em {marker_path}: {str(e)}")
+        return 0
+
+def order_folders(folder_paths, policy=POLICY_NAME):
+    """
+    Ordena as pastas de acordo com a política de agendamento.
+
+    Args:
+        folder_paths (list): Caminhos das pastas
+        policy (str): "name", "sjf", "fifo" ou "priority"
+
+    Returns:
+        list: Caminhos das pastas na ordem de processamento
+    """
+    if policy not in POLICIES:
+        logger.warning(f"Política de agendamento desconhecida: {policy}. Usando '{POLICY_NAME}'.")
+        policy = POLICY_NAME
+
+    by_name = sorted(folder_paths, key=lambda path: os.path.basename(path.rstrip("\\/")))
+    if policy == POLICY_SJF:
+        sizes = {path: folder_size(path) for path in by_name}
+        return sorted(by_name, key=lambda path: sizes[path])
+    if policy == POLICY_FIFO:
+        return sorted(by_name, key=lambda path: os.path.getmtime(path))
+    if policy == POLICY_PRIORITY:
+        return sorted(by_name, key=lambda path: -read_priority(path))
+    return by_name
+
+class LatencyLog:
+    """
+    Registra a latência de cada pasta em uma etapa (compactação ou envio).
+
+    A latência é o tempo entre o início da etapa (quando todas as pastas estão na fila)
+    e a conclusão da pasta, o que permite comparar o tempo médio até a publicação
+    obtido com cada política.
+    """
+
+    def __init__(self, stage, policy, log_file=LATENCY_LOG_FILE, queued_at=None):
+        self.stage = stage
+        self.policy = policy
+        self.log_file = log_file
+        # Na fila de montagem, cada pasta tem o próprio horário de entrada na fila
+        self.queued_at = time.time() if queued_at is None else queued_at
+        self.latencies = []
+
+    def record(self, folder_name, size, started_at, success=True, slots=1, output_bytes=None, method=None,
+               elapsed=None):
+        """
+        Registra a conclusão de uma pasta iniciada em started_at (com `slots` transmissões
+        simultâneas). Na compactação, output_bytes (tamanho das partes) e method
+        ("formato:nível") alimentam as estimativas do planejamento (--dry-run). elapsed,
+        se informado, substitui o tempo entre started_at e a conclusão (ex.: só o tempo
+        de envio das partes, sem pausas nem arquivos auxiliares).
+        """
+        finished_at = time.time()
+        if elapsed is None:
+            elapsed = finished_at - started_at
+        latency = finished_at - self.queued_at
+        self.latencies.append(latency)
+        entry = {
+            "stage": self.stage,
+            "policy": self.policy,
+            "folder": folder_name,
+            "bytes": size,
+            "queued": round(self.queued_at, 3),
+            "started": round(started_at, 3),
+            "finished": round(finished_at, 3),
+            "elapsed": round(elapsed, 3),
+            "latency": round(latency, 3),
+            "success": success,
+            "slots": slots,
+        }
+        if output_bytes is not None:
+            entry["output_bytes"] = output_bytes
+        if method is not None:
+            entry["method"] = method
+        try:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Erro ao gravar registro de latência: {str(e)}")
+
+    @property
+    def mean_latency(self):
+        """Latência média das pastas registradas, em segundos."""
+        if not self.latencies:
+            return 0.0
+        return sum(self.latencies) / len(self.latencies)
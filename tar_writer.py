@@ -0,0 +1,242 @@
+import os
+import stat
+import tarfile
+import zlib
+import hashlib
+import logging
+
+from zip_writer import ZIP_ZSTANDARD, ZSTD_DEFAULT_LEVEL, COPY_CHUNK_SIZE
+from throttle import throttle_read, throttle_write
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional: só o formato tar.zst depende dele
+    zstandard = None
+
+logger = logging.getLogger("ZipFileSender.TarWriter")
+
+# Formatos das partes geradas para cada pasta
+PART_FORMAT_ZIP = "zip"
+PART_FORMAT_TAR = "tar"
+PART_FORMAT_TAR_ZST = "tar.zst"
+PART_FORMATS = (PART_FORMAT_ZIP, PART_FORMAT_TAR, PART_FORMAT_TAR_ZST)
+PART_EXTENSIONS = tuple(f".{part_format}" for part_format in PART_FORMATS)
+
+_BLOCK_SIZE = tarfile.BLOCKSIZE
+_METHOD_STORED = 0
+
+class PartBrokenError(IOError):
+    """
+    Falha no meio de uma entrada que não pode ser desfeita (tar.zst ou stream): a parte
+    inteira precisa ser descartada.
+    """
+
+def zstd_available():
+    """Indica se o pacote zstandard (necessário para o tar.zst) está instalado."""
+    return zstandard is not None
+
+def is_part_file(name):
+    """Indica se o nome é de uma parte gerada (ZIP, tar ou tar.zst)."""
+    return name.endswith(PART_EXTENSIONS)
+
+class _Sink:
+    """Destino dos bytes finais da parte: grava, conta e calcula o hash da parte."""
+
+    def __init__(self, fp, part_hash):
+        self.fp = fp
+        self.part_hash = part_hash
+        self.pos = 0
+
+    def write(self, data):
+        throttle_write(len(data))
+        if self.part_hash is not None:
+            self.part_hash.update(data)
+        view = memoryview(data)
+        while view:
+            written = self.fp.write(view)
+            view = view[written:]
+        self.pos += len(data)
+        return len(data)
+
+    def flush(self):
+        self.fp.flush()
+
+class TarWriter:
+    """
+    Escritor de partes tar (POSIX/pax) ou tar.zst, com a mesma interface do ZipWriter.
+
+    O tar não tem diretório central: cada arquivo é um cabeçalho seguido dos dados, e a
+    parte termina com dois blocos zerados. Tudo é escrito de forma estritamente
+    sequencial, sem voltar para corrigir cabeçalhos, então a parte pode ser gravada em
+    qualquer stream (fileobj), como um pipe ligado ao envio.
+
+    Com ZIP_ZSTANDARD (requer o pacote zstandard), o tar inteiro é um único stream
+    Zstandard comprimido pelos workers do próprio zstd (threads), o que aproveita o
+    contexto entre arquivos pequenos sem precisar de dicionário.
+
+    O CRC-32 e o hash (hash_algorithm) de cada arquivo são calculados sobre o conteúdo
+    original durante a escrita, como no ZipWriter; o hash da parte é o dos bytes gravados.
+    """
+
+    def __init__(self, file_path=None, threads=1, compression=_METHOD_STORED, compresslevel=None,
+                 hash_algorithm=None, fileobj=None):
+        if compression not in (_METHOD_STORED, ZIP_ZSTANDARD):
+            raise ValueError(f"Método de compressão não suportado no tar: {compression}")
+        if compression == ZIP_ZSTANDARD and zstandard is None:
+            raise RuntimeError("O formato tar.zst requer o pacote zstandard (pip install zstandard)")
+        self.file_path = file_path
+        self._compression = compression
+        self.hash_algorithm = hash_algorithm
+        self._part_hash = hashlib.new(hash_algorithm) if hash_algorithm else None
+        self._owns_fp = fileobj is None
+        self._fp = open(file_path, 'wb', buffering=0) if fileobj is None else fileobj
+        self._sink = _Sink(self._fp, self._part_hash)
+        if compression == ZIP_ZSTANDARD:
+            level = ZSTD_DEFAULT_LEVEL if compresslevel is None else compresslevel
+            compressor = zstandard.ZstdCompressor(level=level, threads=threads if threads > 1 else 0)
+            self._out = compressor.stream_writer(self._sink, closefd=False)
+        else:
+            self._out = self._sink
+        # Posição no stream tar (antes da compressão)
+        self._pos = 0
+        self._entries = []
+        self._closed = False
+        self._broken = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._owns_fp:
+            self._fp.close()
+        return False
+
+    @property
+    def entries(self):
+        """Lista de registros (arcname, tamanho, crc, hash) das entradas gravadas."""
+        return [(entry['arcname'], entry['size'], entry['crc'], entry['digest']) for entry in self._entries]
+
+    @property
+    def toc(self):
+        """
+        Localização dos dados de cada entrada: lista de (arcname, offset dos dados,
+        tamanho, tamanho, crc, método). No tar.zst o offset é no stream tar
+        descomprimido.
+        """
+        return [
+            (entry['arcname'], entry['data_offset'], entry['size'], entry['size'], entry['crc'], _METHOD_STORED)
+            for entry in self._entries
+        ]
+
+    @property
+    def size(self):
+        """Bytes gravados na parte até o momento (comprimidos, no tar.zst)."""
+        return self._sink.pos
+
+    @property
+    def digest(self):
+        """Hash (hexadecimal) de todos os bytes gravados, ou None se desativado."""
+        return self._part_hash.hexdigest() if self._part_hash is not None else None
+
+    def _write(self, data):
+        self._out.write(data)
+        self._pos += len(data)
+
+    def write(self, filename, arcname=None):
+        """
+        Adiciona um arquivo à parte.
+
+        Args:
+            filename (str): Caminho do arquivo a ser adicionado
+            arcname (str): Nome do arquivo dentro do tar (padrão: nome do arquivo)
+
+        Raises:
+            PartBrokenError: Se a leitura falhar depois de gravado o cabeçalho e a entrada
+                não puder ser desfeita (tar.zst ou stream); a parte deve ser descartada
+        """
+        if self._broken:
+            raise PartBrokenError(self._broken)
+        st = os.stat(filename)
+        if not stat.S_ISREG(st.st_mode):
+            raise ValueError(f"{filename} não é um arquivo regular")
+        if arcname is None:
+            arcname = os.path.basename(filename)
+        arcname = arcname.replace(os.sep, '/').lstrip('/')
+
+        info = tarfile.TarInfo(arcname)
+        info.size = st.st_size
+        info.mtime = int(st.st_mtime)
+        info.mode = stat.S_IMODE(st.st_mode)
+
+        entry_offset = self._pos
+        saved_part_hash = self._part_hash.copy() if self._part_hash is not None else None
+        entry_hash = hashlib.new(self.hash_algorithm) if self.hash_algorithm else None
+        crc = 0
+        copied = 0
+        with open(filename, 'rb', buffering=0) as src:
+            # Formato pax: nomes longos, UTF-8 e arquivos acima de 8 GiB
+            self._write(info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape"))
+            data_offset = self._pos
+            try:
+                # O tamanho já está no cabeçalho: ler exatamente esse número de bytes
+                while copied < info.size:
+                    data = src.read(min(COPY_CHUNK_SIZE, info.size - copied))
+                    if not data:
+                        raise IOError(f"Arquivo truncado durante a leitura: {filename}")
+                    throttle_read(len(data))
+                    if entry_hash is not None:
+                        entry_hash.update(data)
+                    crc = zlib.crc32(data, crc)
+                    self._write(data)
+                    copied += len(data)
+            except BaseException as e:
+                self._discard_entry(entry_offset, saved_part_hash, filename, e)
+                raise
+        remainder = info.size % _BLOCK_SIZE
+        if remainder:
+            self._write(bytes(_BLOCK_SIZE - remainder))
+
+        self._entries.append({
+            'arcname': arcname,
+            'crc': crc,
+            'digest': entry_hash.hexdigest() if entry_hash is not None else None,
+            'size': info.size,
+            'data_offset': data_offset,
+        })
+
+    def _discard_entry(self, entry_offset, saved_part_hash, filename, error):
+        """
+        Trata uma falha no meio de uma entrada: no tar gravado em arquivo, volta ao
+        início da entrada e a parte continua consistente. Em streams (ou no tar.zst, já
+        comprimido) não há como voltar: a parte é marcada como inutilizável, para que
+        não seja publicada com o arquivo incompleto sob o nome verdadeiro.
+        """
+        if self._out is self._sink and self._owns_fp:
+            # Sem compressão, a posição no tar é a própria posição no arquivo
+            os.ftruncate(self._fp.fileno(), entry_offset)
+            self._fp.seek(entry_offset)
+            self._pos = self._sink.pos = entry_offset
+            self._part_hash = self._sink.part_hash = saved_part_hash
+            return
+        self._broken = f"Falha ao ler {filename} no meio da entrada ({str(error)}); parte descartada"
+        raise PartBrokenError(self._broken) from error
+
+    def close(self):
+        """Escreve o final do tar (dois blocos zerados) e fecha a parte."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._broken:
+            if self._owns_fp:
+                self._fp.close()
+            raise PartBrokenError(self._broken)
+        try:
+            self._write(bytes(2 * _BLOCK_SIZE))
+            if self._out is not self._sink:
+                # Fecha o frame Zstandard sem fechar o destino
+                self._out.close()
+        finally:
+            if self._owns_fp:
+                self._fp.close()
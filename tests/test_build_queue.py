@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import sqlite3
+import zipfile
+import multiprocessing
+import build_queue
+from build_queue import BuildQueue, enqueue_folders, run_worker
+from capacity import build_history
+
+def test_queue_build_writes_latency_history(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(build_queue, "POLL_SECONDS", 0.05)
+    source = tmp_path / "input" / "pasta"
+    source.mkdir(parents=True)
+    for i in range(6):
+        (source / f"arquivo_{i}.bin").write_bytes(os.urandom(300 * 1024))
+    output = tmp_path / "output"
+    queue = BuildQueue(str(tmp_path / "fila.db"))
+
+    enqueue_folders(queue, str(tmp_path / "input"), str(output), 1024 * 1024)
+    assert run_worker(queue, str(tmp_path / "input"), str(output), slots=2) == 2
+
+    with open("folder_latency.jsonl", 'r', encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    assert len(entries) == 1
+    entry = entries[0]
+    assert (entry["stage"], entry["folder"], entry["method"], entry["success"]) == ("build", "pasta", "zip:0", True)
+    assert entry["bytes"] == 6 * 300 * 1024
+    parts = [name for name in os.listdir(output / "pasta") if name.endswith(".zip")]
+    assert entry["output_bytes"] == sum(os.path.getsize(output / "pasta" / name) for name in parts)
+    assert entry["elapsed"] > 0
+    # O planejamento (--dry-run) passa a ter histórico de compactação
+    rate, ratio, samples = build_history("zip:0")
+    assert rate and ratio and samples == 1
+
+def _worker_process(db_path, input_folder, output_folder, results):
+    """Worker em um processo próprio (alvo do multiprocessing)."""
+    build_queue.POLL_SECONDS = 0.05
+    results.put(run_worker(BuildQueue(db_path), input_folder, output_folder, slots=2))
+
+def test_worker_processes_share_the_queue(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sources = {}
+    for folder in ("pasta_a", "pasta_b"):
+        source = tmp_path / "input" / folder
+        source.mkdir(parents=True)
+        for i in range(8):
+            data = os.urandom(200 * 1024)
+            (source / f"arquivo_{i}.bin").write_bytes(data)
+            sources[(folder, f"arquivo_{i}.bin")] = data
+    output = tmp_path / "output"
+    db_path = str(tmp_path / "fila.db")
+    queue = BuildQueue(db_path)
+    enqueue_folders(queue, str(tmp_path / "input"), str(output), 512 * 1024)
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=_worker_process,
+                               args=(db_path, str(tmp_path / "input"), str(output), results))
+               for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    built = [results.get(timeout=120) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=30)
+        assert worker.exitcode == 0
+
+    conn = sqlite3.connect(db_path)
+    try:
+        jobs = conn.execute("SELECT status, attempts FROM jobs").fetchall()
+        folders = conn.execute("SELECT status FROM folders").fetchall()
+    finally:
+        conn.close()
+    # Cada parte foi reservada e montada uma única vez, por algum dos workers
+    assert jobs and all(row == ("done", 1) for row in jobs)
+    assert sum(built) == len(jobs)
+    assert folders == [("done",), ("done",)]
+
+    extracted = {}
+    for folder in ("pasta_a", "pasta_b"):
+        for part in sorted(os.listdir(output / folder)):
+            if part.endswith(".zip"):
+                with zipfile.ZipFile(str(output / folder / part)) as zf:
+                    for name in zf.namelist():
+                        assert (folder, name) not in extracted
+                        extracted[(folder, name)] = zf.read(name)
+        assert not os.path.exists(tmp_path / "input" / folder)
+    assert extracted == sources
+    # Cada pasta foi finalizada uma única vez
+    with open("folder_latency.jsonl", 'r', encoding='utf-8') as f:
+        assert sorted(json.loads(line)["folder"] for line in f) == ["pasta_a", "pasta_b"]
+
+def test_fail_requires_the_current_lease(tmp_path):
+    source = tmp_path / "input" / "pasta"
+    source.mkdir(parents=True)
+    (source / "arquivo.bin").write_bytes(b"x" * 1024)
+    queue = BuildQueue(str(tmp_path / "fila.db"))
+    enqueue_folders(queue, str(tmp_path / "input"), str(tmp_path / "output"), 1024 * 1024)
+
+    stale = queue.claim("worker-antigo")
+    # A reserva expirou e outro worker assumiu o job
+    conn = sqlite3.connect(str(tmp_path / "fila.db"))
+    conn.execute("UPDATE jobs SET heartbeat = ?", (time.time() - build_queue.LEASE_SECONDS - 1,))
+    conn.commit()
+    conn.close()
+    current = queue.claim("worker-novo")
+    assert current["id"] == stale["id"]
+
+    # A falha do worker antigo não devolve nem marca como falha o job do novo
+    assert queue.fail(stale["id"], build_queue.MAX_ATTEMPTS, "worker-antigo")
+    assert queue.claim("outro") is None
+    assert queue.unfinished_folders() == {"pasta"}
+    assert queue.folder("pasta")["status"] == "building"
@@ -0,0 +1,20 @@
+import os
+from file_index import FileIndex
+from scheduling import PRIORITY_MARKER
+
+def _write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def test_scan_excludes_only_top_level_marker(tmp_path):
+    root = str(tmp_path)
+    _write(os.path.join(root, PRIORITY_MARKER), b"5")
+    _write(os.path.join(root, "sub", PRIORITY_MARKER), b"dados do usuario")
+    _write(os.path.join(root, "sub", "a.txt"))
+
+    index = FileIndex.scan(root, exclude=(PRIORITY_MARKER,))
+
+    relpaths = sorted(index.relpath(i) for i in range(len(index)))
+    assert relpaths == sorted([os.path.join("sub", PRIORITY_MARKER), os.path.join("sub", "a.txt")])
+    assert index.total_size() == len(b"dados do usuario") + 1
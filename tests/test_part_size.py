@@ -0,0 +1,22 @@
+import json
+from part_size import PartSizePlanner, PREMIUM_UPLOAD_LIMIT, STANDARD_UPLOAD_LIMIT, upload_throughput_history
+from scheduling import LatencyLog
+
+MB = 1024 * 1024
+
+def test_premium_part_size_never_exceeds_max_size():
+    planner = PartSizePlanner(slots=2, rate=10 * MB, upload_limit=PREMIUM_UPLOAD_LIMIT)
+    assert planner.max_part_size(1000 * MB) == 1000 * MB
+    assert planner.part_size(50 * 1024 * MB, 1000 * MB) <= 1000 * MB
+
+def test_standard_limit_caps_max_size():
+    planner = PartSizePlanner(slots=1, rate=10 * MB, upload_limit=STANDARD_UPLOAD_LIMIT)
+    assert planner.max_part_size(4000 * MB) < STANDARD_UPLOAD_LIMIT
+
+def test_upload_history_uses_recorded_part_time(tmp_path):
+    log_file = str(tmp_path / "latency.jsonl")
+    log = LatencyLog("upload", "name", log_file)
+    log.record("pasta", 100 * MB, started_at=0.0, slots=2, elapsed=5.0)
+    with open(log_file, 'r', encoding='utf-8') as f:
+        assert json.loads(f.readline())["elapsed"] == 5.0
+    assert upload_throughput_history(log_file) == 100 * MB / (5.0 * 2)
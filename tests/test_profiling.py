@@ -0,0 +1,62 @@
+import os
+import zipfile
+import cProfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import profiling
+import auto_zip
+
+PARTS = 4
+
+class _SingleProfile(cProfile.Profile):
+    """Como no Python 3.12+: só um cProfile ativo por processo."""
+
+    _lock = threading.Lock()
+    _active = False
+
+    def enable(self, *args, **kwargs):
+        with self._lock:
+            if _SingleProfile._active:
+                raise ValueError("Another profiling tool is already active")
+            _SingleProfile._active = True
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        super().disable()
+        _SingleProfile._active = False
+
+def test_parallel_parts_build_under_profiler(tmp_path, monkeypatch):
+    profiler = profiling.Profiler()
+    profiler.enable(str(tmp_path / "profiles"))
+    monkeypatch.setattr(profiling, "PROFILER", profiler)
+    monkeypatch.setattr(profiling.cProfile, "Profile", _SingleProfile)
+    # Todas as partes ficam dentro da etapa "build" ao mesmo tempo
+    barrier = threading.Barrier(PARTS, timeout=10)
+    write_tree = auto_zip.write_tree
+    def synchronized_write_tree(*args, **kwargs):
+        barrier.wait()
+        write_tree(*args, **kwargs)
+    monkeypatch.setattr(auto_zip, "write_tree", synchronized_write_tree)
+
+    output = tmp_path / "saida"
+    output.mkdir()
+    for index in range(1, PARTS + 1):
+        source = tmp_path / f"parte_{index}"
+        source.mkdir()
+        (source / "dados.bin").write_bytes(os.urandom(64 * 1024))
+    with ThreadPoolExecutor(max_workers=PARTS) as executor:
+        results = list(executor.map(
+            lambda index: auto_zip.compress_directory(str(tmp_path / f"parte_{index}"), f"pasta.part{index:02d}.zip",
+                                                      64 * 1024, str(output), show_progress=False),
+            range(1, PARTS + 1)))
+
+    assert results == [True] * PARTS
+    for index in range(1, PARTS + 1):
+        with zipfile.ZipFile(str(output / f"pasta.part{index:02d}.zip")) as zf:
+            assert zf.testzip() is None
+    profiler.dump()
+    with open(os.path.join(profiler.folder, "build.txt"), 'r', encoding='utf-8') as f:
+        summary = f.readline()
+    # Uma parte perfilada com cProfile; as demais só com o tempo medido
+    assert f"em {PARTS} medição(ões), 1 com cProfile" in summary
+    assert os.path.exists(os.path.join(profiler.folder, "build.pstats"))
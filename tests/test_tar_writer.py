@@ -0,0 +1,77 @@
+import os
+import tarfile
+import pytest
+import tar_writer
+from tar_writer import TarWriter, PartBrokenError, PART_FORMAT_TAR, PART_FORMAT_TAR_ZST
+from zip_writer import ZIP_ZSTANDARD, COPY_CHUNK_SIZE
+
+def _files(tmp_path):
+    files = {"a.txt": b"a" * 100, "falha.bin": os.urandom(2 * COPY_CHUNK_SIZE), "c.txt": b"c" * 10}
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+    return files
+
+def _fail_second_read(monkeypatch):
+    """Simula um erro de leitura depois do primeiro bloco de falha.bin."""
+    calls = []
+    def throttle_read(size):
+        if size == COPY_CHUNK_SIZE:
+            calls.append(size)
+            if len(calls) == 2:
+                raise OSError("erro de leitura simulado")
+    monkeypatch.setattr(tar_writer, "throttle_read", throttle_read)
+
+def test_tar_file_rewinds_failed_entry(tmp_path, monkeypatch):
+    files = _files(tmp_path)
+    _fail_second_read(monkeypatch)
+    part = str(tmp_path / "parte.tar")
+    with TarWriter(part) as writer:
+        for name in files:
+            try:
+                writer.write(str(tmp_path / name), name)
+            except OSError:
+                pass
+    assert [entry[0] for entry in writer.entries] == ["a.txt", "c.txt"]
+    with tarfile.open(part) as tar:
+        assert tar.getnames() == ["a.txt", "c.txt"]
+        assert tar.extractfile("c.txt").read() == files["c.txt"]
+
+def test_tar_zst_fails_part_on_partial_entry(tmp_path, monkeypatch):
+    pytest.importorskip("zstandard")
+    files = _files(tmp_path)
+    _fail_second_read(monkeypatch)
+    writer = TarWriter(str(tmp_path / "parte.tar.zst"), compression=ZIP_ZSTANDARD)
+    writer.write(str(tmp_path / "a.txt"), "a.txt")
+    with pytest.raises(PartBrokenError):
+        writer.write(str(tmp_path / "falha.bin"), "falha.bin")
+    # A entrada com falha não entra nos registros da parte
+    assert [entry[:2] for entry in writer.entries] == [("a.txt", len(files["a.txt"]))]
+    # A parte não aceita mais entradas nem é finalizada
+    with pytest.raises(PartBrokenError):
+        writer.write(str(tmp_path / "c.txt"), "c.txt")
+    with pytest.raises(PartBrokenError):
+        writer.close()
+
+@pytest.mark.parametrize("part_format", [PART_FORMAT_TAR, PART_FORMAT_TAR_ZST])
+def test_compress_directory_handles_read_failure(tmp_path, monkeypatch, part_format):
+    if part_format == PART_FORMAT_TAR_ZST:
+        pytest.importorskip("zstandard")
+    from auto_zip import compress_directory
+    src = tmp_path / "origem"
+    src.mkdir()
+    files = _files(src)
+    _fail_second_read(monkeypatch)
+    out = tmp_path / "saida"
+    out.mkdir()
+    compression = ZIP_ZSTANDARD if part_format == PART_FORMAT_TAR_ZST else 0
+    name = f"parte.{part_format}"
+    ok = compress_directory(str(src), name, sum(map(len, files.values())), str(out), compression,
+                            show_progress=False, part_format=part_format)
+    if part_format == PART_FORMAT_TAR:
+        # O tar em arquivo volta ao início da entrada e segue sem o arquivo com falha
+        assert ok
+        with tarfile.open(str(out / name)) as tar:
+            assert sorted(tar.getnames()) == ["a.txt", "c.txt"]
+    else:
+        assert not ok
+        assert not os.path.exists(str(out / name))
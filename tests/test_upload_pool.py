@@ -0,0 +1,52 @@
+import os
+from upload_pool import UploadPool, LocalBackend, LocalChats
+
+CHANNEL = -100
+STAGING = -200
+
+def _parts(tmp_path, sizes):
+    paths = []
+    for i, size in enumerate(sizes, start=1):
+        path = tmp_path / f"pasta_parte_{i:02}.zip"
+        path.write_bytes(b"\0" * size)
+        paths.append(str(path))
+    return paths
+
+def test_ordered_commit_with_flood_wait_requeue(tmp_path):
+    # Tamanhos variados fazem as partes terminarem fora de ordem
+    paths = _parts(tmp_path, [900_000, 100_000, 600_000, 50_000, 300_000, 700_000])
+    chats = LocalChats()
+    flooding = LocalBackend(chats, bytes_per_second=20 * 1024 * 1024, flood_every=2, flood_seconds=0.05)
+    pool = UploadPool([
+        ("principal", LocalBackend(chats, bytes_per_second=20 * 1024 * 1024)),
+        ("extra", flooding),
+    ])
+
+    messages = pool.upload_parts(paths, CHANNEL, staging_chat_id=STAGING)
+
+    names = [os.path.basename(path) for path in paths]
+    assert all(messages)
+    assert [message.file_name for message in messages] == names
+    assert chats.visible(CHANNEL) == names
+    # Mensagens de preparo copiadas para o canal são apagadas
+    assert chats.visible(STAGING) == []
+    # FloodWait não conta como tentativa: todas as partes foram enviadas uma única vez
+    stats = {info["session"]: info for info in pool.stats()}
+    assert flooding._sends > stats["extra"]["parts"]
+    assert sum(info["parts"] for info in stats.values()) == len(paths)
+
+def test_faster_session_is_preferred(tmp_path):
+    paths = _parts(tmp_path, [1024 * 1024] * 8)
+    chats = LocalChats()
+    pool = UploadPool([
+        ("lenta", LocalBackend(chats, bytes_per_second=2 * 1024 * 1024)),
+        ("rapida", LocalBackend(chats, bytes_per_second=64 * 1024 * 1024)),
+    ])
+
+    messages = pool.upload_parts(paths, CHANNEL)
+
+    assert chats.visible(CHANNEL) == [os.path.basename(path) for path in paths]
+    assert [message.file_name for message in messages] == [os.path.basename(path) for path in paths]
+    stats = {info["session"]: info for info in pool.stats()}
+    assert stats["rapida"]["parts"] >= 6
+    assert stats["rapida"]["throughput"] > stats["lenta"]["throughput"]
@@ -0,0 +1,94 @@
+import os
+import struct
+import zlib
+import hashlib
+import zipfile
+import pytest
+from zip_writer import ZipWriter
+
+@pytest.mark.parametrize("hash_algorithm", [None, "sha256"])
+def test_stored_entries_have_crc_and_sizes_in_local_header(tmp_path, hash_algorithm):
+    files = {"a.txt": b"hello" * 10, "vazio": b"", "grande.bin": os.urandom(9 * 1024 * 1024)}
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+    part = str(tmp_path / "parte.zip")
+
+    writer = ZipWriter(part, threads=2, hash_algorithm=hash_algorithm)
+    for name in files:
+        writer.write(str(tmp_path / name), name)
+    writer.close()
+
+    raw = open(part, 'rb').read()
+    with zipfile.ZipFile(part) as zf:
+        for info in zf.infolist():
+            assert zf.read(info.filename) == files[info.filename]
+            # Sem data descriptor: leitores em stream usam CRC e tamanhos do cabeçalho local
+            _, _, flags, method, _, _, crc, compress_size, size, _, _ = struct.unpack_from(
+                "<IHHHHHIIIHH", raw, info.header_offset)
+            assert method == zipfile.ZIP_STORED
+            assert not flags & 0x08
+            assert (crc, compress_size, size) == (info.CRC, info.file_size, info.file_size)
+    if hash_algorithm:
+        assert writer.digest == hashlib.sha256(raw).hexdigest()
+
+def test_segment_entries_keep_file_hashes(tmp_path):
+    from auto_zip import build_segment, join_segments
+    from manifest import write_manifest, load_manifest
+    source = tmp_path / "origem"
+    source.mkdir()
+    files = {f"arquivo_{i}.bin": os.urandom(1024 * (i + 1)) for i in range(6)}
+    files["grande.bin"] = os.urandom(9 * 1024 * 1024)
+    for name, data in files.items():
+        (source / name).write_bytes(data)
+    names = sorted(files)
+    output = tmp_path / "saida"
+    output.mkdir()
+
+    segments = []
+    for number, chunk in enumerate((names[:3], names[3:]), start=1):
+        segment_path = str(output / f"pasta.part01.zip.seg{number}")
+        entries = build_segment(str(source), [str(source / name) for name in chunk],
+                                str(tmp_path / f"temp_{number}"), 1, segment_path, hash_algorithm="sha256")
+        segments.append((segment_path, entries))
+    record = join_segments(segments, "pasta.part01.zip", str(output), "sha256")
+    write_manifest(str(output), "pasta", "sha256", [record])
+
+    manifest = load_manifest(str(output))
+    entries = manifest["parts"][0]["entries"]
+    assert sorted(entry["path"] for entry in entries) == names
+    for entry in entries:
+        assert entry["hash"] == hashlib.sha256(files[entry["path"]]).hexdigest()
+    with open(str(output / "pasta.part01.zip"), 'rb') as f:
+        assert manifest["parts"][0]["hash"] == hashlib.sha256(f.read()).hexdigest()
+    with zipfile.ZipFile(str(output / "pasta.part01.zip")) as zf:
+        assert zf.testzip() is None
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_hashed_stored_entries_use_kernel_copy(tmp_path, monkeypatch, threads):
+    import zip_writer
+    copied = []
+    kernel_copy = zip_writer._kernel_copy
+    def counting_copy(src_fd, dst_fd, offset, count):
+        result = kernel_copy(src_fd, dst_fd, offset, count)
+        if result:
+            copied.append(result)
+        return result
+    monkeypatch.setattr(zip_writer, "_kernel_copy", counting_copy)
+    files = {"pequeno.txt": b"abc" * 1000, "grande.bin": os.urandom(9 * 1024 * 1024)}
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+    part = str(tmp_path / "parte.zip")
+
+    with ZipWriter(part, threads=threads, hash_algorithm="sha256") as writer:
+        for name in files:
+            writer.write(str(tmp_path / name), name)
+
+    if not copied:
+        pytest.skip("Cópia pelo kernel indisponível neste sistema")
+    # Todos os dados passam pela cópia pelo kernel, mesmo com os hashes ativos
+    assert sum(copied) == sum(len(data) for data in files.values())
+    with open(part, 'rb') as f:
+        assert writer.digest == hashlib.sha256(f.read()).hexdigest()
+    for arcname, size, crc, digest in writer.entries:
+        assert digest == hashlib.sha256(files[arcname]).hexdigest()
+        assert crc == zlib.crc32(files[arcname])
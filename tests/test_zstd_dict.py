@@ -0,0 +1,63 @@
+import os
+import json
+import zipfile
+import pytest
+from file_index import FileIndex
+from zip_writer import ZipWriter, ZIP_ZSTANDARD
+from toc import write_toc, load_toc, locate, extract_entry
+from zstd_dict import train_dictionary, write_dictionary, find_dictionary, dictionary_name
+
+pytest.importorskip("zstandard")
+
+def _corpus(folder, count=300):
+    """Muitos JSON pequenos com a mesma estrutura (o caso em que o dicionário ajuda)."""
+    os.makedirs(folder)
+    for i in range(count):
+        record = {
+            "id": i,
+            "usuario": f"usuario_{i % 17}",
+            "status": ["ativo", "inativo", "pendente"][i % 3],
+            "endereco": {"cidade": "São Paulo", "estado": "SP", "cep": f"0{i:04d}-000"},
+            "tags": ["cliente", "newsletter", "promocao"][: i % 3 + 1],
+            "saldo": round(i * 1.37, 2),
+        }
+        with open(os.path.join(folder, f"registro_{i:04d}.json"), 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False, indent=2)
+    return FileIndex.scan(folder)
+
+def _build(index, part_path, **options):
+    writer = ZipWriter(part_path, **options)
+    for i in range(len(index)):
+        writer.write(index.path(i), index.relpath(i))
+    writer.close()
+    return writer
+
+def test_train_dictionary_requires_many_small_files(tmp_path):
+    assert train_dictionary(_corpus(str(tmp_path / "poucos"), count=10)) is None
+    dictionary = train_dictionary(_corpus(str(tmp_path / "muitos")))
+    assert isinstance(dictionary, bytes) and dictionary
+
+def test_dictionary_entries_round_trip_through_toc(tmp_path):
+    index = _corpus(str(tmp_path / "origem"))
+    dictionary = train_dictionary(index)
+    output = str(tmp_path / "saida")
+    os.makedirs(output)
+    writer = _build(index, os.path.join(output, "pasta.zip"), compression=ZIP_ZSTANDARD, zstd_dict=dictionary)
+    write_dictionary(output, "pasta", dictionary)
+    toc_path = write_toc(output, "pasta", [{"zip_name": "pasta.zip", "toc": writer.toc}], dictionary_name("pasta"))
+
+    # Quem recebe só tem o índice, o dicionário enviado e a parte
+    toc = load_toc(toc_path)
+    with open(find_dictionary(output), 'rb') as f:
+        uploaded = f.read()
+    for i in (0, 150, len(index) - 1):
+        entry = locate(toc, index.relpath(i))
+        assert entry["method"] == 93
+        with open(index.path(i), 'rb') as f:
+            assert extract_entry(os.path.join(output, entry["part_name"]), entry, uploaded) == f.read()
+
+def test_dictionary_beats_deflate_on_small_files(tmp_path):
+    index = _corpus(str(tmp_path / "origem"))
+    deflate = _build(index, str(tmp_path / "deflate.zip"), compression=zipfile.ZIP_DEFLATED, compresslevel=9)
+    zstd = _build(index, str(tmp_path / "zstd.zip"), compression=ZIP_ZSTANDARD, zstd_dict=train_dictionary(index))
+    assert zstd.size < deflate.size
@@ -0,0 +1,219 @@
+import os
+import sys
+import time
+import ctypes
+import asyncio
+import logging
+import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("ZipFileSender.Throttle")
+
+MB = 1024 * 1024
+# Capacidade do balde: quantos segundos da taxa podem ser gastos de uma vez (rajada)
+BURST_SECONDS = 1.0
+
+# ioprio_set (Linux): número da syscall por arquitetura e classes de prioridade de E/S
+_IOPRIO_SYSCALLS = {"x86_64": 251, "i386": 289, "i686": 289, "aarch64": 30, "armv7l": 314, "ppc64le": 273}
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_SHIFT = 13
+IONICE_CLASSES = {"best-effort": 2, "idle": 3}
+# Menor prioridade dentro da classe best-effort
+_IONICE_LEVEL = 7
+
+def _minutes(hhmm):
+    """Converte "HH:MM" em minutos desde a meia-noite."""
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+class TokenBucket:
+    """
+    Balde de tokens (bytes) compartilhado entre threads e corrotinas.
+
+    Cada consumo reserva os bytes e, se o balde ficar negativo, espera o tempo
+    necessário para repô-lo à taxa atual. A reserva é feita sob lock e a espera fora
+    dele, então vários consumidores dividem a taxa sem se bloquear. A taxa pode variar
+    ao longo do dia (janelas de horário); taxa 0 significa sem limite.
+    """
+
+    def __init__(self, name, rate=0, schedule=()):
+        self.name = name
+        self.rate = rate
+        # Janelas (início, fim, taxa), em minutos do dia; o fim pode passar da meia-noite
+        self.schedule = list(schedule)
+        self._lock = threading.Lock()
+        self._tokens = None
+        self._last = time.monotonic()
+
+    @property
+    def limited(self):
+        """Indica se há limite em algum horário."""
+        return bool(self.rate) or any(rate for _, _, rate in self.schedule)
+
+    def current_rate(self):
+        """Taxa em bytes/s no horário atual (0 = sem limite)."""
+        if self.schedule:
+            now = time.localtime()
+            minute = now.tm_hour * 60 + now.tm_min
+            for start, end, rate in self.schedule:
+                if start <= end:
+                    inside = start <= minute < end
+                else:
+                    inside = minute >= start or minute < end
+                if inside:
+                    return rate
+        return self.rate
+
+    def _reserve(self, amount):
+        """Reserva amount bytes e retorna quantos segundos esperar."""
+        rate = self.current_rate()
+        if not rate or amount <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            burst = rate * BURST_SECONDS
+            if self._tokens is None:
+                self._tokens = burst
+            else:
+                self._tokens = min(burst, self._tokens + (now - self._last) * rate)
+            self._last = now
+            self._tokens -= amount
+            return -self._tokens / rate if self._tokens < 0 else 0.0
+
+    def consume(self, amount):
+        """Consome amount bytes, bloqueando a thread até que caibam na taxa."""
+        delay = self._reserve(amount)
+        if delay:
+            time.sleep(delay)
+
+    async def consume_async(self, amount):
+        """Consome amount bytes sem bloquear o loop de eventos."""
+        delay = self._reserve(amount)
+        if delay:
+            await asyncio.sleep(delay)
+
+# Limites do processo: envio (todas as transmissões) e leitura/escrita da montagem
+UPLOAD = TokenBucket("upload")
+READ = TokenBucket("read")
+WRITE = TokenBucket("write")
+
+_settings = {}
+
+def configure(upload_rate_mb=0, read_rate_mb=0, write_rate_mb=0, rate_schedule=(), build_nice=0,
+              build_ionice="", share=1.0):
+    """
+    Define os limites do processo.
+
+    Args:
+        upload_rate_mb (float): MB/s de envio somando todas as transmissões (0 = sem limite)
+        read_rate_mb (float): MB/s de leitura na montagem das partes
+        write_rate_mb (float): MB/s de escrita na montagem das partes
+        rate_schedule (list): Janelas {"start": "HH:MM", "end": "HH:MM", "<chave>_rate_mb": ...}
+            que substituem os limites acima nesse horário
+        build_nice (int): Prioridade de CPU (nice, 1-19) das threads de montagem (0 = inalterada)
+        build_ionice (str): Classe de E/S das threads de montagem: "idle", "best-effort" ou ""
+        share (float): Fração dos limites para este processo (pool de processos)
+    """
+    _settings.update(upload_rate_mb=upload_rate_mb, read_rate_mb=read_rate_mb, write_rate_mb=write_rate_mb,
+                     rate_schedule=list(rate_schedule), build_nice=build_nice, build_ionice=build_ionice)
+    for bucket, key, rate in ((UPLOAD, "upload_rate_mb", upload_rate_mb),
+                              (READ, "read_rate_mb", read_rate_mb),
+                              (WRITE, "write_rate_mb", write_rate_mb)):
+        bucket.rate = rate * MB * share
+        bucket.schedule = [(_minutes(window["start"]), _minutes(window["end"]), window[key] * MB * share)
+                           for window in rate_schedule if key in window]
+    if build_ionice and build_ionice not in IONICE_CLASSES:
+        logger.warning(f"Classe de E/S desconhecida: {build_ionice}. Ignorando.")
+        _settings["build_ionice"] = ""
+
+def configure_from_config(config):
+    """Define os limites a partir do config.json."""
+    configure(config.get('upload_rate_mb', 0), config.get('read_rate_mb', 0), config.get('write_rate_mb', 0),
+              config.get('rate_schedule', []), config.get('build_nice', 0), config.get('build_ionice', ''))
+    limits = [f"{bucket.name}: {bucket.rate / MB:g} MB/s" for bucket in (UPLOAD, READ, WRITE) if bucket.rate]
+    if limits or _settings["rate_schedule"]:
+        logger.info(f"Limites de taxa: {', '.join(limits) or 'apenas por horário'}"
+                    f" ({len(_settings['rate_schedule'])} janela(s) de horário)")
+
+def settings():
+    """Configuração atual, para repassar a processos do pool (ver init_build_process)."""
+    return dict(_settings)
+
+def throttle_read(amount):
+    """Aplica o limite de leitura da montagem."""
+    READ.consume(amount)
+
+def throttle_write(amount):
+    """Aplica o limite de escrita da montagem."""
+    WRITE.consume(amount)
+
+def throttle_upload(amount):
+    """Aplica o limite de envio (callbacks de progresso síncronos do Pyrogram)."""
+    UPLOAD.consume(amount)
+
+def build_io_limited():
+    """Indica se há limite de leitura ou escrita na montagem."""
+    return READ.limited or WRITE.limited
+
+def upload_progress():
+    """
+    Callback de progresso assíncrono que aplica o limite de envio.
+
+    O Pyrogram aguarda o callback depois de enfileirar cada bloco do arquivo, então a
+    espera atrasa a leitura dos blocos seguintes sem bloquear o loop de eventos.
+    """
+    sent = 0
+
+    async def progress(current, total):
+        nonlocal sent
+        await UPLOAD.consume_async(current - sent)
+        sent = current
+    return progress
+
+def _ioprio_set(io_class, level):
+    """Define a classe de E/S da thread atual (Linux)."""
+    number = _IOPRIO_SYSCALLS.get(platform.machine())
+    if number is None or not sys.platform.startswith("linux"):
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    ioprio = (io_class << _IOPRIO_CLASS_SHIFT) | level
+    return libc.syscall(number, _IOPRIO_WHO_PROCESS, threading.get_native_id(), ioprio) == 0
+
+def lower_priority(nice=None, ionice=None):
+    """
+    Reduz a prioridade de CPU (nice) e de E/S (ionice) da thread atual, conforme
+    build_nice e build_ionice (ou os valores informados). No Linux as duas valem por
+    thread; em outros sistemas, o nice vale para o processo e o ionice não é aplicado.
+    """
+    nice = _settings.get("build_nice", 0) if nice is None else nice
+    ionice = _settings.get("build_ionice", "") if ionice is None else ionice
+    if nice and hasattr(os, "setpriority"):
+        # No Linux, o "processo" de setpriority pode ser uma thread; nos demais, vale o processo
+        who = threading.get_native_id() if sys.platform.startswith("linux") else 0
+        try:
+            os.setpriority(os.PRIO_PROCESS, who, nice)
+        except OSError as e:
+            logger.warning(f"Não foi possível aplicar nice {nice}: {str(e)}")
+    if ionice:
+        try:
+            if not _ioprio_set(IONICE_CLASSES[ionice], _IONICE_LEVEL):
+                logger.warning(f"Não foi possível aplicar a classe de E/S {ionice}.")
+        except (OSError, AttributeError) as e:
+            logger.warning(f"Não foi possível aplicar a classe de E/S {ionice}: {str(e)}")
+
+def priority_configured():
+    """Indica se build_nice ou build_ionice estão definidos."""
+    return bool(_settings.get("build_nice") or _settings.get("build_ionice"))
+
+def run_with_lower_priority(func, *args, **kwargs):
+    """Executa func em uma thread com prioridade reduzida (ou diretamente, se não configurada)."""
+    if not priority_configured():
+        return func(*args, **kwargs)
+    with ThreadPoolExecutor(max_workers=1, initializer=lower_priority) as executor:
+        return executor.submit(func, *args, **kwargs).result()
+
+def init_build_process(build_settings, processes):
+    """Inicializador dos processos de montagem: limites divididos entre os processos e prioridade reduzida."""
+    configure(**build_settings, share=1.0 / max(1, processes))
+    lower_priority()
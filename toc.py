@@ -0,0 +1,172 @@
+import os
+import json
+import zlib
+import bisect
+import logging
+
+try:
+    import zstandard
+except ImportError:  # Necessário apenas para entradas Zstandard (método 93)
+    zstandard = None
+
+logger = logging.getLogger("ZipFileSender.TOC")
+
+# Sufixo do índice de conteúdo (qual parte contém cada arquivo) de cada pasta de saída
+TOC_SUFFIX = "_index.json"
+# Colunas de cada linha de "files" no índice
+TOC_COLUMNS = ["path", "part", "offset", "compressed", "size", "crc32", "method"]
+
+def toc_name(base_name):
+    """
+    Gera o nome do arquivo de índice de conteúdo de uma pasta.
+
+    Args:
+        base_name (str): Nome base (nome da pasta)
+
+    Returns:
+        str: Nome do arquivo de índice
+    """
+    return f"{base_name}{TOC_SUFFIX}"
+
+def write_toc(zip_folder, base_name, parts, dictionary=None, part_format="zip"):
+    """
+    Grava o índice de conteúdo: para cada arquivo, a parte que o contém e a posição
+    dos seus dados dentro do ZIP. Com ele, quem recebe baixa só a parte necessária
+    (ou só o trecho do arquivo, já que o Telegram permite baixar por offset).
+
+    Args:
+        zip_folder (str): Pasta onde estão os ZIPs
+        base_name (str): Nome base (nome da pasta)
+        parts (list): Registros das partes, cada um com 'zip_name' e 'toc'
+            [(arcname, offset, comprimido, tamanho, crc, método), ...]
+        dictionary (str): Nome do dicionário Zstandard das entradas (método 93), se houver
+        part_format (str): Formato das partes; no "tar.zst" os offsets são no stream tar
+            descomprimido
+
+    Returns:
+        str: Caminho do índice gravado
+    """
+    ordered = sorted(parts, key=lambda part: part['zip_name'])
+    files = []
+    for number, part in enumerate(ordered, start=1):
+        for arcname, offset, compressed, size, crc, method in part['toc']:
+            files.append([arcname, number, offset, compressed, size, f"{crc:08x}", method])
+    files.sort(key=lambda row: row[0])
+
+    toc = {
+        "folder": base_name,
+        "parts": [part['zip_name'] for part in ordered],
+        "columns": TOC_COLUMNS,
+        "files": files,
+    }
+    if dictionary:
+        toc["dictionary"] = dictionary
+    if part_format != "zip":
+        toc["format"] = part_format
+
+    toc_path = os.path.join(zip_folder, toc_name(base_name))
+    temp_path = toc_path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(toc, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temp_path, toc_path)
+    logger.info(f"Índice {os.path.basename(toc_path)} gravado ({len(files)} arquivo(s)).")
+    return toc_path
+
+def find_toc(folder_path):
+    """
+    Procura o índice de conteúdo em uma pasta de saída.
+
+    Returns:
+        str: Caminho do índice ou None se não existir
+    """
+    for file in sorted(os.listdir(folder_path)):
+        if file.endswith(TOC_SUFFIX):
+            return os.path.join(folder_path, file)
+    return None
+
+def load_toc(toc_path):
+    """
+    Carrega um índice de conteúdo (por exemplo, baixado do canal).
+
+    Returns:
+        dict: Conteúdo do índice ou None se estiver inválido
+    """
+    try:
+        with open(toc_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Erro ao ler índice {toc_path}: {str(e)}")
+        return None
+
+def locate(toc, path):
+    """
+    Localiza um arquivo no índice.
+
+    Args:
+        toc (dict): Índice carregado
+        path (str): Caminho do arquivo dentro da pasta (com "/")
+
+    Returns:
+        dict: Parte ('part_name') e posição do arquivo, ou None se não estiver no índice
+    """
+    # As linhas são gravadas ordenadas pelo caminho
+    files = toc["files"]
+    position = bisect.bisect_left(files, [path])
+    if position == len(files) or files[position][0] != path:
+        return None
+    entry = dict(zip(toc["columns"], files[position]))
+    entry["part_name"] = toc["parts"][entry["part"] - 1]
+    entry["format"] = toc.get("format", "zip")
+    return entry
+
+def extract_entry(part_path, entry, dictionary=None):
+    """
+    Lê um único arquivo de uma parte a partir da sua posição no índice, sem abrir o ZIP
+    inteiro (serve também para um trecho da parte baixado por offset). No tar.zst, a
+    parte é descomprimida em stream até a posição da entrada.
+
+    Args:
+        part_path (str): Caminho da parte baixada
+        entry (dict): Entrada retornada por locate()
+        dictionary (bytes): Dicionário Zstandard da pasta (entradas com método 93)
+
+    Returns:
+        bytes: Conteúdo original do arquivo
+    """
+    with open(part_path, 'rb') as f:
+        if entry.get("format") == "tar.zst":
+            if zstandard is None:
+                raise RuntimeError("Partes tar.zst requerem o pacote zstandard (pip install zstandard)")
+            reader = zstandard.ZstdDecompressor().stream_reader(f)
+            chunks = []
+            skip = entry["offset"]
+            remaining = entry["compressed"]
+            while skip or remaining:
+                chunk = reader.read(min(skip or remaining, 8 * 1024 * 1024))
+                if not chunk:
+                    raise ValueError(f"Parte {part_path} truncada")
+                if skip:
+                    # Trecho antes da entrada: descartado
+                    skip -= len(chunk)
+                else:
+                    chunks.append(chunk)
+                    remaining -= len(chunk)
+            data = b''.join(chunks)
+        else:
+            f.seek(entry["offset"])
+            data = f.read(entry["compressed"])
+    method = entry["method"]
+    if method == 0:
+        content = data
+    elif method == 8:
+        content = zlib.decompress(data, -zlib.MAX_WBITS)
+    elif method == 93:
+        if zstandard is None:
+            raise RuntimeError("Entradas Zstandard requerem o pacote zstandard (pip install zstandard)")
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        content = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data, max_output_size=entry["size"])
+    else:
+        raise ValueError(f"Método de compressão não suportado: {method}")
+    if f"{zlib.crc32(content):08x}" != entry["crc32"]:
+        raise ValueError(f"CRC-32 inválido para {entry['path']}")
+    return content
@@ -0,0 +1,380 @@
+import os
+import time
+import asyncio
+import inspect
+import logging
+from throttle import upload_progress
+
+logger = logging.getLogger("ZipFileSender.UploadPool")
+
+# Suavização da média móvel exponencial de throughput por sessão
+THROUGHPUT_SMOOTHING = 0.5
+# Throughput presumido (bytes/s) para sessões ainda sem medição
+DEFAULT_THROUGHPUT = 1024 * 1024
+# Tentativas por parte (mesma política do envio sequencial: envio + uma nova tentativa)
+MAX_ATTEMPTS = 2
+# Falhas seguidas (que não sejam FloodWait) para retirar uma sessão do pool
+MAX_SESSION_FAILURES = 3
+
+async def _call(function, *args, **kwargs):
+    """Chama um método do cliente, aguardando o resultado se for assíncrono."""
+    result = function(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+def _flood_wait_seconds(error):
+    """Retorna os segundos de espera de um FloodWait, ou None para outros erros."""
+    if type(error).__name__ != "FloodWait":
+        return None
+    seconds = getattr(error, "value", None)
+    if seconds is None:
+        seconds = getattr(error, "x", 0)
+    return float(seconds or 0)
+
+def _message_id(message):
+    return getattr(message, "id", None) or getattr(message, "message_id", None)
+
+class UploadSession:
+    """Estado de uma sessão do pool: throughput medido, FloodWait e envios em andamento."""
+
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+        self.throughput = None
+        self.flood_until = 0.0
+        self.in_flight = {}  # parte -> término estimado
+        self.failures = 0
+        self.bytes_sent = 0
+        self.parts_sent = 0
+
+    @property
+    def alive(self):
+        return self.failures < MAX_SESSION_FAILURES
+
+    def record(self, size, seconds):
+        """Atualiza o throughput medido após um envio concluído."""
+        rate = size / max(seconds, 1e-3)
+        if self.throughput is None:
+            self.throughput = rate
+        else:
+            self.throughput = THROUGHPUT_SMOOTHING * rate + (1 - THROUGHPUT_SMOOTHING) * self.throughput
+        self.bytes_sent += size
+        self.parts_sent += 1
+        self.failures = 0
+
+class UploadPool:
+    """
+    Distribui o envio das partes entre várias sessões (ex.: várias contas com acesso ao canal).
+
+    Cada parte vai para a sessão que terminaria o envio mais cedo, estimado pelo throughput
+    medido de cada sessão, pelo envio em andamento e pelo FloodWait atual. As partes são
+    enviadas a um canal de preparo (staging) e publicadas no canal de destino em ordem
+    (commit ordenado): uma parte que chega na ordem certa fica onde está; uma parte que
+    chega fora de ordem é copiada pelo servidor (copy_message, sem novo upload) e a
+    mensagem de preparo é apagada.
+
+    Cada sessão envia uma parte por vez; com um tuner (HillClimber), o número de partes
+    simultâneas por sessão é ajustado a cada envio concluído pelo throughput total do pool.
+
+    Os clientes só precisam de send_document, copy_message e delete_messages, síncronos ou
+    assíncronos; LocalBackend implementa essa interface localmente, para testes.
+    """
+
+    def __init__(self, clients, loop=None, tuner=None):
+        """
+        Args:
+            clients (list): Lista de (nome, cliente); o primeiro é o principal, usado no commit
+            loop: Loop asyncio dos clientes (padrão: loop do cliente principal ou um novo)
+            tuner (HillClimber): Ajuste automático de partes simultâneas por sessão (opcional)
+        """
+        if not clients:
+            raise ValueError("O pool de envio precisa de pelo menos uma sessão")
+        self.sessions = [UploadSession(name, client) for name, client in clients]
+        self.primary = self.sessions[0]
+        self.loop = loop or getattr(self.primary.client, "loop", None) or asyncio.new_event_loop()
+        self.tuner = tuner
+        if tuner is not None:
+            for session in self.sessions:
+                # O Pyrogram limita os envios simultâneos de cada cliente por este semáforo
+                if hasattr(session.client, "save_file_semaphore"):
+                    session.client.save_file_semaphore = asyncio.Semaphore(tuner.maximum)
+
+    @property
+    def slots(self):
+        """Partes enviadas ao mesmo tempo por sessão."""
+        return self.tuner.value if self.tuner is not None else 1
+
+    def upload_parts(self, file_paths, channel_id, captions=None, thumb=None, staging_chat_id=None):
+        """
+        Envia as partes pelo pool e as publica em ordem no canal.
+
+        Args:
+            file_paths (list): Caminhos das partes, na ordem de publicação
+            channel_id: Canal de destino
+            captions (list): Legendas por parte (opcional)
+            thumb (str): Miniatura dos documentos (opcional)
+            staging_chat_id: Canal de preparo (padrão: o próprio canal de destino)
+
+        Returns:
+            list: Mensagem publicada de cada parte (None nas partes que falharam)
+        """
+        return self.loop.run_until_complete(
+            self._upload_parts(file_paths, channel_id, captions, thumb, staging_chat_id or channel_id))
+
+    def stats(self):
+        """Resumo por sessão: partes, bytes e throughput medido."""
+        return [
+            {"session": s.name, "parts": s.parts_sent, "bytes": s.bytes_sent,
+             "throughput": s.throughput, "alive": s.alive}
+            for s in self.sessions
+        ]
+
+    def _estimated_finish(self, session, size, now):
+        rates = [s.throughput for s in self.sessions if s.throughput]
+        default = max(rates) if rates else DEFAULT_THROUGHPUT
+        start = now if len(session.in_flight) < self.slots else min(session.in_flight.values())
+        start = max(start, session.flood_until)
+        return start + size / (session.throughput or default)
+
+    def _is_best_for(self, session, size, now):
+        """Verifica se esta sessão terminaria a próxima parte tão cedo quanto qualquer outra."""
+        candidates = [s for s in self.sessions if s.alive]
+        best = min(self._estimated_finish(s, size, now) for s in candidates)
+        return self._estimated_finish(session, size, now) <= best + 1e-6
+
+    async def _upload_parts(self, file_paths, channel_id, captions, thumb, staging_chat_id):
+        captions = captions or [None] * len(file_paths)
+        self._cond = asyncio.Condition()
+        self._queue = list(range(len(file_paths)))
+        self._attempts = [0] * len(file_paths)
+        self._staged = [None] * len(file_paths)
+        self._done = [False] * len(file_paths)
+        sizes = [os.path.getsize(path) for path in file_paths]
+
+        max_slots = self.tuner.maximum if self.tuner is not None else 1
+        workers = [
+            asyncio.ensure_future(self._worker(session, file_paths, sizes, captions, thumb, staging_chat_id))
+            for session in self.sessions
+            for _ in range(max_slots)
+        ]
+        try:
+            committed = await self._commit(len(file_paths), channel_id, staging_chat_id)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        for info in self.stats():
+            rate = f"{info['throughput'] / 1048576:.2f} MB/s" if info['throughput'] else "-"
+            logger.info(f"Sessão {info['session']}: {info['parts']} parte(s), {info['bytes']} bytes, {rate}")
+        return committed
+
+    async def _next_job(self, session, sizes):
+        """Aguarda até haver uma parte para a qual esta sessão seja a melhor escolha."""
+        async with self._cond:
+            while True:
+                if not self._queue or not session.alive:
+                    return None
+                now = time.monotonic()
+                if session.flood_until > now:
+                    timeout = session.flood_until - now
+                elif len(session.in_flight) >= self.slots:
+                    timeout = 1.0
+                elif self._is_best_for(session, sizes[self._queue[0]], now):
+                    index = self._queue.pop(0)
+                    rate = session.throughput or DEFAULT_THROUGHPUT
+                    session.in_flight[index] = now + sizes[index] / rate
+                    return index
+                else:
+                    timeout = 1.0
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _worker(self, session, file_paths, sizes, captions, thumb, staging_chat_id):
+        while True:
+            index = await self._next_job(session, sizes)
+            if index is None:
+                return
+            path = file_paths[index]
+            started = time.monotonic()
+            message = None
+            error = None
+            try:
+                logger.info(f"Sessão {session.name}: enviando {os.path.basename(path)}")
+                message = await _call(
+                    session.client.send_document,
+                    staging_chat_id,
+                    path,
+                    caption=captions[index],
+                    thumb=thumb,
+                    force_document=True,
+                    file_name=os.path.basename(path),
+                    progress=upload_progress(),
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e
+
+            async with self._cond:
+                session.in_flight.pop(index, None)
+                self._attempts[index] += 1
+                if error is None:
+                    session.record(sizes[index], time.monotonic() - started)
+                    if self.tuner is not None:
+                        self.tuner.record(sizes[index], self.slots * sum(1 for s in self.sessions if s.alive))
+                    self._staged[index] = message
+                    self._done[index] = True
+                else:
+                    flood = _flood_wait_seconds(error)
+                    if flood is not None:
+                        # FloodWait não conta como tentativa: a parte volta para o início da fila
+                        logger.warning(f"Sessão {session.name}: FloodWait de {flood:.0f}s")
+                        session.flood_until = time.monotonic() + flood
+                        self._attempts[index] -= 1
+                        self._queue.insert(0, index)
+                    else:
+                        logger.error(f"Sessão {session.name}: erro ao enviar {os.path.basename(path)}: {str(error)}")
+                        session.failures += 1
+                        if self._attempts[index] < MAX_ATTEMPTS:
+                            self._queue.insert(0, index)
+                        else:
+                            self._done[index] = True
+                    if not any(s.alive for s in self.sessions):
+                        # Nenhuma sessão disponível: as partes restantes falham
+                        for pending in self._queue:
+                            self._done[pending] = True
+                        self._queue.clear()
+                self._cond.notify_all()
+
+    async def _commit(self, count, channel_id, staging_chat_id):
+        """Publica as partes no canal de destino, estritamente em ordem."""
+        committed = []
+        last_id = 0
+        for index in range(count):
+            async with self._cond:
+                while not self._done[index]:
+                    await self._cond.wait()
+                staged = self._staged[index]
+            if staged is None:
+                committed.append(None)
+                continue
+
+            staged_id = _message_id(staged)
+            if str(staging_chat_id) == str(channel_id) and staged_id > last_id:
+                # Chegou em ordem: a mensagem de preparo já é a publicação
+                message = staged
+            else:
+                message = await self._copy_in_order(channel_id, staging_chat_id, staged_id)
+                if message is None:
+                    committed.append(None)
+                    continue
+            last_id = _message_id(message)
+            committed.append(message)
+        return committed
+
+    async def _copy_in_order(self, channel_id, staging_chat_id, staged_id):
+        client = self.primary.client
+        while True:
+            try:
+                message = await _call(client.copy_message, channel_id, staging_chat_id, staged_id)
+                break
+            except Exception as e:
+                flood = _flood_wait_seconds(e)
+                if flood is None:
+                    logger.error(f"Erro ao publicar mensagem {staged_id} em ordem: {str(e)}")
+                    return None
+                await asyncio.sleep(flood)
+        try:
+            await _call(client.delete_messages, staging_chat_id, staged_id)
+        except Exception as e:
+            logger.warning(f"Erro ao apagar mensagem de preparo {staged_id}: {str(e)}")
+        return message
+
+class LocalMessage:
+    """Mensagem do LocalBackend."""
+
+    def __init__(self, id, chat_id, file_name, caption=None):
+        self.id = id
+        self.chat_id = chat_id
+        self.file_name = file_name
+        self.caption = caption
+
+class LocalChats:
+    """Canais simulados em memória, compartilhados pelos LocalBackend de um teste."""
+
+    def __init__(self):
+        self.messages = {}
+        self._next_id = {}
+
+    def post(self, chat_id, file_name, caption=None):
+        message_id = self._next_id.get(chat_id, 0) + 1
+        self._next_id[chat_id] = message_id
+        message = LocalMessage(message_id, chat_id, file_name, caption)
+        self.messages.setdefault(chat_id, []).append(message)
+        return message
+
+    def visible(self, chat_id):
+        """Nomes dos arquivos do canal, na ordem das mensagens."""
+        return [m.file_name for m in sorted(self.messages.get(chat_id, []), key=lambda m: m.id)]
+
+class FloodWait(Exception):
+    """FloodWait simulado (mesmo nome e atributo value do erro do Pyrogram)."""
+
+    def __init__(self, value):
+        super().__init__(f"FloodWait de {value}s")
+        self.value = value
+
+class LocalBackend:
+    """
+    Substituto local de uma sessão do Telegram para testar o pool sem rede.
+
+    Simula o tempo de envio a partir de bytes_per_second (por envio), dividido entre os
+    envios simultâneos quando link_bytes_per_second limita o total da sessão, e
+    opcionalmente um FloodWait a cada flood_every envios.
+    """
+
+    def __init__(self, chats, bytes_per_second=50 * 1024 * 1024, flood_every=0, flood_seconds=1,
+                 link_bytes_per_second=None):
+        self.chats = chats
+        self.bytes_per_second = bytes_per_second
+        self.link_bytes_per_second = link_bytes_per_second
+        self.flood_every = flood_every
+        self.flood_seconds = flood_seconds
+        self._sends = 0
+        self._active = 0
+
+    async def send_document(self, chat_id, document, caption=None, thumb=None, force_document=True,
+                            file_name=None, progress=None):
+        self._sends += 1
+        if self.flood_every and self._sends % self.flood_every == 0:
+            raise FloodWait(self.flood_seconds)
+        self._active += 1
+        try:
+            # Blocos de 512 KiB, como o Pyrogram, com o callback de progresso a cada bloco
+            size = os.path.getsize(document)
+            sent = 0
+            while sent < size:
+                chunk = min(512 * 1024, size - sent)
+                rate = self.bytes_per_second
+                if self.link_bytes_per_second:
+                    rate = min(rate, self.link_bytes_per_second / self._active)
+                await asyncio.sleep(chunk / rate)
+                sent += chunk
+                if progress is not None:
+                    await progress(sent, size)
+        finally:
+            self._active -= 1
+        return self.chats.post(chat_id, file_name or os.path.basename(document), caption)
+
+    async def copy_message(self, chat_id, from_chat_id, message_id):
+        source = next(m for m in self.chats.messages[from_chat_id] if m.id == message_id)
+        return self.chats.post(chat_id, source.file_name, source.caption)
+
+    async def delete_messages(self, chat_id, message_ids):
+        ids = set(message_ids) if isinstance(message_ids, (list, tuple, set)) else {message_ids}
+        self.chats.messages[chat_id] = [m for m in self.chats.messages.get(chat_id, []) if m.id not in ids]
+        return True
@@ -146,7 +146,28 @@ def load_config():
         "threads": 4,
         "compression_level": 0,
         "delete_after_upload": True,
-        "max_concurrent_transmissions": 2  # Número máximo de uploads concorrentes
+        "max_concurrent_transmissions": 2,  # Número máximo de uploads concorrentes
+        "build_backend": "thread",  # "thread" ou "process" (muitos arquivos pequenos)
+        "manifest_hash": "sha256",  # Hash do manifesto de integridade ("" para desativar)
+        "schedule_policy": "name",  # Ordem das pastas: "name", "sjf", "fifo" ou "priority"
+        "extra_channel_ids": [],  # Canais que recebem cópias das mensagens do canal principal
+        "optimize_cover": True,  # Reduzir a capa aos limites do Telegram e gerar miniatura
+        "upload_sessions": [],  # Sessões adicionais (contas) que dividem o envio das partes
+        "staging_channel_id": "",  # Canal de preparo do pool de envio ("" = canal principal)
+        "autotune": False,  # Ajustar threads e envios simultâneos pelo throughput medido
+        "part_size_mode": "fixed",  # "fixed" (max_size_mb) ou "adaptive" (pelo histórico de envio)
+        "read_order": "none",  # Ordem de leitura da origem: "none", "inode" ou "extent" (HDD/cache frio)
+        "content_index": True,  # Gerar e enviar o índice de qual parte contém cada arquivo
+        "zstd_dictionary": False,  # Zstandard com dicionário treinado em pastas de muitos arquivos pequenos
+        "part_format": "zip",  # Formato das partes: "zip", "tar" ou "tar.zst"
+        "build_queue": "",  # Fila SQLite compartilhada com workers (main.py --worker); "" = montagem local
+        "upload_rate_mb": 0,  # Limite de envio em MB/s, somando todas as transmissões (0 = sem limite)
+        "read_rate_mb": 0,  # Limite de leitura da montagem em MB/s (0 = sem limite)
+        "write_rate_mb": 0,  # Limite de escrita da montagem em MB/s (0 = sem limite)
+        "rate_schedule": [],  # Janelas de horário com outros limites: {"start", "end", "<x>_rate_mb"}
+        "build_nice": 0,  # nice (1-19) das threads de montagem (0 = inalterado)
+        "build_ionice": "",  # Classe de E/S das threads de montagem: "idle", "best-effort" ou ""
+        "reclaim_workers": 4  # Threads que apagam pastas em segundo plano (0 = apagar na hora)
     }
     
     try:
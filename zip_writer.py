@@ -0,0 +1,667 @@
+import os
+import sys
+import stat
+import time
+import struct
+import zlib
+import hashlib
+import logging
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from throttle import throttle_read, throttle_write
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional: só o método ZIP_ZSTANDARD depende dele
+    zstandard = None
+
+logger = logging.getLogger("ZipFileSender.ZipWriter")
+
+# Assinaturas e estruturas do formato ZIP (APPNOTE.TXT)
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IBBHHHHHIIIHHHHHII")
+_DATA_DESCRIPTOR = struct.Struct("<IIII")
+_DATA_DESCRIPTOR64 = struct.Struct("<IIQQ")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_END_RECORD64 = struct.Struct("<IQHHIIQQQQ")
+_END_LOCATOR64 = struct.Struct("<IIQI")
+
+_SIG_LOCAL = 0x04034b50
+_SIG_CENTRAL = 0x02014b50
+_SIG_DESCRIPTOR = 0x08074b50
+_SIG_END = 0x06054b50
+_SIG_END64 = 0x06064b50
+_SIG_LOCATOR64 = 0x07064b50
+
+_ZIP64_LIMIT = (1 << 31) - 1
+_ZIP64_MARKER = 0xFFFFFFFF
+_ZIP_MAX_ENTRIES = 0xFFFF
+_VERSION_DEFAULT = 20
+_VERSION_ZIP64 = 45
+_FLAG_DATA_DESCRIPTOR = 0x08
+# Posição do CRC-32 no cabeçalho local (corrigido após os dados nas entradas STORED)
+_LOCAL_CRC_OFFSET = 14
+_FLAG_UTF8 = 0x800
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+_VERSION_ZSTD = 63
+
+# Método Zstandard do APPNOTE (mesmo valor de zipfile.ZIP_ZSTANDARD no Python 3.14)
+ZIP_ZSTANDARD = 93
+# Nível padrão do Zstandard quando nenhum nível é informado
+ZSTD_DEFAULT_LEVEL = 3
+
+_CREATE_SYSTEM = 0 if sys.platform == 'win32' else 3
+
+# Tamanho dos blocos copiados por chamada (kernel ou espaço de usuário)
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# Entradas a partir deste tamanho têm o CRC-32 calculado em paralelo, por blocos
+PARALLEL_CRC_THRESHOLD = 64 * 1024 * 1024
+# Tamanho dos blocos comprimidos de forma independente no DEFLATE paralelo
+DEFLATE_BLOCK_SIZE = 1024 * 1024
+# Entradas a partir deste tamanho são comprimidas em paralelo, por blocos
+PARALLEL_DEFLATE_THRESHOLD = 4 * DEFLATE_BLOCK_SIZE
+# Janela do DEFLATE: cada bloco usa os últimos 32 KiB do anterior como dicionário
+_DEFLATE_WINDOW = 32 * 1024
+
+
+def _dos_datetime(timestamp):
+    """Converte um timestamp para os campos de data/hora do formato DOS."""
+    year, month, day, hour, minute, second = time.localtime(timestamp)[:6]
+    if year < 1980:
+        year, month, day, hour, minute, second = 1980, 1, 1, 0, 0, 0
+    elif year > 2107:
+        year, month, day, hour, minute, second = 2107, 12, 31, 23, 59, 58
+    dos_time = (hour << 11) | (minute << 5) | (second // 2)
+    dos_date = ((year - 1980) << 9) | (month << 5) | day
+    return dos_time, dos_date
+
+
+def _gf2_matrix_times(mat, vec):
+    """Multiplica uma matriz 32x32 sobre GF(2) (lista de colunas) por um vetor."""
+    result = 0
+    index = 0
+    while vec:
+        if vec & 1:
+            result ^= mat[index]
+        vec >>= 1
+        index += 1
+    return result
+
+
+@functools.lru_cache(maxsize=32)
+def _crc32_shift_operator(length):
+    """
+    Retorna o operador que avança um CRC-32 por `length` bytes zero.
+
+    Como quase todos os blocos têm o mesmo tamanho, o operador é calculado uma única
+    vez por tamanho e cada combinação custa apenas uma multiplicação matriz-vetor.
+    """
+    # Operador para um único bit zero (polinômio refletido do CRC-32)
+    base = [0xEDB88320] + [1 << n for n in range(31)]
+    # Elevar ao quadrado três vezes: 1 bit -> 2 -> 4 -> 8 bits (um byte)
+    for _ in range(3):
+        base = [_gf2_matrix_times(base, column) for column in base]
+    operator = [1 << n for n in range(32)]
+    while length:
+        if length & 1:
+            operator = [_gf2_matrix_times(base, column) for column in operator]
+        length >>= 1
+        if length:
+            base = [_gf2_matrix_times(base, column) for column in base]
+    return tuple(operator)
+
+
+def crc32_combine(crc1, crc2, len2):
+    """
+    Combina CRC-32 de dois blocos consecutivos (equivalente ao crc32_combine do zlib).
+
+    Args:
+        crc1 (int): CRC-32 do primeiro bloco
+        crc2 (int): CRC-32 do segundo bloco
+        len2 (int): Tamanho em bytes do segundo bloco
+
+    Returns:
+        int: CRC-32 da concatenação dos dois blocos
+    """
+    if len2 <= 0:
+        return crc1
+    return _gf2_matrix_times(_crc32_shift_operator(len2), crc1) ^ crc2
+
+
+def _pread_crc32(fd, count, offset):
+    """Lê um bloco do arquivo na posição indicada e retorna seu CRC-32."""
+    return zlib.crc32(os.pread(fd, count, offset))
+
+
+def _deflate_block(data, dictionary, level, last):
+    """
+    Comprime um bloco de forma independente, como no pigz.
+
+    O bloco é preparado com os últimos 32 KiB do bloco anterior como dicionário e
+    termina com Z_SYNC_FLUSH (alinhado em byte, sem marcar fim de stream), de modo que
+    a concatenação dos blocos forma um único stream DEFLATE válido. Apenas o último
+    bloco é finalizado com Z_FINISH.
+
+    Returns:
+        tuple: (dados comprimidos, CRC-32 dos dados originais)
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(data)
+    compressed += compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return compressed, zlib.crc32(data)
+
+
+def _kernel_copy(src_fd, dst_fd, offset, count):
+    """
+    Copia um bloco de src_fd (a partir de offset) para a posição atual de dst_fd
+    sem passar os dados pelo espaço de usuário.
+
+    Returns:
+        int: Bytes copiados, ou None se o kernel não suportar a operação
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            return os.copy_file_range(src_fd, dst_fd, count, offset_src=offset)
+        except OSError:
+            pass
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+        try:
+            return os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError:
+            pass
+    return None
+
+
+class ZipWriter:
+    """
+    Escritor de arquivos ZIP (STORED ou DEFLATED) otimizado para throughput.
+
+    Os dados de cada arquivo são movidos para o ZIP com os.copy_file_range/os.sendfile
+    quando disponíveis (Linux), sem cópias em espaço de usuário. O CRC-32 é calculado
+    em blocos grandes logo após cada bloco copiado (com o cache de páginas ainda quente).
+    Nas entradas STORED, os tamanhos vão no cabeçalho local e o CRC é regravado nele
+    após os dados (sem data descriptor, que leitores em stream recusam para STORED),
+    também com hashes, sem uma leitura prévia da origem;
+    nas comprimidas, CRC e tamanhos vão em um data descriptor após os dados. O
+    diretório central é escrito no fechamento.
+
+    Em sistemas sem cópia pelo kernel (ex.: Windows), usa um laço de leitura/escrita
+    com buffers grandes, calculando o CRC sobre o mesmo buffer.
+
+    Com threads > 1, entradas grandes têm o CRC-32 de cada bloco calculado em um pool
+    de threads enquanto os blocos seguintes são copiados, e os resultados são unidos
+    com crc32_combine.
+
+    Com compressão DEFLATED e threads > 1, entradas grandes são divididas em blocos
+    comprimidos em paralelo (estilo pigz) e unidos em um único stream DEFLATE, legível
+    por qualquer descompactador padrão.
+
+    Com hash_algorithm (ex.: "sha256"), calcula durante a escrita o hash de cada entrada
+    (sobre o conteúdo original) e o hash do próprio arquivo ZIP, sem uma segunda leitura
+    da origem; nas entradas STORED, o hash do ZIP relê a entrada recém-gravada (ainda no
+    cache de páginas) depois de corrigido o CRC do cabeçalho.
+
+    Com ZIP_ZSTANDARD (requer o pacote zstandard), cada entrada é um frame Zstandard
+    independente; com zstd_dict (dicionário treinado, em bytes), todas as entradas são
+    comprimidas com ele, o que reduz muito o tamanho de muitos arquivos pequenos e
+    parecidos. O dicionário precisa acompanhar as partes para a descompactação.
+
+    Com segment=True, grava só as entradas (sem diretório central): um segmento. Vários
+    segmentos montados em paralelo (um por processo) formam uma única parte com
+    append_segment, que os concatena e corrige as posições das entradas.
+    """
+
+    def __init__(self, file_path, threads=1, compression=_METHOD_STORED, compresslevel=None,
+                 hash_algorithm=None, zstd_dict=None, segment=False):
+        if compression not in (_METHOD_STORED, _METHOD_DEFLATED, ZIP_ZSTANDARD):
+            raise ValueError(f"Método de compressão não suportado: {compression}")
+        if compression == ZIP_ZSTANDARD and zstandard is None:
+            raise RuntimeError("O método Zstandard requer o pacote zstandard (pip install zstandard)")
+        self.file_path = file_path
+        self._threads = max(1, threads)
+        self._compression = compression
+        if compression == ZIP_ZSTANDARD:
+            self._compresslevel = ZSTD_DEFAULT_LEVEL if compresslevel is None else compresslevel
+            dict_data = zstandard.ZstdCompressionDict(zstd_dict) if zstd_dict else None
+            self._zstd = zstandard.ZstdCompressor(level=self._compresslevel, dict_data=dict_data)
+            # Entradas grandes usam os workers do próprio zstd
+            self._zstd_parallel = zstandard.ZstdCompressor(
+                level=self._compresslevel, dict_data=dict_data, threads=self._threads) \
+                if self._threads > 1 else self._zstd
+        else:
+            self._compresslevel = zlib.Z_DEFAULT_COMPRESSION if compresslevel is None else compresslevel
+        self.hash_algorithm = hash_algorithm
+        self._segment = segment
+        # O hash de um segmento não é usado: o da parte é calculado em append_segment
+        self._part_hash = hashlib.new(hash_algorithm) if hash_algorithm and not segment else None
+        self._executor = None
+        # Leitura também: o hash da parte relê as entradas STORED (ver _hash_written)
+        self._fp = open(file_path, 'w+b', buffering=0)
+        self._fd = self._fp.fileno()
+        self._pos = 0
+        self._entries = []
+        self._kernel_copy = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._shutdown()
+            self._fp.close()
+        return False
+
+    @property
+    def entries(self):
+        """Lista de registros (arcname, tamanho, crc, hash) das entradas gravadas."""
+        return [(entry['arcname'], entry['size'], entry['crc'], entry['digest']) for entry in self._entries]
+
+    @property
+    def toc(self):
+        """
+        Localização dos dados de cada entrada no ZIP: lista de (arcname, offset dos dados,
+        tamanho comprimido, tamanho, crc, método), para leitura de uma única entrada.
+        """
+        return [
+            (entry['arcname'], entry['data_offset'], entry['compress_size'], entry['size'],
+             entry['crc'], entry['method'])
+            for entry in self._entries
+        ]
+
+    @property
+    def segment_entries(self):
+        """Entradas gravadas, com posições relativas ao início do arquivo (ver append_segment)."""
+        return list(self._entries)
+
+    @property
+    def size(self):
+        """Bytes gravados no ZIP até o momento."""
+        return self._pos
+
+    @property
+    def digest(self):
+        """Hash (hexadecimal) de todos os bytes gravados, ou None se desativado."""
+        return self._part_hash.hexdigest() if self._part_hash is not None else None
+
+    def _write(self, data):
+        throttle_write(len(data))
+        if self._part_hash is not None:
+            self._part_hash.update(data)
+        view = memoryview(data)
+        while view:
+            written = self._fp.write(view)
+            view = view[written:]
+        self._pos += len(data)
+
+    def write(self, filename, arcname=None):
+        """
+        Adiciona um arquivo ao ZIP.
+
+        Args:
+            filename (str): Caminho do arquivo a ser adicionado
+            arcname (str): Nome do arquivo dentro do ZIP (padrão: nome do arquivo)
+        """
+        st = os.stat(filename)
+        if not stat.S_ISREG(st.st_mode):
+            raise ValueError(f"{filename} não é um arquivo regular")
+        if arcname is None:
+            arcname = os.path.basename(filename)
+        arcname = arcname.replace(os.sep, '/').lstrip('/')
+
+        size = st.st_size
+        method = self._compression
+        if method != _METHOD_STORED:
+            # Mesma margem usada pelo zipfile para dados que crescem ao comprimir
+            zip64 = size * 1.05 > _ZIP64_LIMIT
+        else:
+            zip64 = size > _ZIP64_LIMIT
+        name = arcname.encode('utf-8')
+        stored = method == _METHOD_STORED
+        flags = 0 if stored else _FLAG_DATA_DESCRIPTOR
+        if not arcname.isascii():
+            flags |= _FLAG_UTF8
+        version = _VERSION_ZIP64 if zip64 else _VERSION_DEFAULT
+        if method == ZIP_ZSTANDARD:
+            version = _VERSION_ZSTD
+        dos_time, dos_date = _dos_datetime(st.st_mtime)
+
+        # STORED: tamanhos no cabeçalho local (já conhecidos); comprimidas: zerados,
+        # com CRC e tamanhos no data descriptor
+        known_size = size if stored else 0
+        if zip64:
+            extra = struct.pack("<HHQQ", 1, 16, known_size, known_size)
+            header_sizes = _ZIP64_MARKER
+        else:
+            extra = b''
+            header_sizes = known_size
+
+        entry_offset = self._pos
+        entry_hash = hashlib.new(self.hash_algorithm) if self.hash_algorithm else None
+        saved_part_hash = self._part_hash.copy() if self._part_hash is not None else None
+        deferred_hash = None
+        if stored and self._part_hash is not None:
+            # O hash da parte segue a ordem de escrita, mas o CRC do cabeçalho só é conhecido
+            # após a cópia: a entrada é gravada sem alimentar o hash da parte, que a relê
+            # do cache de páginas depois de corrigido o cabeçalho (a origem é lida uma vez)
+            deferred_hash, self._part_hash = self._part_hash, None
+        with open(filename, 'rb', buffering=0) as src:
+            try:
+                crc = 0
+                self._write(_LOCAL_HEADER.pack(
+                    _SIG_LOCAL, version, flags, method, dos_time, dos_date,
+                    crc, header_sizes, header_sizes, len(name), len(extra)))
+                self._write(name)
+                self._write(extra)
+                if method == _METHOD_DEFLATED:
+                    crc, compress_size = self._deflate_data(src, size, entry_hash)
+                elif method == ZIP_ZSTANDARD:
+                    crc, compress_size = self._zstd_data(src, size, entry_hash)
+                    if not zip64 and compress_size > _ZIP64_LIMIT:
+                        raise RuntimeError(f"Dados comprimidos de {filename} excedem o limite sem ZIP64")
+                else:
+                    crc = self._copy_data(src, size, entry_hash)
+                    self._patch(entry_offset + _LOCAL_CRC_OFFSET, struct.pack("<I", crc))
+                    compress_size = size
+                    if deferred_hash is not None:
+                        self._part_hash = deferred_hash
+                        self._hash_written(entry_offset)
+            except BaseException:
+                # Descartar a entrada parcial para manter o ZIP consistente
+                os.ftruncate(self._fd, entry_offset)
+                self._fp.seek(entry_offset)
+                self._pos = entry_offset
+                self._part_hash = saved_part_hash
+                raise
+
+        if not stored:
+            if zip64:
+                self._write(_DATA_DESCRIPTOR64.pack(_SIG_DESCRIPTOR, crc, compress_size, size))
+            else:
+                self._write(_DATA_DESCRIPTOR.pack(_SIG_DESCRIPTOR, crc, compress_size, size))
+
+        self._entries.append({
+            'arcname': arcname,
+            'name': name,
+            'flags': flags,
+            'version': version,
+            'time': dos_time,
+            'date': dos_date,
+            'method': method,
+            'crc': crc,
+            'digest': entry_hash.hexdigest() if entry_hash is not None else None,
+            'compress_size': compress_size,
+            'size': size,
+            'offset': entry_offset,
+            'data_offset': entry_offset + _LOCAL_HEADER.size + len(name) + len(extra),
+            'mode': st.st_mode,
+        })
+
+    def _patch(self, offset, data):
+        """Regrava bytes já escritos (CRC do cabeçalho local) sem mover a posição de escrita."""
+        if hasattr(os, 'pwrite'):
+            os.pwrite(self._fd, data, offset)
+        else:
+            self._fp.seek(offset)
+            self._fp.write(data)
+            self._fp.seek(self._pos)
+
+    def _hash_written(self, start):
+        """Alimenta o hash da parte com os bytes já gravados de start até a posição atual."""
+        offset = start
+        while offset < self._pos:
+            count = min(COPY_CHUNK_SIZE, self._pos - offset)
+            if hasattr(os, 'pread'):
+                data = os.pread(self._fd, count, offset)
+            else:
+                self._fp.seek(offset)
+                data = self._fp.read(count)
+            if len(data) != count:
+                raise IOError(f"Leitura incompleta de {self.file_path}")
+            self._part_hash.update(data)
+            offset += count
+        if not hasattr(os, 'pread'):
+            self._fp.seek(self._pos)
+
+    def _copy_data(self, src, size, entry_hash=None):
+        """Copia os dados de src para o ZIP e retorna o CRC-32."""
+        src_fd = src.fileno()
+        parallel = self._threads > 1 and size >= PARALLEL_CRC_THRESHOLD
+        if parallel and self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._threads)
+        # CRCs de blocos ainda em cálculo, na ordem do arquivo: (future, tamanho)
+        pending = deque()
+        crc = 0
+        offset = 0
+        try:
+            while offset < size:
+                count = min(COPY_CHUNK_SIZE, size - offset)
+                copied = None
+                if self._kernel_copy:
+                    copied = _kernel_copy(src_fd, self._fd, offset, count)
+                    if not copied:
+                        # Sem suporte do kernel (ou sistema de arquivos): usar o laço em espaço de usuário
+                        self._kernel_copy = False
+                        logger.info("Cópia pelo kernel indisponível, usando cópia em espaço de usuário.")
+                        copied = None
+                if copied:
+                    # copy_file_range/sendfile já avançam a posição do descritor de destino
+                    self._pos += copied
+                    throttle_read(copied)
+                    throttle_write(copied)
+                    # Ler o bloco recém-copiado (já no cache de páginas) apenas para o CRC
+                    if self._part_hash is not None or entry_hash is not None:
+                        # Com hashes, o bloco é lido em ordem para alimentar os hashes da
+                        # entrada e da parte (segmentos só têm o da entrada); só o CRC-32
+                        # segue para o pool
+                        data = os.pread(src_fd, copied, offset)
+                        if self._part_hash is not None:
+                            self._part_hash.update(data)
+                        if entry_hash is not None:
+                            entry_hash.update(data)
+                        if parallel:
+                            pending.append((self._executor.submit(zlib.crc32, data), copied))
+                        else:
+                            crc = zlib.crc32(data, crc)
+                    elif parallel:
+                        pending.append((self._executor.submit(_pread_crc32, src_fd, copied, offset), copied))
+                    else:
+                        crc = zlib.crc32(os.pread(src_fd, copied, offset), crc)
+                    offset += copied
+                else:
+                    src.seek(offset)
+                    data = src.read(count)
+                    if not data:
+                        raise IOError(f"Arquivo truncado durante a leitura: {src.name}")
+                    throttle_read(len(data))
+                    if entry_hash is not None:
+                        entry_hash.update(data)
+                    if parallel:
+                        pending.append((self._executor.submit(zlib.crc32, data), len(data)))
+                        self._write(data)
+                    else:
+                        self._write(data)
+                        crc = zlib.crc32(data, crc)
+                    offset += len(data)
+
+                # Limitar os blocos pendentes para não acumular buffers em memória
+                while len(pending) > self._threads * 2:
+                    future, length = pending.popleft()
+                    crc = crc32_combine(crc, future.result(), length)
+
+            while pending:
+                future, length = pending.popleft()
+                crc = crc32_combine(crc, future.result(), length)
+            return crc
+        finally:
+            # Em caso de erro, não deixar leituras pendentes sobre o descritor de origem
+            for future, _ in pending:
+                future.cancel()
+            wait([future for future, _ in pending])
+
+    def _deflate_data(self, src, size, entry_hash=None):
+        """Comprime os dados de src para o ZIP e retorna (CRC-32, tamanho comprimido)."""
+        level = self._compresslevel
+        start = self._pos
+
+        if self._threads == 1 or size < PARALLEL_DEFLATE_THRESHOLD:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+            crc = 0
+            while True:
+                data = src.read(COPY_CHUNK_SIZE)
+                if not data:
+                    break
+                throttle_read(len(data))
+                if entry_hash is not None:
+                    entry_hash.update(data)
+                crc = zlib.crc32(data, crc)
+                self._write(compressor.compress(data))
+            self._write(compressor.flush())
+            return crc, self._pos - start
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._threads)
+        # Blocos ainda em compressão, na ordem do arquivo: (future, tamanho original)
+        pending = deque()
+        crc = 0
+        offset = 0
+        dictionary = b''
+        try:
+            while offset < size:
+                data = src.read(min(DEFLATE_BLOCK_SIZE, size - offset))
+                if not data:
+                    raise IOError(f"Arquivo truncado durante a leitura: {src.name}")
+                throttle_read(len(data))
+                if entry_hash is not None:
+                    entry_hash.update(data)
+                offset += len(data)
+                last = offset >= size
+                pending.append((self._executor.submit(_deflate_block, data, dictionary, level, last), len(data)))
+                dictionary = data[-_DEFLATE_WINDOW:]
+
+                # Gravar os blocos prontos em ordem, limitando os buffers em memória
+                while pending and (len(pending) > self._threads * 2 or pending[0][0].done()):
+                    future, length = pending.popleft()
+                    compressed, block_crc = future.result()
+                    self._write(compressed)
+                    crc = crc32_combine(crc, block_crc, length)
+
+            while pending:
+                future, length = pending.popleft()
+                compressed, block_crc = future.result()
+                self._write(compressed)
+                crc = crc32_combine(crc, block_crc, length)
+            return crc, self._pos - start
+        finally:
+            for future, _ in pending:
+                future.cancel()
+            wait([future for future, _ in pending])
+
+    def _zstd_data(self, src, size, entry_hash=None):
+        """Comprime os dados de src em um frame Zstandard e retorna (CRC-32, tamanho comprimido)."""
+        start = self._pos
+        compressor = self._zstd_parallel if size >= PARALLEL_DEFLATE_THRESHOLD else self._zstd
+        zobj = compressor.compressobj(size=size)
+        crc = 0
+        while True:
+            data = src.read(COPY_CHUNK_SIZE)
+            if not data:
+                break
+            throttle_read(len(data))
+            if entry_hash is not None:
+                entry_hash.update(data)
+            crc = zlib.crc32(data, crc)
+            self._write(zobj.compress(data))
+        self._write(zobj.flush())
+        return crc, self._pos - start
+
+    def append_segment(self, segment_path, entries):
+        """
+        Acrescenta um segmento (ZipWriter com segment=True) a este ZIP.
+
+        Args:
+            segment_path (str): Arquivo do segmento
+            entries (list): Entradas do segmento (segment_entries)
+        """
+        base = self._pos
+        with open(segment_path, 'rb', buffering=0) as src:
+            while True:
+                data = src.read(COPY_CHUNK_SIZE)
+                if not data:
+                    break
+                throttle_read(len(data))
+                self._write(data)
+        for entry in entries:
+            entry = dict(entry)
+            entry['offset'] += base
+            entry['data_offset'] += base
+            self._entries.append(entry)
+
+    def close(self):
+        """Escreve o diretório central (exceto em segmentos) e fecha o arquivo."""
+        if self._fp.closed:
+            return
+        try:
+            if self._segment:
+                return
+            cd_offset = self._pos
+            for entry in self._entries:
+                self._write_central_header(entry)
+            cd_size = self._pos - cd_offset
+            self._write_end_record(cd_offset, cd_size)
+        finally:
+            self._shutdown()
+            self._fp.close()
+
+    def _shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _write_central_header(self, entry):
+        extra_fields = []
+        size = entry['size']
+        compress_size = entry['compress_size']
+        offset = entry['offset']
+        if size > _ZIP64_LIMIT or compress_size > _ZIP64_LIMIT:
+            extra_fields += [size, compress_size]
+            size_field = compress_size_field = _ZIP64_MARKER
+        else:
+            size_field = size
+            compress_size_field = compress_size
+        if offset > _ZIP64_LIMIT:
+            extra_fields.append(offset)
+            offset_field = _ZIP64_MARKER
+        else:
+            offset_field = offset
+        extra = b''
+        version = entry['version']
+        if extra_fields:
+            extra = struct.pack(f"<HH{len(extra_fields)}Q", 1, 8 * len(extra_fields), *extra_fields)
+            version = _VERSION_ZIP64
+        external_attr = (entry['mode'] & 0xFFFF) << 16
+        self._write(_CENTRAL_HEADER.pack(
+            _SIG_CENTRAL, version, _CREATE_SYSTEM, version, entry['flags'], entry['method'],
+            entry['time'], entry['date'], entry['crc'], compress_size_field, size_field,
+            len(entry['name']), len(extra), 0, 0, 0, external_attr, offset_field))
+        self._write(entry['name'])
+        self._write(extra)
+
+    def _write_end_record(self, cd_offset, cd_size):
+        count = len(self._entries)
+        if count > _ZIP_MAX_ENTRIES or cd_offset > _ZIP64_LIMIT or cd_size > _ZIP64_LIMIT:
+            end64_offset = self._pos
+            self._write(_END_RECORD64.pack(
+                _SIG_END64, 44, _VERSION_ZIP64, _VERSION_ZIP64, 0, 0,
+                count, count, cd_size, cd_offset))
+            self._write(_END_LOCATOR64.pack(_SIG_LOCATOR64, 0, end64_offset, 1))
+            count = min(count, _ZIP_MAX_ENTRIES)
+            cd_offset = min(cd_offset, _ZIP64_MARKER)
+            cd_size = min(cd_size, _ZIP64_MARKER)
+        self._write(_END_RECORD.pack(_SIG_END, 0, 0, count, count, cd_size, cd_offset, 0))
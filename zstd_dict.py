@@ -0,0 +1,97 @@
+import os
+import logging
+
+try:
+    import zstandard
+except ImportError:  # zstandard é opcional: sem ele, o modo com dicionário fica desativado
+    zstandard = None
+
+logger = logging.getLogger("ZipFileSender.ZstdDict")
+
+# Sufixo do dicionário enviado junto com as partes de cada pasta
+DICT_SUFFIX = "_zstd.dict"
+# Tamanho do dicionário treinado (padrão do zstd --train)
+DICT_SIZE = 112 * 1024
+# Arquivos até este tamanho contam como "pequenos" (onde o dicionário ajuda)
+SMALL_FILE_LIMIT = 256 * 1024
+# A pasta precisa de ao menos tantos arquivos pequenos, e ser majoritariamente deles
+MIN_SMALL_FILES = 64
+MIN_SMALL_FRACTION = 0.5
+# Amostra de treino: número de arquivos, bytes por arquivo e total
+SAMPLE_FILES = 4000
+SAMPLE_FILE_BYTES = 64 * 1024
+SAMPLE_TOTAL_BYTES = 16 * 1024 * 1024
+
+def dictionary_name(base_name):
+    """Nome do arquivo de dicionário de uma pasta."""
+    return f"{base_name}{DICT_SUFFIX}"
+
+def find_dictionary(folder_path):
+    """
+    Procura o dicionário Zstandard em uma pasta de saída.
+
+    Returns:
+        str: Caminho do dicionário ou None se não existir
+    """
+    for file in sorted(os.listdir(folder_path)):
+        if file.endswith(DICT_SUFFIX):
+            return os.path.join(folder_path, file)
+    return None
+
+def train_dictionary(index):
+    """
+    Treina um dicionário Zstandard com uma amostra dos arquivos pequenos da pasta.
+
+    Só treina quando a pasta é formada principalmente por muitos arquivos pequenos
+    (JSON, XML, logs...), caso em que a compressão independente de cada entrada
+    perde quase todo o contexto comum entre os arquivos.
+
+    Args:
+        index (FileIndex): Índice dos arquivos da pasta
+
+    Returns:
+        bytes: Dicionário treinado, ou None se o pacote zstandard não estiver
+            instalado ou a pasta não for adequada
+    """
+    if zstandard is None:
+        logger.warning("Pacote zstandard não instalado; dicionário não será usado.")
+        return None
+
+    small = [i for i in range(len(index)) if 0 < index.sizes[i] <= SMALL_FILE_LIMIT]
+    if len(small) < MIN_SMALL_FILES or len(small) < MIN_SMALL_FRACTION * len(index):
+        return None
+
+    # Amostra espalhada por toda a pasta, não só pelos primeiros arquivos
+    step = max(1, len(small) // SAMPLE_FILES)
+    samples = []
+    total = 0
+    for i in small[::step]:
+        try:
+            with open(index.path(i), 'rb') as f:
+                data = f.read(SAMPLE_FILE_BYTES)
+        except OSError:
+            continue
+        samples.append(data)
+        total += len(data)
+        if total >= SAMPLE_TOTAL_BYTES:
+            break
+
+    try:
+        dictionary = zstandard.train_dictionary(DICT_SIZE, samples)
+    except zstandard.ZstdError as e:
+        logger.warning(f"Não foi possível treinar o dicionário: {str(e)}")
+        return None
+    logger.info(f"Dicionário Zstandard treinado com {len(samples)} arquivo(s) ({total} bytes)")
+    return dictionary.as_bytes()
+
+def write_dictionary(zip_folder, base_name, dictionary):
+    """
+    Grava o dicionário na pasta de saída, para ser enviado junto com as partes.
+
+    Returns:
+        str: Caminho do dicionário gravado
+    """
+    dict_path = os.path.join(zip_folder, dictionary_name(base_name))
+    with open(dict_path, 'wb') as f:
+        f.write(dictionary)
+    return dict_path